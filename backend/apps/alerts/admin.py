@@ -3,7 +3,7 @@ Alerts Admin
 """
 
 from django.contrib import admin
-from .models import Alert, EmergencyContact
+from .models import Alert, EmergencyContact, ExpoPushTicket
 
 
 @admin.register(Alert)
@@ -20,3 +20,9 @@ class EmergencyContactAdmin(admin.ModelAdmin):
     list_display = ['name', 'user', 'phone_number', 'contact_type', 'priority', 'is_active']
     list_filter = ['contact_type', 'is_active']
     search_fields = ['name', 'phone_number', 'user__username']
+
+
+@admin.register(ExpoPushTicket)
+class ExpoPushTicketAdmin(admin.ModelAdmin):
+    list_display = ['ticket_id', 'token', 'created_at']
+    search_fields = ['ticket_id', 'token']
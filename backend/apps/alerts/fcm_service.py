@@ -4,15 +4,26 @@ Firebase Cloud Messaging (FCM) Service
 """
 
 import os
+import requests
 import firebase_admin
 from firebase_admin import credentials, messaging
+from requests.adapters import HTTPAdapter
 from django.conf import settings
 
+# Expo Push API
+EXPO_PUSH_URL = "https://exp.host/--/api/v2/push/send"
+EXPO_RECEIPTS_URL = "https://exp.host/--/api/v2/push/getReceipts"
+
 
 class FCMService:
     """Firebase Cloud Messaging 푸시 알림 서비스"""
     
     _initialized = False
+    _expo_session = None
+    
+    # Expo Push API 1회 요청당 최대 메시지 수 / 영수증 조회 수
+    EXPO_BATCH_SIZE = 100
+    EXPO_RECEIPT_BATCH_SIZE = 1000
     
     @classmethod
     def initialize(cls):
@@ -53,58 +64,12 @@ class FCMService:
         """
         # Expo Push Token 처리 (Expo Go 또는 EAS Build)
         if token.startswith('ExponentPushToken'):
-            try:
-                import json
-                import urllib.request
-                import ssl
-                
-                print(f"[Expo] Expo Push Token 감지: {token[:20]}...")
-                
-                # Expo Push API 직접 호출 (Windows SSL 문제 우회)
-                url = "https://exp.host/--/api/v2/push/send"
-                payload = {
-                    "to": token,
-                    "title": title,
-                    "body": body,
-                    "data": data or {},
-                    "sound": "default",
-                }
-                
-                headers = {
-                    "Content-Type": "application/json",
-                    "Accept": "application/json",
-                }
-                
-                request_data = json.dumps(payload).encode('utf-8')
-                req = urllib.request.Request(url, data=request_data, headers=headers, method='POST')
-                
-                # SSL 컨텍스트 생성 (검증 비활성화 - 개발 환경용)
-                ssl_context = ssl.create_default_context()
-                ssl_context.check_hostname = False
-                ssl_context.verify_mode = ssl.CERT_NONE
-                
-                with urllib.request.urlopen(req, context=ssl_context, timeout=10) as response:
-                    result = json.loads(response.read().decode('utf-8'))
-                    
-                    if result.get('data') and result['data'].get('status') == 'ok':
-                        print(f"[Expo] 알림 발송 성공: {result['data'].get('id', 'N/A')}")
-                        return True
-                    elif result.get('data') and result['data'].get('status') == 'error':
-                        print(f"[Expo] 알림 발송 실패: {result['data'].get('message', 'Unknown error')}")
-                        return False
-                    else:
-                        print(f"[Expo] 알림 발송 응답: {result}")
-                        return True
-                    
-            except urllib.error.HTTPError as e:
-                print(f"[Expo] HTTP 에러: {e.code} - {e.read().decode('utf-8')}")
-                return False
-            except Exception as e:
-                print(f"[Expo] 알림 발송 중 예외 발생: {e}")
-                import traceback
-                traceback.print_exc()
-                return False
-
+            print(f"[Expo] Expo Push Token 감지: {token[:20]}...")
+            results = cls.send_expo_batch([
+                {'token': token, 'title': title, 'body': body, 'data': data}
+            ])
+            return results[0]
+        
         # 기존 FCM 처리 (Native)
         cls.initialize()
         
@@ -133,6 +98,197 @@ class FCMService:
             print(f"[FCM] 알림 발송 실패: {e}")
             return False
     
+    @classmethod
+    def _get_expo_session(cls) -> requests.Session:
+        """Expo Push API용 keep-alive 커넥션 풀 세션 (프로세스당 1개)"""
+        if cls._expo_session is None:
+            session = requests.Session()
+            session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=10))
+            session.headers.update({
+                'Content-Type': 'application/json',
+                'Accept': 'application/json',
+                'Accept-Encoding': 'gzip, deflate',
+            })
+            # 기본은 인증서 검증, Windows 개발 환경에서만 EXPO_VERIFY_SSL=False로 비활성화
+            session.verify = settings.PUSH_SETTINGS.get('EXPO_VERIFY_SSL', True)
+            cls._expo_session = session
+        return cls._expo_session
+    
+    @classmethod
+    def send_expo_batch(cls, notifications: list) -> list:
+        """
+        Expo Push API 일괄 발송 (100개씩 청크)
+        - 발송 티켓은 ExpoPushTicket에 저장 → check_expo_push_receipts 태스크에서 영수증 확인
+        - 발송 즉시 DeviceNotRegistered 응답을 받은 토큰은 사용자에게서 제거
+        
+        Args:
+            notifications: [{'token', 'title', 'body', 'data'}, ...]
+            
+        Returns:
+            notifications 순서대로 성공 여부 목록
+        """
+        from .models import ExpoPushTicket
+        
+        results = [False] * len(notifications)
+        tickets = []
+        unregistered = set()
+        session = cls._get_expo_session()
+        
+        for start in range(0, len(notifications), cls.EXPO_BATCH_SIZE):
+            chunk = notifications[start:start + cls.EXPO_BATCH_SIZE]
+            payload = [
+                {
+                    "to": n['token'],
+                    "title": n['title'],
+                    "body": n['body'],
+                    "data": n.get('data') or {},
+                    "sound": "default",
+                }
+                for n in chunk
+            ]
+            
+            try:
+                response = session.post(EXPO_PUSH_URL, json=payload, timeout=10)
+                response.raise_for_status()
+                push_tickets = response.json().get('data', [])
+            except Exception as e:
+                print(f"[Expo] 배치 발송 실패 ({len(chunk)}건): {e}")
+                continue
+            
+            for index, (n, ticket) in enumerate(zip(chunk, push_tickets), start=start):
+                token = n['token']
+                if ticket.get('status') == 'ok':
+                    results[index] = True
+                    if ticket.get('id'):
+                        tickets.append(ExpoPushTicket(ticket_id=ticket['id'], token=token))
+                else:
+                    error = (ticket.get('details') or {}).get('error')
+                    print(f"[Expo] 알림 발송 실패: {ticket.get('message', 'Unknown error')}")
+                    if error == 'DeviceNotRegistered':
+                        unregistered.add(token)
+            
+            print(f"[Expo] 배치 발송 완료: {sum(results[start:start + len(chunk)])}/{len(chunk)}건 성공")
+        
+        if tickets:
+            ExpoPushTicket.objects.bulk_create(tickets, ignore_conflicts=True)
+        if unregistered:
+            cls.unregister_tokens(unregistered)
+        
+        return results
+    
+    @classmethod
+    def fetch_expo_receipts(cls, ticket_ids: list) -> dict:
+        """
+        Expo 발송 영수증 조회 (1000개씩 청크)
+        
+        Returns:
+            {티켓 ID: 영수증} (아직 준비되지 않은 티켓은 포함되지 않음)
+        """
+        receipts = {}
+        session = cls._get_expo_session()
+        
+        for start in range(0, len(ticket_ids), cls.EXPO_RECEIPT_BATCH_SIZE):
+            chunk = ticket_ids[start:start + cls.EXPO_RECEIPT_BATCH_SIZE]
+            response = session.post(EXPO_RECEIPTS_URL, json={'ids': chunk}, timeout=10)
+            response.raise_for_status()
+            receipts.update(response.json().get('data', {}))
+        
+        return receipts
+    
+    @staticmethod
+    def unregister_tokens(tokens) -> int:
+        """더 이상 유효하지 않은 푸시 토큰을 사용자에게서 제거"""
+        from django.contrib.auth import get_user_model
+        
+        User = get_user_model()
+        cleared = User.objects.filter(fcm_token__in=list(tokens)).update(fcm_token='')
+        if cleared:
+            print(f"[Push] 등록 해제된 토큰 {cleared}개 제거")
+        return cleared
+    
+    # FCM send_each 1회 호출당 최대 메시지 수
+    FCM_BATCH_SIZE = 500
+    
+    @classmethod
+    def send_batch(cls, notifications: list) -> list:
+        """
+        여러 기기에 서로 다른 푸시 알림 일괄 발송
+        Native 토큰은 FCM send_each로 최대 500개씩,
+        Expo 토큰은 Expo Push API로 최대 100개씩 한 번의 요청으로 발송
+        
+        Args:
+            notifications: [{'token', 'title', 'body', 'data'}, ...]
+            
+        Returns:
+            notifications 순서대로 성공 여부 목록
+            (같은 토큰으로 여러 메시지를 보내도 메시지별 결과가 섞이지 않도록 인덱스 기준)
+        """
+        results = [False] * len(notifications)
+        native = []
+        expo = []
+        
+        for index, notification in enumerate(notifications):
+            token = notification.get('token')
+            if not token:
+                continue
+            if token.startswith('ExponentPushToken'):
+                expo.append((index, notification))
+            else:
+                native.append((index, notification))
+        
+        if expo:
+            expo_results = cls.send_expo_batch([n for _, n in expo])
+            for (index, _), success in zip(expo, expo_results):
+                results[index] = success
+        
+        if not native:
+            return results
+        
+        cls.initialize()
+        
+        if not cls._initialized:
+            print("[FCM] Firebase가 초기화되지 않았습니다.")
+            return results
+        
+        for start in range(0, len(native), cls.FCM_BATCH_SIZE):
+            indexes = [index for index, _ in native[start:start + cls.FCM_BATCH_SIZE]]
+            chunk = [n for _, n in native[start:start + cls.FCM_BATCH_SIZE]]
+            messages = [
+                messaging.Message(
+                    notification=messaging.Notification(
+                        title=n['title'],
+                        body=n['body'],
+                    ),
+                    data=n.get('data') or {},
+                    token=n['token'],
+                )
+                for n in chunk
+            ]
+            for index, success in zip(indexes, cls._send_each(chunk, lambda: messaging.send_each(messages))):
+                results[index] = success
+        
+        return results
+    
+    @classmethod
+    def _send_each(cls, chunk: list, send) -> list:
+        """FCM 배치 요청 1회 실행 후 chunk 순서대로 성공 여부 목록 반환"""
+        try:
+            batch_response = send()
+        except Exception as e:
+            print(f"[FCM] 배치 발송 실패 ({len(chunk)}건): {e}")
+            return [False] * len(chunk)
+        
+        results = []
+        for n, response in zip(chunk, batch_response.responses):
+            results.append(response.success)
+            if isinstance(response.exception, messaging.UnregisteredError):
+                print(f"[FCM] 등록되지 않은 토큰: {n['token'][:20]}...")
+            elif response.exception:
+                print(f"[FCM] 알림 발송 실패: {response.exception}")
+        
+        print(f"[FCM] 배치 발송 완료: {batch_response.success_count}/{len(chunk)}건 성공")
+        return results
+    
     @classmethod
     def send_medication_reminder(cls, token: str, medication_name: str, time_of_day: str) -> bool:
         """
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-17 17:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alerts', '0002_alter_emergencycontact_user'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='alert',
+            name='status',
+            field=models.CharField(choices=[('pending', '대기 중'), ('queued', '발송 대기열'), ('sent', '발송됨'), ('cancelled', '취소됨'), ('failed', '실패')], default='pending', max_length=15, verbose_name='상태'),
+        ),
+        migrations.AddIndex(
+            model_name='alert',
+            index=models.Index(fields=['status', 'scheduled_at'], name='alert_status_sched_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-17 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alerts', '0003_alter_alert_status_alert_alert_status_sched_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpoPushTicket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ticket_id', models.CharField(max_length=64, unique=True, verbose_name='티켓 ID')),
+                ('token', models.CharField(max_length=255, verbose_name='Expo 푸시 토큰')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Expo 푸시 티켓',
+                'verbose_name_plural': 'Expo 푸시 티켓 목록',
+                'ordering': ['created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-17 18:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alerts', '0004_expopushticket'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alert',
+            index=models.Index(fields=['user', 'scheduled_at'], name='alert_user_sched_idx'),
+        ),
+    ]
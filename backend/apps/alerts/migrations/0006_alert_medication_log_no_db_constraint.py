@@ -0,0 +1,20 @@
+# Generated by Django 4.2.30 on 2026-10-17 18:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medications', '0007_medicationlog_sched_dt_idx'),
+        ('alerts', '0005_alert_user_sched_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='alert',
+            name='medication_log',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='alerts', to='medications.medicationlog', verbose_name='복약 기록'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# 비상 알림 테이블을 scheduled_at 기준 월별 RANGE 파티션으로 변환 (PostgreSQL 전용)
+# 트랜잭션으로 묶지 않고 id 구간별 배치 복사 (PARTITION_COPY_BATCH_SIZE), 실패 시 기존 테이블 자동 복원
+# 복사 중에는 테이블 이름이 일부 데이터만 가리키므로 배포 시 쓰기(워커/Beat)를 멈춘 상태에서 실행
+# 롤백: 이 마이그레이션 이전으로 migrate 하면 convert_to_plain으로 일반 테이블(id 기본 키) 복원
+# 이후 마이그레이션(alerts 0008_alert_queued_at)의 컬럼 추가는 파티션 부모에 적용되어 모든 파티션에 전파됨
+
+from django.db import migrations
+
+
+def partition_alert(apps, schema_editor):
+    from apps.medications.partition_service import convert_to_partitioned
+    convert_to_partitioned(
+        schema_editor,
+        apps.get_model('alerts', 'Alert'),
+        'scheduled_at',
+    )
+
+
+def unpartition_alert(apps, schema_editor):
+    from apps.medications.partition_service import convert_to_plain
+    convert_to_plain(schema_editor, apps.get_model('alerts', 'Alert'))
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('alerts', '0006_alert_medication_log_no_db_constraint'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_alert, unpartition_alert),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-17 18:57
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def lease_queued_alerts(apps, schema_editor):
+    """배포 시점에 발송 중(QUEUED)인 알림에 선점 시간 기록 (즉시 재선점되지 않고 임대 만료 후에만 재발송)"""
+    Alert = apps.get_model('alerts', 'Alert')
+    Alert.objects.filter(status='queued', queued_at__isnull=True).update(queued_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alerts', '0007_partition_alert'),
+    ]
+    
+    operations = [
+        migrations.AddField(
+            model_name='alert',
+            name='queued_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='발송 선점 시간'),
+        ),
+        migrations.RunPython(lease_queued_alerts, migrations.RunPython.noop),
+    ]
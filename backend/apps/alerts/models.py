@@ -19,6 +19,7 @@ class Alert(models.Model):
     
     class Status(models.TextChoices):
         PENDING = 'pending', '대기 중'
+        QUEUED = 'queued', '발송 대기열'
         SENT = 'sent', '발송됨'
         CANCELLED = 'cancelled', '취소됨'
         FAILED = 'failed', '실패'
@@ -45,7 +46,9 @@ class Alert(models.Model):
         related_name='alerts',
         verbose_name='복약 기록',
         null=True,
-        blank=True
+        blank=True,
+        # 복약 기록 테이블은 월별 파티션 (기본 키에 scheduled_datetime 포함)이므로 DB 외래 키 제약 없음
+        db_constraint=False
     )
     alert_type = models.CharField(
         max_length=15,
@@ -75,6 +78,12 @@ class Alert(models.Model):
     scheduled_at = models.DateTimeField(
         verbose_name='예약 시간'
     )
+    # 디스패처 선점(QUEUED 전이) 시간 - 발송 결과 없이 임대 시간이 지나면 다시 선점하여 재발송
+    queued_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='발송 선점 시간'
+    )
     sent_at = models.DateTimeField(
         null=True,
         blank=True,
@@ -95,11 +104,43 @@ class Alert(models.Model):
         verbose_name = '비상 알림'
         verbose_name_plural = '비상 알림 목록'
         ordering = ['-scheduled_at']
+        indexes = [
+            # 분 단위 디스패처의 범위 스캔 (status='pending' AND scheduled_at 구간)
+            models.Index(fields=['status', 'scheduled_at'], name='alert_status_sched_idx'),
+            # 사용자/보호자 알림 목록 (user_id 필터 + scheduled_at 역순 정렬)
+            models.Index(fields=['user', 'scheduled_at'], name='alert_user_sched_idx'),
+        ]
     
     def __str__(self):
         return f"[{self.get_alert_type_display()}] {self.title} ({self.get_status_display()})"
 
 
+class ExpoPushTicket(models.Model):
+    """
+    Expo 푸시 발송 티켓
+    발송 후 영수증(receipt)을 조회하여 DeviceNotRegistered 토큰 정리
+    """
+    
+    ticket_id = models.CharField(
+        max_length=64,
+        unique=True,
+        verbose_name='티켓 ID'
+    )
+    token = models.CharField(
+        max_length=255,
+        verbose_name='Expo 푸시 토큰'
+    )
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        verbose_name = 'Expo 푸시 티켓'
+        verbose_name_plural = 'Expo 푸시 티켓 목록'
+        ordering = ['created_at']
+    
+    def __str__(self):
+        return f"{self.ticket_id} ({self.token[:20]}...)"
+
+
 class EmergencyContact(models.Model):
     """
     비상 연락처
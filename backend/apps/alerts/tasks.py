@@ -4,7 +4,6 @@ Safety Line의 핵심 워크플로우 구현
 """
 
 from celery import shared_task
-from celery.result import AsyncResult
 from django.utils import timezone
 from django.conf import settings
 
@@ -44,65 +43,63 @@ TIME_SLOT_MESSAGES = {
 }
 
 
+def build_safety_alert(user_id, medication_log_id, scheduled_datetime, time_of_day,
+                       medication_name, is_severe):
+    """
+    비상 알림 레코드(미저장) 생성
+    예정 시간 + 임계 시간에 발송되도록 scheduled_at 계산
+    중증 질환인 경우 임계 시간을 0으로 설정하여 보호자에게 즉시 알림
+    """
+    from apps.alerts.models import Alert
+    
+    message_config = TIME_SLOT_MESSAGES.get(time_of_day, TIME_SLOT_MESSAGES['custom'])
+    
+    if is_severe:
+        threshold = 0
+        alert_title = '[긴급/중증] 미복약 알림'
+        alert_message = f'중증 질환 약({medication_name})의 복용 시간이 되었습니다. 즉시 확인이 필요합니다.'
+    else:
+        threshold = settings.SAFETY_LINE_SETTINGS.get('DEFAULT_THRESHOLD_MINUTES', 30)
+        alert_title = message_config['missed_title']
+        alert_message = message_config['missed_body']
+    
+    return Alert(
+        user_id=user_id,
+        medication_log_id=medication_log_id,
+        alert_type=Alert.AlertType.EMERGENCY if is_severe else Alert.AlertType.WARNING,
+        title=alert_title,
+        message=alert_message,
+        scheduled_at=scheduled_datetime + timezone.timedelta(minutes=threshold),
+    )
+
+
 @shared_task(bind=True, max_retries=3)
 def schedule_medication_alert(self, medication_log_id):
     """
-    복약 알림 전체 예약 (정시 리마인더 + 비상 알림)
+    복약 비상 알림 계획 (Alert 레코드 생성)
+    - 정시 리마인더와 비상 알림 발송은 분 단위 디스패처(dispatch_due_notifications)가 담당
+    - ETA 태스크를 브로커에 적재하지 않음
     """
     from apps.medications.models import MedicationLog
-    from apps.alerts.models import Alert
-    from django.conf import settings
     
     try:
-        log = MedicationLog.objects.get(id=medication_log_id)
-        user = log.schedule.medication.user
-        
-        # 1. 정시 리마인더 예약 (예정 시간)
-        send_scheduled_reminder.apply_async(
-            args=[log.id],
-            eta=log.scheduled_datetime
-        )
-        
-        # 2. 비상 알림 예약 (예정 시간 + 임계 시간)
-        # 중증 질환인 경우 임계 시간을 0으로 설정하여 보호자에게 즉시 알림
-        is_severe = log.schedule.medication.group.is_severe if log.schedule.medication.group else False
-        time_of_day = log.schedule.time_of_day
-        message_config = TIME_SLOT_MESSAGES.get(time_of_day, TIME_SLOT_MESSAGES['custom'])
-        
-        if is_severe:
-            threshold = 0
-            alert_title = '[긴급/중증] 미복약 알림'
-            alert_message = f'중증 질환 약({log.schedule.medication.name})의 복용 시간이 되었습니다. 즉시 확인이 필요합니다.'
-        else:
-            threshold = settings.SAFETY_LINE_SETTINGS.get('DEFAULT_THRESHOLD_MINUTES', 30)
-            alert_title = message_config['missed_title']
-            alert_message = message_config['missed_body']
-            
-        alert_time = log.scheduled_datetime + timezone.timedelta(minutes=threshold)
-        
-        # 알림 레코드 생성 (비상 알림용)
-        alert = Alert.objects.create(
-            user=user,
-            medication_log=log,
-            alert_type=Alert.AlertType.EMERGENCY if is_severe else Alert.AlertType.WARNING,
-            title=alert_title,
-            message=alert_message,
-            scheduled_at=alert_time,
-        )
-        
-        # 비상 알림 태스크 예약
-        task = trigger_safety_alert.apply_async(
-            args=[alert.id],
-            eta=alert_time
+        log = MedicationLog.objects.select_related(
+            'schedule__medication__group',
+        ).get(id=medication_log_id)
+        medication = log.schedule.medication
+        
+        # 알림 레코드 생성 (비상 알림용) - 디스패처가 scheduled_at 도래 시 발송
+        alert = build_safety_alert(
+            user_id=medication.user_id,
+            medication_log_id=log.id,
+            scheduled_datetime=log.scheduled_datetime,
+            time_of_day=log.schedule.time_of_day,
+            medication_name=medication.name,
+            is_severe=medication.group.is_severe if medication.group else False,
         )
-        
-        alert.celery_task_id = task.id
         alert.save()
         
-        log.celery_task_id = task.id
-        log.save()
-        
-        return {'status': 'all_scheduled', 'log_id': log.id}
+        return {'status': 'all_scheduled', 'log_id': log.id, 'alert_id': alert.id}
         
     except MedicationLog.DoesNotExist:
         return {'status': 'error', 'message': '복약 기록을 찾을 수 없습니다.'}
@@ -112,141 +109,514 @@ def schedule_medication_alert(self, medication_log_id):
 
 
 @shared_task
-def send_scheduled_reminder(medication_log_id):
+def schedule_medication_alerts(medication_log_ids):
     """
-    정시 복약 리마인더 발송 (시간대별 그룹 알림)
-    - 같은 사용자, 같은 시간에는 알림 1개만 발송
-    - 시간대(time_of_day)에 따라 메시지 변경
+    여러 복약 기록의 비상 알림 일괄 계획 (Alert bulk_create)
+    약 등록/처방 갱신으로 오늘 추가된 로그용
+    - 일일 계획(plan_daily_alerts)과 같이 사용자별, 날짜별, 시간대(time_of_day)별로 가장 이른 로그 1개만 계획
+    - 같은 날 같은 시간대에 이미 알림이 계획된 경우(같은 시간대의 다른 약) 제외
+    """
+    from apps.medications.log_service import get_local_day_range
+    from apps.medications.models import MedicationLog
+    from apps.alerts.models import Alert
+    
+    rows = list(MedicationLog.objects.filter(
+        id__in=medication_log_ids,
+        status=MedicationLog.Status.PENDING,
+    ).values(
+        'id',
+        'scheduled_datetime',
+        'schedule__time_of_day',
+        'schedule__medication__user_id',
+        'schedule__medication__name',
+        'schedule__medication__group__is_severe',
+    ))
+    if not rows:
+        return {'status': 'all_scheduled', 'scheduled': 0}
+    
+    def slot_key(user_id, scheduled_datetime, time_of_day):
+        return user_id, timezone.localtime(scheduled_datetime).date(), time_of_day
+    
+    # 이미 계획된 (사용자, 날짜, 시간대)
+    dates = [timezone.localtime(row['scheduled_datetime']).date() for row in rows]
+    range_start, range_end = get_local_day_range(min(dates), days=(max(dates) - min(dates)).days + 1)
+    planned = {
+        slot_key(*values)
+        for values in Alert.objects.filter(
+            user_id__in={row['schedule__medication__user_id'] for row in rows},
+            medication_log__scheduled_datetime__gte=range_start,
+            medication_log__scheduled_datetime__lt=range_end,
+        ).values_list(
+            'user_id', 'medication_log__scheduled_datetime', 'medication_log__schedule__time_of_day'
+        )
+    }
+    
+    # 사용자별, 날짜별, 시간대별 가장 이른 로그
+    slots = {}
+    for row in rows:
+        key = slot_key(row['schedule__medication__user_id'], row['scheduled_datetime'], row['schedule__time_of_day'])
+        if key in planned:
+            continue
+        current = slots.get(key)
+        if current is None or row['scheduled_datetime'] < current['scheduled_datetime']:
+            slots[key] = row
+    
+    alerts = Alert.objects.bulk_create([
+        build_safety_alert(
+            user_id=row['schedule__medication__user_id'],
+            medication_log_id=row['id'],
+            scheduled_datetime=row['scheduled_datetime'],
+            time_of_day=row['schedule__time_of_day'],
+            medication_name=row['schedule__medication__name'],
+            is_severe=bool(row['schedule__medication__group__is_severe']),
+        )
+        for row in slots.values()
+    ])
+    
+    return {'status': 'all_scheduled', 'scheduled': len(alerts)}
+
+
+@shared_task
+def dispatch_due_notifications():
+    """
+    Safety Line 분 단위 디스패처
+    Celery Beat에서 매분 실행
+    
+    - 다음 틱 구간까지 도래하는 리마인더(MedicationLog)와 비상 알림(Alert)을
+      인덱스 범위 스캔으로 조회
+    - DB 상태 전이로 행을 선점(claim)한 뒤 배치 태스크로 발송
+      → 장시간 ETA 태스크가 없으므로 워커 메모리가 일정하고,
+        재시작 후에도 선점되지 않은 행은 다음 틱에서 이어서 처리됨
+    - 선점은 임대(lease): 발송 태스크가 행별로 완료를 기록하기 전에 임대 시간이 지나면
+      (디스패처/워커 중단, 발송 실패) 다시 선점하여 재발송
+    - 지연 한도를 넘도록 발송하지 못한 비상 알림(대기/선점 모두)은 FAILED로 종료
+    """
+    from apps.alerts.models import Alert
+    
+    config = settings.SAFETY_LINE_SETTINGS
+    now = timezone.now()
+    window_start = now - timezone.timedelta(minutes=config.get('DISPATCH_CATCHUP_MINUTES', 60))
+    window_end = now + timezone.timedelta(seconds=config.get('DISPATCH_TICK_SECONDS', 60))
+    lease_expired = now - timezone.timedelta(minutes=config.get('DISPATCH_LEASE_MINUTES', 5))
+    batch_size = config.get('DISPATCH_BATCH_SIZE', 500)
+    
+    reminder_count = _dispatch_due_reminders(window_start, window_end, lease_expired, batch_size, now)
+    alert_count = _dispatch_due_safety_alerts(window_start, window_end, lease_expired, batch_size, now)
+    
+    # 선점 구간(window_start 이후)을 벗어난 알림은 다시 선점되지 않으므로 대기(PENDING) 알림까지 종료
+    # (Beat 중단 등으로 한 번도 선점되지 못한 알림이 PENDING으로 영구히 남지 않도록)
+    expired_count = Alert.objects.filter(
+        status__in=[Alert.Status.PENDING, Alert.Status.QUEUED],
+        scheduled_at__lt=window_start,
+    ).update(status=Alert.Status.FAILED, error_message='발송 지연 한도 초과')
+    
+    result = {
+        'status': 'completed',
+        'reminders': reminder_count,
+        'alerts': alert_count,
+        'expired': expired_count,
+    }
+    if reminder_count or alert_count or expired_count:
+        print(f"[Dispatcher] {result}")
+    return result
+
+
+def _enqueue_by_due_time(task, rows, now):
+    """
+    선점된 (id, 예정 시간) 목록을 예정 시간별로 묶어 배치 태스크로 발송
+    틱 구간 내 미래 행은 짧은 ETA(최대 1틱)로만 예약
+    """
+    batches = {}
+    for row_id, due_at in rows:
+        batches.setdefault(due_at, []).append(row_id)
+    
+    for due_at, ids in batches.items():
+        if due_at > now:
+            task.apply_async(args=[ids], eta=due_at)
+        else:
+            task.delay(ids)
+
+
+def _dispatch_due_reminders(window_start, window_end, lease_expired, batch_size, now):
+    """틱 구간 내 미발송(미선점 또는 임대 만료) 리마인더 로그 선점 및 배치 발송"""
+    from apps.medications.models import MedicationLog
+    from django.db import transaction
+    from django.db.models import Q
+    
+    due_logs = MedicationLog.objects.filter(
+        Q(reminded_at__isnull=True) | Q(reminded_at__lt=lease_expired),
+        status=MedicationLog.Status.PENDING,
+        scheduled_datetime__gte=window_start,
+        scheduled_datetime__lt=window_end,
+        reminder_sent_at__isnull=True,
+    ).order_by('scheduled_datetime')
+    
+    total = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                due_logs.select_for_update(skip_locked=True)
+                .values_list('id', 'scheduled_datetime')[:batch_size]
+            )
+            if not rows:
+                break
+            MedicationLog.objects.filter(
+                id__in=[row_id for row_id, _ in rows]
+            ).update(reminded_at=now)
+            transaction.on_commit(
+                lambda rows=rows: _enqueue_by_due_time(send_reminder_batch, rows, now)
+            )
+        total += len(rows)
+    return total
+
+
+def _dispatch_due_safety_alerts(window_start, window_end, lease_expired, batch_size, now):
+    """
+    틱 구간 내 비상 알림 선점 및 배치 발송
+    대기 중(PENDING) 알림과, 발송 완료/실패 확정 없이 선점 임대가 만료된 QUEUED 알림
+    """
+    from apps.alerts.models import Alert
+    from django.db import transaction
+    from django.db.models import Q
+    
+    due_alerts = Alert.objects.filter(
+        Q(status=Alert.Status.PENDING)
+        | Q(status=Alert.Status.QUEUED, queued_at__lt=lease_expired),
+        scheduled_at__gte=window_start,
+        scheduled_at__lt=window_end,
+    ).order_by('scheduled_at')
+    
+    total = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                due_alerts.select_for_update(skip_locked=True)
+                .values_list('id', 'scheduled_at')[:batch_size]
+            )
+            if not rows:
+                break
+            Alert.objects.filter(
+                id__in=[row_id for row_id, _ in rows]
+            ).update(status=Alert.Status.QUEUED, queued_at=now)
+            transaction.on_commit(
+                lambda rows=rows: _enqueue_by_due_time(send_safety_alert_batch, rows, now)
+            )
+        total += len(rows)
+    return total
+
+
+def _push_and_mark(groups, send, mark):
+    """
+    행별 알림 묶음을 푸시 요청 1회 분량(DISPATCH_PUSH_CHUNK_SIZE)씩 발송하고, 청크마다 결과를 바로 반영
+    워커가 배치 도중 종료되어 태스크가 재전달되어도 이미 반영된 청크의 행은 다시 발송되지 않음
+    
+    Args:
+        groups: [(행 ID 목록, 알림 목록), ...]
+        send: 알림 목록 → 같은 순서의 성공 여부 목록
+        mark: (발송 완료 행 ID 목록, 실패 행 ID 목록) 반영 함수
+            알림 중 하나라도 성공한 행은 발송 완료, 모두 실패한 행은 실패
+    
+    Returns:
+        (발송 완료 행 수, 성공한 푸시 수)
+    """
+    chunk_size = settings.SAFETY_LINE_SETTINGS.get('DISPATCH_PUSH_CHUNK_SIZE', 100)
+    chunks = []
+    current = []
+    size = 0
+    for group in groups:
+        current.append(group)
+        size += len(group[1])
+        if size >= chunk_size:
+            chunks.append(current)
+            current = []
+            size = 0
+    if current:
+        chunks.append(current)
+    
+    delivered_count = 0
+    pushed_count = 0
+    for chunk in chunks:
+        results = iter(send([n for _, notifications in chunk for n in notifications]))
+        delivered_ids = []
+        failed_ids = []
+        for row_ids, notifications in chunk:
+            successes = [next(results) for _ in notifications]
+            pushed_count += sum(successes)
+            (delivered_ids if any(successes) else failed_ids).extend(row_ids)
+        mark(delivered_ids, failed_ids)
+        delivered_count += len(delivered_ids)
+    
+    return delivered_count, pushed_count
+
+
+@shared_task(acks_late=True)
+def send_reminder_batch(medication_log_ids):
+    """
+    정시 복약 리마인더 배치 발송 (시간대별 그룹 알림)
+    - 같은 사용자, 같은 시간대(time_of_day)에는 알림 1개만 발송
+    - 직전 1시간 내 같은 시간대 리마인더가 이미 발송된 사용자는 스킵
+    - 발송에 성공했거나 발송할 필요가 없음이 확정된 로그만 reminder_sent_at 기록
+      (실패하거나 워커가 중단된 로그는 선점 임대가 만료된 뒤 디스패처가 다시 선점)
     """
     from apps.medications.models import MedicationLog
     from apps.alerts.fcm_service import FCMService
-    from django.core.cache import cache
+    from django.db.models import Q
     
-    try:
-        log = MedicationLog.objects.select_related(
-            'schedule', 
-            'schedule__medication', 
-            'schedule__medication__user'
-        ).get(id=medication_log_id)
-        
+    logs = MedicationLog.objects.filter(
+        id__in=medication_log_ids,
+        status=MedicationLog.Status.PENDING,
+        reminder_sent_at__isnull=True,
+    ).select_related('schedule', 'schedule__medication__user')
+    
+    # 사용자별, 시간대별 로그 묶음 (첫 로그로 알림 1개)
+    slots = {}
+    for log in logs:
+        key = (log.schedule.medication.user_id, log.schedule.time_of_day)
+        slots.setdefault(key, []).append(log)
+    
+    if not slots:
+        return {'status': 'skipped', 'reason': 'all_taken'}
+    
+    # 중복 발송 방지: 직전 1시간 내 같은 시간대 리마인더 선점/완료 기록 조회
+    # - 이미 발송 완료된 시간대는 스킵
+    # - 같은 틱에서 여러 배치로 나뉜 경우 가장 작은 로그 ID를 가진 배치만 발송
+    batch_ids = set(medication_log_ids)
+    recent_since = timezone.now() - timezone.timedelta(hours=1)
+    claimed = list(
+        MedicationLog.objects.filter(
+            Q(reminded_at__gte=recent_since) | Q(reminder_sent_at__gte=recent_since),
+            schedule__medication__user_id__in={user_id for user_id, _ in slots},
+        ).values_list(
+            'id', 'reminded_at', 'reminder_sent_at', 'status',
+            'schedule__medication__user_id', 'schedule__time_of_day'
+        )
+    )
+    
+    claimed_at = {}
+    for log_id, reminded_at, _, _, user_id, time_of_day in claimed:
+        if log_id in batch_ids:
+            claimed_at[(user_id, time_of_day)] = reminded_at
+    
+    delivered = set()
+    leaders = {}
+    for log_id, reminded_at, sent_at, log_status, user_id, time_of_day in claimed:
+        key = (user_id, time_of_day)
+        if sent_at is not None and sent_at >= recent_since:
+            delivered.add(key)
+        elif (
+            reminded_at == claimed_at.get(key)
+            and log_status == MedicationLog.Status.PENDING
+            and (key not in leaders or log_id < leaders[key])
+        ):
+            leaders[key] = log_id
+    
+    skipped_count = 0
+    done_ids = []
+    groups = []
+    for key, slot_logs in slots.items():
+        log = slot_logs[0]
         user = log.schedule.medication.user
         time_of_day = log.schedule.time_of_day
-        scheduled_time = log.scheduled_datetime
+        slot_ids = [slot_log.id for slot_log in slot_logs]
         
-        # 중복 발송 방지: 같은 사용자, 같은 시간대(아침/점심/저녁/취침전)에 이미 알림이 발송되었는지 확인
-        # 캐시 키: user_id + 날짜 + 시간대(time_of_day)
-        cache_key = f"reminder_sent:{user.id}:{scheduled_time.strftime('%Y-%m-%d')}:{time_of_day}"
-        
-        # cache.add()는 키가 없을 때만 설정 (atomic operation, race condition 방지)
-        # 반환값: True면 새로 설정됨 (이 태스크가 알림 발송), False면 이미 존재 (스킵)
-        if not cache.add(cache_key, True, 3600):
-            print(f"[Reminder] 이미 발송된 시간대 알림 (user={user.id}, time_of_day={time_of_day})")
-            return {'status': 'skipped', 'reason': 'already_sent_for_time_slot'}
-        
-        # 같은 시간대에 미복용 약이 있는지 확인
-        pending_logs = MedicationLog.objects.filter(
-            schedule__medication__user=user,
-            scheduled_datetime=scheduled_time,
-            status='pending'
-        ).count()
+        # 이미 발송된 시간대이거나 토큰이 없으면 발송 불필요로 확정
+        if key in delivered or not user.fcm_token:
+            done_ids.extend(slot_ids)
+            skipped_count += 1
+            continue
         
-        if pending_logs == 0:
-            return {'status': 'skipped', 'reason': 'all_taken'}
-            
-        if not user.fcm_token:
-            return {'status': 'skipped', 'reason': 'no_token'}
+        # 같은 틱의 다른 배치가 발송 (그 배치가 실패하면 임대 만료 후 재선점되어 다시 판단)
+        if leaders.get(key) not in batch_ids:
+            skipped_count += 1
+            continue
         
         # 시간대별 메시지 가져오기
         message_config = TIME_SLOT_MESSAGES.get(time_of_day, TIME_SLOT_MESSAGES['custom'])
         
-        success = FCMService.send_notification(
-            token=user.fcm_token,
-            title=message_config['title'],
-            body=message_config['body'],
-            data={
+        groups.append((slot_ids, [{
+            'token': user.fcm_token,
+            'title': message_config['title'],
+            'body': message_config['body'],
+            'data': {
                 'type': 'medication_reminder',
                 'time_of_day': time_of_day,
-                'scheduled_time': scheduled_time.isoformat()
+                'scheduled_time': log.scheduled_datetime.isoformat()
             }
-        )
-        
-        # 발송 실패 시 캐시 삭제하여 재시도 가능하게 함
-        if not success:
-            cache.delete(cache_key)
-        
-        return {'status': 'sent' if success else 'failed'}
-    except Exception as e:
-        print(f"[Reminder] 발송 에러: {e}")
-        return {'status': 'error', 'message': str(e)}
+        }]))
+    
+    if done_ids:
+        MedicationLog.objects.filter(id__in=done_ids).update(reminder_sent_at=timezone.now())
+    
+    def mark(delivered_ids, failed_ids):
+        if delivered_ids:
+            MedicationLog.objects.filter(id__in=delivered_ids).update(reminder_sent_at=timezone.now())
+    
+    _, sent_count = _push_and_mark(groups, FCMService.send_batch, mark)
+    
+    return {
+        'status': 'completed',
+        'sent': sent_count,
+        'failed': len(groups) - sent_count,
+        'skipped': skipped_count,
+    }
 
 
-@shared_task(bind=True)
-def trigger_safety_alert(self, alert_id):
+@shared_task
+def send_scheduled_reminder(medication_log_id):
     """
-    Safety Line 비상 알림 발송
+    단건 정시 복약 리마인더 발송
+    배포 이전에 예약된 ETA 태스크 호환용 - 디스패처와 같은 방식으로 선점 후 발송
+    """
+    from apps.medications.models import MedicationLog
+    
+    claimed = MedicationLog.objects.filter(
+        id=medication_log_id,
+        reminded_at__isnull=True,
+    ).update(reminded_at=timezone.now())
+    
+    if not claimed:
+        return {'status': 'skipped', 'reason': 'already_dispatched'}
+    
+    return send_reminder_batch([medication_log_id])
+
+
+@shared_task(acks_late=True)
+def send_safety_alert_batch(alert_ids):
+    """
+    Safety Line 비상 알림 배치 발송 (QUEUED 상태의 알림만)
     1단계: 시니어 본인 알림
     2단계: 보호자 푸시 알림
+    - 이미 복용 완료된 기록의 알림은 취소
     - 시간대(time_of_day)별로 1개만 발송 (중복 방지)
+    - 수신자 중 한 명이라도 푸시가 성공한 알림만 SENT
+      모두 실패한 알림은 재시도 횟수만 올리고 QUEUED로 두어 임대 만료 후 재발송
+      (MAX_RETRY_ALERTS회 실패하면 FAILED)
     """
     from apps.alerts.models import Alert
+    from django.db.models import F
+    from apps.medications.models import MedicationLog
     from apps.users.models import GuardianRelation
-    from django.core.cache import cache
     
-    try:
-        alert = Alert.objects.select_related('medication_log__schedule').get(id=alert_id)
-        
-        # 이미 취소되었으면 종료
-        if alert.status == Alert.Status.CANCELLED:
-            return {'status': 'cancelled', 'alert_id': alert_id}
+    alerts = list(
+        Alert.objects.filter(
+            id__in=alert_ids,
+            status=Alert.Status.QUEUED,
+        ).select_related('user', 'medication_log__schedule')
+    )
+    if not alerts:
+        return {'status': 'skipped', 'reason': 'nothing_queued'}
+    
+    # 직전 1시간 내 같은 시간대 비상 알림이 이미 발송된 사용자
+    recent_since = timezone.now() - timezone.timedelta(hours=1)
+    already_sent = set(
+        Alert.objects.filter(
+            user_id__in={alert.user_id for alert in alerts},
+            status=Alert.Status.SENT,
+            sent_at__gte=recent_since,
+        ).values_list('user_id', 'medication_log__schedule__time_of_day')
+    )
+    
+    # 보호자 관계 일괄 조회 (시니어별 보호자 ID 목록)
+    guardians_by_senior = {}
+    for senior_id, guardian_id in GuardianRelation.objects.filter(
+        senior_id__in={alert.user_id for alert in alerts}
+    ).values_list('senior_id', 'guardian_id'):
+        guardians_by_senior.setdefault(senior_id, []).append(guardian_id)
+    
+    cancelled_ids = []
+    groups = []
+    for alert in alerts:
+        log = alert.medication_log
+        
+        # 이미 복용(또는 건너뜀) 처리된 기록이면 취소
+        if log and log.status != MedicationLog.Status.PENDING:
+            cancelled_ids.append(alert.id)
+            continue
+        
+        time_of_day = log.schedule.time_of_day if log and log.schedule else 'unknown'
+        key = (alert.user_id, time_of_day)
+        if key in already_sent:
+            print(f"[Safety Alert] 이미 발송된 시간대 비상 알림 (user={alert.user_id}, time_of_day={time_of_day})")
+            cancelled_ids.append(alert.id)
+            continue
+        already_sent.add(key)
         
         user = alert.user
-        
-        # 시간대 정보 가져오기
-        time_of_day = 'unknown'
-        if alert.medication_log and alert.medication_log.schedule:
-            time_of_day = alert.medication_log.schedule.time_of_day
-        
-        # 중복 발송 방지: 같은 사용자, 같은 날, 같은 시간대에 이미 비상 알림이 발송되었는지 확인
-        today = timezone.localdate()
-        cache_key = f"safety_alert_sent:{user.id}:{today}:{time_of_day}"
-        
-        if not cache.add(cache_key, True, 3600):
-            print(f"[Safety Alert] 이미 발송된 시간대 비상 알림 (user={user.id}, time_of_day={time_of_day})")
-            # 알림 상태를 CANCELLED로 업데이트 (중복)
-            alert.status = Alert.Status.CANCELLED
-            alert.save()
-            return {'status': 'skipped', 'reason': 'already_sent_for_time_slot'}
+        message_config = TIME_SLOT_MESSAGES.get(time_of_day, TIME_SLOT_MESSAGES['custom'])
         
         # 1단계: 시니어 본인 알림 (시간대별 그룹 메시지 사용)
-        message_config = TIME_SLOT_MESSAGES.get(time_of_day, TIME_SLOT_MESSAGES['custom'])
-        send_push_notification(
-            user_id=user.id,
-            title=message_config['missed_title'],
-            message=message_config['missed_body'],
-            severity=alert.alert_type  # 심각도 전달
-        )
+        notifications = [{
+            'user_id': user.id,
+            'title': message_config['missed_title'],
+            'message': message_config['missed_body'],
+            'severity': alert.alert_type,  # 심각도 전달
+        }]
         
         # 2단계: 보호자 알림 (시간대별 그룹 메시지 사용)
-        message_config = TIME_SLOT_MESSAGES.get(time_of_day, TIME_SLOT_MESSAGES['custom'])
-        guardian_relations = GuardianRelation.objects.filter(senior=user)
-        for relation in guardian_relations:
-            guardian = relation.guardian
-            send_push_notification(
-                user_id=guardian.id,
-                title=f'[알림] {user.first_name or user.username}님',
-                message=message_config['missed_body'],
-                severity=Alert.AlertType.EMERGENCY  # 보호자 알림은 긴급으로 처리
+        for guardian_id in guardians_by_senior.get(user.id, []):
+            notifications.append({
+                'user_id': guardian_id,
+                'title': f'[알림] {user.first_name or user.username}님',
+                'message': message_config['missed_body'],
+                'severity': Alert.AlertType.EMERGENCY,  # 보호자 알림은 긴급으로 처리
+            })
+        
+        groups.append(([alert.id], notifications))
+    
+    if cancelled_ids:
+        Alert.objects.filter(id__in=cancelled_ids).update(
+            status=Alert.Status.CANCELLED
+        )
+    
+    max_retries = settings.SAFETY_LINE_SETTINGS.get('MAX_RETRY_ALERTS', 3)
+    
+    def mark(delivered_ids, failed_ids):
+        if delivered_ids:
+            Alert.objects.filter(id__in=delivered_ids).update(
+                status=Alert.Status.SENT,
+                sent_at=timezone.now(),
             )
-        
-        # 알림 상태 업데이트
-        alert.status = Alert.Status.SENT
-        alert.sent_at = timezone.now()
-        alert.save()
-        
-        return {'status': 'sent', 'alert_id': alert_id}
-        
-    except Alert.DoesNotExist:
-        return {'status': 'error', 'message': '알림을 찾을 수 없습니다.'}
+        if failed_ids:
+            Alert.objects.filter(id__in=failed_ids, status=Alert.Status.QUEUED).update(
+                retry_count=F('retry_count') + 1,
+                error_message='푸시 발송 실패',
+            )
+            Alert.objects.filter(
+                id__in=failed_ids,
+                status=Alert.Status.QUEUED,
+                retry_count__gte=max_retries,
+            ).update(status=Alert.Status.FAILED)
+    
+    # 시니어 + 보호자 알림을 푸시 요청 단위로 발송하고 청크마다 상태 반영
+    sent_count, pushed_count = _push_and_mark(groups, send_push_notifications, mark)
+    
+    return {
+        'status': 'completed',
+        'sent': sent_count,
+        'failed': len(groups) - sent_count,
+        'cancelled': len(cancelled_ids),
+        'pushed': pushed_count,
+    }
+
+
+@shared_task(bind=True)
+def trigger_safety_alert(self, alert_id):
+    """
+    단건 Safety Line 비상 알림 발송
+    배포 이전에 예약된 ETA 태스크 호환용 - PENDING → QUEUED 선점 후 배치 로직으로 발송
+    """
+    from apps.alerts.models import Alert
+    
+    claimed = Alert.objects.filter(
+        id=alert_id,
+        status=Alert.Status.PENDING,
+    ).update(status=Alert.Status.QUEUED, queued_at=timezone.now())
+    
+    if not claimed:
+        return {'status': 'skipped', 'alert_id': alert_id}
+    
+    result = send_safety_alert_batch([alert_id])
+    return {**result, 'alert_id': alert_id}
 
 
 @shared_task
@@ -289,83 +659,257 @@ def send_push_notification(user_id, title, message, severity='reminder'):
         return {'status': 'error', 'message': '사용자를 찾을 수 없습니다.'}
 
 
-def revoke_alert_task(task_id):
+def send_push_notifications(notifications):
     """
-    예약된 알림 태스크 취소
-    복약 완료 시 호출
+    여러 사용자에게 푸시 알림 일괄 발송
+    수신자 토큰을 한 번의 쿼리로 조회한 뒤 FCMService.send_batch로 발송
+    
+    Args:
+        notifications: [{'user_id', 'title', 'message', 'severity'}, ...]
+        
+    Returns:
+        notifications 순서대로 성공 여부 목록 (토큰이 없는 사용자는 False)
     """
-    from apps.alerts.models import Alert
-    from celery.result import AsyncResult
+    from django.contrib.auth import get_user_model
+    from apps.alerts.fcm_service import FCMService
+    
+    if not notifications:
+        return []
+    
+    User = get_user_model()
+    tokens = dict(
+        User.objects.filter(
+            id__in={n['user_id'] for n in notifications}
+        ).exclude(fcm_token='').values_list('id', 'fcm_token')
+    )
+    
+    batch = []
+    batch_indexes = []
+    for index, n in enumerate(notifications):
+        token = tokens.get(n['user_id'])
+        if not token:
+            continue
+        batch_indexes.append(index)
+        batch.append({
+            'token': token,
+            'title': n['title'],
+            'body': n['message'],
+            'data': {
+                'user_id': str(n['user_id']),
+                'severity': n.get('severity', 'reminder'),
+            },
+        })
     
-    # Celery 태스크 취소
-    AsyncResult(task_id).revoke(terminate=True)
+    results = [False] * len(notifications)
+    for index, success in zip(batch_indexes, FCMService.send_batch(batch)):
+        results[index] = success
+    return results
+
+
+@shared_task
+def check_expo_push_receipts():
+    """
+    Expo 푸시 발송 영수증 확인
+    Celery Beat에서 15분마다 실행
     
-    # 관련 알림 상태 업데이트
-    Alert.objects.filter(celery_task_id=task_id).update(
-        status=Alert.Status.CANCELLED
+    - 발송 후 15분이 지난 티켓의 영수증을 일괄 조회
+    - DeviceNotRegistered 토큰은 사용자에게서 제거
+    - 영수증을 확인했거나 만료(24시간)된 티켓은 삭제
+    """
+    from apps.alerts.models import ExpoPushTicket
+    from apps.alerts.fcm_service import FCMService
+    
+    now = timezone.now()
+    tickets = dict(
+        ExpoPushTicket.objects.filter(
+            created_at__lte=now - timezone.timedelta(minutes=15)
+        ).values_list('ticket_id', 'token')[:10000]
     )
+    if not tickets:
+        return {'status': 'skipped', 'reason': 'no_tickets'}
+    
+    try:
+        receipts = FCMService.fetch_expo_receipts(list(tickets))
+    except Exception as e:
+        print(f"[Expo] 영수증 조회 실패: {e}")
+        return {'status': 'error', 'message': str(e)}
+    
+    unregistered = set()
+    failed_count = 0
+    for ticket_id, receipt in receipts.items():
+        if receipt.get('status') != 'error':
+            continue
+        failed_count += 1
+        error = (receipt.get('details') or {}).get('error')
+        print(f"[Expo] 발송 영수증 에러 ({error}): {receipt.get('message', '')}")
+        if error == 'DeviceNotRegistered' and ticket_id in tickets:
+            unregistered.add(tickets[ticket_id])
+    
+    cleared = FCMService.unregister_tokens(unregistered) if unregistered else 0
+    
+    ExpoPushTicket.objects.filter(ticket_id__in=list(receipts)).delete()
+    ExpoPushTicket.objects.filter(created_at__lt=now - timezone.timedelta(hours=24)).delete()
+    
+    result = {
+        'status': 'completed',
+        'checked': len(receipts),
+        'failed': failed_count,
+        'tokens_cleared': cleared,
+    }
+    print(f"[Expo] 영수증 확인 완료: {result}")
+    return result
+
+
+def cancel_pending_alerts(medication_log_ids):
+    """
+    예약된 비상 알림 일괄 취소 (복약 완료 시 호출)
+    Celery revoke 브로드캐스트 없이 medication_log FK 인덱스로 상태만 CANCELLED로 전이
+    디스패처/발송 태스크는 발송 시점에 상태를 확인하므로 취소된 알림은 발송되지 않음
     
-    return {'status': 'revoked', 'task_id': task_id}
+    Args:
+        medication_log_ids: 복약 기록 ID 목록
+        
+    Returns:
+        취소된 알림 수
+    """
+    from apps.alerts.models import Alert
+    
+    medication_log_ids = list(medication_log_ids)
+    if not medication_log_ids:
+        return 0
+    
+    return Alert.objects.filter(
+        medication_log_id__in=medication_log_ids,
+        status__in=[Alert.Status.PENDING, Alert.Status.QUEUED],
+    ).update(status=Alert.Status.CANCELLED)
 
 
 @shared_task
 def schedule_daily_reminders():
     """
     매일 실행되는 복약 알림 스케줄러
-    오늘 날짜의 pending 상태인 MedicationLog에 대해 알림 예약
+    오늘 날짜의 pending 상태인 MedicationLog에 대해 비상 알림 일괄 계획
     Celery Beat에서 매일 00:05에 실행
+    
+    user_id 해시(모듈로) 기준으로 샤드를 나누어 워커들에 분산
+    """
+    config = settings.SAFETY_LINE_SETTINGS
+    shard_count = config.get('PLANNER_SHARDS', 8)
+    today = timezone.localdate()
+    
+    for shard in range(shard_count):
+        plan_daily_alerts.delay(shard, shard_count, today.isoformat())
+    
+    result = {
+        'status': 'dispatched',
+        'date': str(today),
+        'shards': shard_count,
+    }
+    print(f"[Daily Scheduler] 샤드 분배 완료: {result}")
+    return result
+
+
+@shared_task
+def plan_daily_alerts(shard, shard_count, date_str):
+    """
+    하루치 비상 알림 일괄 계획 (샤드 단위)
+    
+    1. 오늘의 pending 로그를 ID 기준 keyset 청크로 스트리밍 (필요한 컬럼만 조회)
+    2. 사용자별, 시간대(time_of_day)별로 가장 이른 로그 1개만 남기도록 메모리에서 계획
+       (이미 계획된 시간대는 제외하여 재실행에도 안전)
+    3. Alert 레코드를 bulk_create로 일괄 저장
     """
+    import time
+    from datetime import date
     from apps.medications.models import MedicationLog
-    from django.db.models import Min
+    from apps.alerts.models import Alert
+    from django.db.models import F
     
-    today = timezone.localdate()
-    today_start = timezone.make_aware(
-        timezone.datetime.combine(today, timezone.datetime.min.time())
+    config = settings.SAFETY_LINE_SETTINGS
+    chunk_size = config.get('PLANNER_CHUNK_SIZE', 2000)
+    
+    target_date = date.fromisoformat(date_str)
+    day_start = timezone.make_aware(
+        timezone.datetime.combine(target_date, timezone.datetime.min.time())
+    )
+    day_end = day_start + timezone.timedelta(days=1)
+    
+    started = time.monotonic()
+    
+    # 이미 계획된 (사용자, 시간대) - 재실행 및 당일 추가 등록분 중복 방지
+    planned = set(
+        Alert.objects.annotate(
+            user_shard=F('user_id') % shard_count
+        ).filter(
+            user_shard=shard,
+            medication_log__scheduled_datetime__gte=day_start,
+            medication_log__scheduled_datetime__lt=day_end,
+        ).values_list('user_id', 'medication_log__schedule__time_of_day')
     )
-    today_end = timezone.make_aware(
-        timezone.datetime.combine(today, timezone.datetime.max.time())
+    
+    logs = MedicationLog.objects.annotate(
+        user_id=F('schedule__medication__user_id'),
+        user_shard=F('schedule__medication__user_id') % shard_count,
+    ).filter(
+        user_shard=shard,
+        scheduled_datetime__gte=day_start,
+        scheduled_datetime__lt=day_end,
+        status=MedicationLog.Status.PENDING,
+    ).order_by('id').values(
+        'id',
+        'user_id',
+        'scheduled_datetime',
+        'schedule__time_of_day',
+        'schedule__medication__name',
+        'schedule__medication__group__is_severe',
     )
     
-    # 오늘의 pending 상태 로그를 사용자별, 시간별로 그룹화하여 첫 번째만 가져오기
-    # 같은 시간대에는 알림 1개만 예약
-    logs = MedicationLog.objects.filter(
-        scheduled_datetime__gte=today_start,
-        scheduled_datetime__lte=today_end,
-        status='pending'
-    ).select_related(
-        'schedule',
-        'schedule__medication',
-        'schedule__medication__user'
-    ).order_by('scheduled_datetime')
+    # 사용자별, 시간대별 가장 이른 로그
+    slots = {}
+    scanned = 0
+    last_id = 0
+    while True:
+        chunk = list(logs.filter(id__gt=last_id)[:chunk_size])
+        if not chunk:
+            break
+        last_id = chunk[-1]['id']
+        scanned += len(chunk)
+        
+        for row in chunk:
+            key = (row['user_id'], row['schedule__time_of_day'])
+            if key in planned:
+                continue
+            current = slots.get(key)
+            if current is None or row['scheduled_datetime'] < current['scheduled_datetime']:
+                slots[key] = row
     
-    # 사용자별, 시간대(time_of_day)별로 이미 예약된 것 추적
-    scheduled_alerts = set()  # (user_id, time_of_day)
-    scheduled_count = 0
-    skipped_count = 0
+    scanned_at = time.monotonic()
     
-    for log in logs:
-        user_id = log.schedule.medication.user_id
-        time_of_day = log.schedule.time_of_day  # 아침/점심/저녁/취침전
-        key = (user_id, time_of_day)
-        
-        if key not in scheduled_alerts:
-            # 아직 예약되지 않은 시간대 → 알림 예약
-            try:
-                schedule_medication_alert.delay(log.id)
-                scheduled_alerts.add(key)
-                scheduled_count += 1
-                print(f"[Daily Scheduler] 알림 예약: user={user_id}, time_of_day={time_of_day}, log_id={log.id}")
-            except Exception as e:
-                print(f"[Daily Scheduler] 알림 예약 실패: {e}")
-        else:
-            skipped_count += 1
+    alerts = [
+        build_safety_alert(
+            user_id=row['user_id'],
+            medication_log_id=row['id'],
+            scheduled_datetime=row['scheduled_datetime'],
+            time_of_day=row['schedule__time_of_day'],
+            medication_name=row['schedule__medication__name'],
+            is_severe=bool(row['schedule__medication__group__is_severe']),
+        )
+        for row in slots.values()
+    ]
+    Alert.objects.bulk_create(alerts, batch_size=chunk_size)
+    
+    finished = time.monotonic()
     
     result = {
         'status': 'completed',
-        'date': str(today),
-        'scheduled': scheduled_count,
-        'skipped': skipped_count,
-        'total_logs': logs.count()
+        'date': date_str,
+        'shard': f'{shard + 1}/{shard_count}',
+        'scanned_logs': scanned,
+        'scheduled': len(alerts),
+        'skipped': scanned - len(alerts),
+        'scan_ms': round((scanned_at - started) * 1000, 1),
+        'write_ms': round((finished - scanned_at) * 1000, 1),
+        'total_ms': round((finished - started) * 1000, 1),
     }
-    print(f"[Daily Scheduler] 완료: {result}")
+    print(f"[Daily Scheduler] 계획 완료: {result}")
     return result
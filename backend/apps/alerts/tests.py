@@ -0,0 +1,150 @@
+"""
+Alerts Tests - Safety Line 디스패처 선점/임대/재시도 흐름
+"""
+
+from unittest import mock
+from django.conf import settings
+from django.test import TestCase
+from django.utils import timezone
+from apps.alerts.models import Alert
+from apps.alerts.tasks import dispatch_due_notifications, send_safety_alert_batch
+from apps.users.models import User
+
+
+class SafetyAlertDispatchTests(TestCase):
+    """
+    비상 알림 선점 → 발송 실패 → 임대 만료 후 재선점 → MAX_RETRY_ALERTS회 실패 시 FAILED
+    (배치 태스크 발행은 on_commit 콜백이므로 TestCase에서는 실행되지 않고, 발송 태스크를 직접 호출)
+    """
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='senior', password='x', fcm_token='ExponentPushToken[x]')
+        self.config = settings.SAFETY_LINE_SETTINGS
+        self.lease = timezone.timedelta(minutes=self.config.get('DISPATCH_LEASE_MINUTES', 5))
+    
+    def _alert(self, minutes_ago=1, **fields):
+        return Alert.objects.create(
+            user=self.user,
+            alert_type=Alert.AlertType.WARNING,
+            title='미복약 알림',
+            message='약 복용 시간이 30분 경과했습니다.',
+            scheduled_at=timezone.now() - timezone.timedelta(minutes=minutes_ago),
+            **fields,
+        )
+    
+    def _expire_lease(self, alert):
+        Alert.objects.filter(id=alert.id).update(queued_at=timezone.now() - self.lease - timezone.timedelta(seconds=1))
+    
+    def _send(self, alert, success):
+        with mock.patch(
+            'apps.alerts.tasks.send_push_notifications',
+            side_effect=lambda notifications: [success] * len(notifications),
+        ):
+            return send_safety_alert_batch([alert.id])
+    
+    def test_claim_marks_queued_with_lease(self):
+        alert = self._alert()
+        
+        result = dispatch_due_notifications()
+        
+        alert.refresh_from_db()
+        self.assertEqual(result['alerts'], 1)
+        self.assertEqual(alert.status, Alert.Status.QUEUED)
+        self.assertIsNotNone(alert.queued_at)
+    
+    def test_failed_send_is_not_reclaimed_until_lease_expires(self):
+        alert = self._alert()
+        dispatch_due_notifications()
+        
+        self._send(alert, success=False)
+        alert.refresh_from_db()
+        self.assertEqual(alert.status, Alert.Status.QUEUED)
+        self.assertEqual(alert.retry_count, 1)
+        
+        # 임대 시간 안에는 다시 선점하지 않음
+        self.assertEqual(dispatch_due_notifications()['alerts'], 0)
+        
+        self._expire_lease(alert)
+        self.assertEqual(dispatch_due_notifications()['alerts'], 1)
+    
+    def test_retries_until_failed(self):
+        alert = self._alert()
+        max_retries = self.config.get('MAX_RETRY_ALERTS', 3)
+        
+        for attempt in range(1, max_retries + 1):
+            self.assertEqual(dispatch_due_notifications()['alerts'], 1)
+            self._send(alert, success=False)
+            alert.refresh_from_db()
+            self.assertEqual(alert.retry_count, attempt)
+            self._expire_lease(alert)
+        
+        self.assertEqual(alert.status, Alert.Status.FAILED)
+        self.assertEqual(dispatch_due_notifications()['alerts'], 0)
+    
+    def test_successful_retry_marks_sent(self):
+        alert = self._alert()
+        dispatch_due_notifications()
+        self._send(alert, success=False)
+        self._expire_lease(alert)
+        
+        dispatch_due_notifications()
+        result = self._send(alert, success=True)
+        
+        alert.refresh_from_db()
+        self.assertEqual(result['sent'], 1)
+        self.assertEqual(alert.status, Alert.Status.SENT)
+        self.assertIsNotNone(alert.sent_at)
+    
+    def test_expires_alerts_outside_catchup_window(self):
+        catchup = self.config.get('DISPATCH_CATCHUP_MINUTES', 60)
+        pending = self._alert(minutes_ago=catchup + 5)
+        queued = self._alert(minutes_ago=catchup + 5, status=Alert.Status.QUEUED, queued_at=timezone.now())
+        
+        result = dispatch_due_notifications()
+        
+        self.assertEqual(result['expired'], 2)
+        for alert in (pending, queued):
+            alert.refresh_from_db()
+            self.assertEqual(alert.status, Alert.Status.FAILED)
+
+
+class ScheduleMedicationAlertsTests(TestCase):
+    """당일 추가된 로그의 비상 알림 계획 - 사용자별, 시간대별 알림 1개"""
+    
+    def setUp(self):
+        from apps.medications.models import Medication, MedicationSchedule
+        
+        self.user = User.objects.create_user(username='senior', password='x')
+        self.scheduled = timezone.now().replace(microsecond=0) + timezone.timedelta(hours=1)
+        self.schedules = []
+        for name in ('암로디핀', '메트포르민'):
+            medication = Medication.objects.create(user=self.user, name=name)
+            self.schedules.append(MedicationSchedule.objects.create(
+                medication=medication, time_of_day='morning', scheduled_time='08:00',
+            ))
+    
+    def _log(self, schedule):
+        from apps.medications.models import MedicationLog
+        return MedicationLog.objects.create(schedule=schedule, scheduled_datetime=self.scheduled)
+    
+    def test_one_alert_per_slot(self):
+        from apps.alerts.tasks import schedule_medication_alerts
+        
+        logs = [self._log(schedule) for schedule in self.schedules]
+        
+        result = schedule_medication_alerts([log.id for log in logs])
+        
+        self.assertEqual(result['scheduled'], 1)
+        self.assertEqual(Alert.objects.filter(user=self.user).count(), 1)
+    
+    def test_skips_slot_already_planned(self):
+        from apps.alerts.tasks import schedule_medication_alerts
+        
+        first = self._log(self.schedules[0])
+        schedule_medication_alerts([first.id])
+        second = self._log(self.schedules[1])
+        
+        result = schedule_medication_alerts([second.id])
+        
+        self.assertEqual(result['scheduled'], 0)
+        self.assertEqual(Alert.objects.filter(user=self.user).count(), 1)
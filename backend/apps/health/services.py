@@ -3,16 +3,8 @@ Health Services - GPT-4o 질병 추론 및 키워드 생성
 """
 
 import json
-import httpx
-from openai import OpenAI
-from django.conf import settings
 from django.utils import timezone
-
-
-def _get_openai_client():
-    """OpenAI 클라이언트 생성 (SSL 호환)"""
-    http_client = httpx.Client(verify=False)
-    return OpenAI(api_key=settings.OPENAI_API_KEY, http_client=http_client)
+from core.llm_gateway import chat_completion
 
 
 def infer_conditions_from_medications(user):
@@ -32,9 +24,9 @@ def infer_conditions_from_medications(user):
         return []
     
     med_names = [m.name for m in medications]
-    client = _get_openai_client()
     
-    response = client.chat.completions.create(
+    response = chat_completion(
+        'condition_inference',
         model="gpt-4o",
         messages=[
             {
@@ -81,9 +73,9 @@ def generate_search_queries(conditions):
         return []
     
     condition_names = [c.get('name', '') for c in conditions]
-    client = _get_openai_client()
     
-    response = client.chat.completions.create(
+    response = chat_completion(
+        'search_queries',
         model="gpt-4o",
         messages=[
             {
@@ -200,12 +192,12 @@ def generate_daily_lifestyle_tips(user, date):
         return []
     
     condition_names = [c.get('name', '') for c in conditions]
-    client = _get_openai_client()
     
     # 날짜를 시드로 사용하여 매일 다른 팁 생성
     day_of_year = date.timetuple().tm_yday
     
-    response = client.chat.completions.create(
+    response = chat_completion(
+        'lifestyle_tips',
         model="gpt-4o",
         messages=[
             {
@@ -0,0 +1,129 @@
+"""
+Medications Adherence Service - 일별 복약 집계(DailyAdherence) 유지
+복약 기록이 바뀐 (사용자, 날짜)만 다시 집계하여 갱신
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .models import DailyAdherence, MedicationLog
+
+ADHERENCE_FIELDS = ['total', 'taken', 'missed', 'skipped', 'first_taken_at', 'last_taken_at']
+
+
+def aggregate_daily_adherence(user_ids, start_date, end_date):
+    """
+    사용자별, 현지 날짜별 복약 집계 (GROUP BY 1회)
+    
+    Args:
+        user_ids: 사용자 ID 목록
+        start_date, end_date: 집계 구간 [start_date, end_date), None이면 전체
+        
+    Returns:
+        {(user_id, date): {'total', 'taken', 'missed', 'skipped', 'first_taken_at', 'last_taken_at'}}
+    """
+    logs = MedicationLog.objects.filter(schedule__medication__user_id__in=user_ids)
+    if start_date:
+        logs = logs.filter(scheduled_datetime__gte=timezone.make_aware(
+            datetime.combine(start_date, datetime.min.time())
+        ))
+    if end_date:
+        logs = logs.filter(scheduled_datetime__lt=timezone.make_aware(
+            datetime.combine(end_date, datetime.min.time())
+        ))
+    
+    taken = Q(status=MedicationLog.Status.TAKEN)
+    rows = logs.annotate(
+        user_id=F('schedule__medication__user_id'),
+        local_date=TruncDate('scheduled_datetime'),
+    ).values('user_id', 'local_date').annotate(
+        total=Count('id'),
+        taken=Count('id', filter=taken),
+        missed=Count('id', filter=Q(status=MedicationLog.Status.MISSED)),
+        skipped=Count('id', filter=Q(status=MedicationLog.Status.SKIPPED)),
+        first_taken_at=Min('taken_datetime', filter=taken),
+        last_taken_at=Max('taken_datetime', filter=taken),
+    ).order_by()
+    
+    return {
+        (row['user_id'], row['local_date']): {field: row[field] for field in ADHERENCE_FIELDS}
+        for row in rows
+    }
+
+
+def save_daily_adherence(summaries, stale_keys=()):
+    """
+    집계 결과 upsert + 로그가 모두 사라진 날짜의 집계 삭제
+    
+    Args:
+        summaries: aggregate_daily_adherence 결과
+        stale_keys: 갱신 대상이었지만 로그가 없는 (user_id, date) 목록
+    """
+    now = timezone.now()
+    DailyAdherence.objects.bulk_create(
+        [
+            DailyAdherence(user_id=user_id, date=date, updated_at=now, **values)
+            for (user_id, date), values in summaries.items()
+        ],
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['user', 'date'],
+        update_fields=ADHERENCE_FIELDS + ['updated_at'],
+    )
+    
+    stale_by_user = defaultdict(list)
+    for user_id, date in stale_keys:
+        stale_by_user[user_id].append(date)
+    for user_id, dates in stale_by_user.items():
+        DailyAdherence.objects.filter(user_id=user_id, date__in=dates).delete()
+
+
+def refresh_daily_adherence(log_keys):
+    """
+    복약 기록이 바뀐 (사용자, 날짜)의 일별 집계 갱신
+    
+    같은 (사용자, 날짜)를 동시에 갱신하면(복용 처리 경합 등) 서로의 변경을 보지 못한 집계로
+    덮어쓸 수 있으므로, 집계 행을 먼저 만들어 잠근(SELECT ... FOR UPDATE) 뒤 다시 집계
+    → 뒤 트랜잭션은 앞 트랜잭션이 커밋될 때까지 기다린 후 커밋된 로그로 집계
+    
+    Args:
+        log_keys: (user_id, scheduled_datetime) 목록
+    """
+    targets = sorted({
+        (user_id, timezone.localtime(value).date()) for user_id, value in log_keys
+    })
+    if not targets:
+        return
+    
+    target_set = set(targets)
+    dates_by_user = defaultdict(list)
+    for user_id, date in targets:
+        dates_by_user[user_id].append(date)
+    
+    with transaction.atomic():
+        # 잠글 행이 없는 날짜는 빈 집계 행을 먼저 생성 (교착 방지를 위해 정렬 순서로 생성/잠금)
+        DailyAdherence.objects.bulk_create(
+            [DailyAdherence(user_id=user_id, date=date) for user_id, date in targets],
+            ignore_conflicts=True,
+        )
+        locked = Q()
+        for user_id, dates in dates_by_user.items():
+            locked |= Q(user_id=user_id, date__in=dates)
+        list(
+            DailyAdherence.objects.filter(locked)
+            .order_by('user_id', 'date')
+            .select_for_update()
+            .values_list('id', flat=True)
+        )
+        
+        dates = [date for _, date in targets]
+        summaries = aggregate_daily_adherence(
+            list(dates_by_user),
+            min(dates),
+            max(dates) + timedelta(days=1),
+        )
+        summaries = {key: values for key, values in summaries.items() if key in target_set}
+        save_daily_adherence(summaries, stale_keys=target_set - summaries.keys())
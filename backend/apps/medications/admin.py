@@ -3,7 +3,10 @@ Medications Admin
 """
 
 from django.contrib import admin
-from .models import Medication, MedicationSchedule, MedicationLog, MedicationGroup
+from .models import (
+    Medication, MedicationSchedule, MedicationLog, MedicationGroup, DailyAdherence, LogArchive, ScanResultCache,
+    LLMCallLog,
+)
 
 
 @admin.register(MedicationGroup)
@@ -34,3 +37,35 @@ class MedicationLogAdmin(admin.ModelAdmin):
     list_filter = ['status', 'scheduled_datetime']
     search_fields = ['schedule__medication__name']
     date_hierarchy = 'scheduled_datetime'
+
+
+@admin.register(DailyAdherence)
+class DailyAdherenceAdmin(admin.ModelAdmin):
+    list_display = ['user', 'date', 'total', 'taken', 'missed', 'skipped', 'updated_at']
+    list_filter = ['date']
+    search_fields = ['user__username']
+    date_hierarchy = 'date'
+
+
+@admin.register(LogArchive)
+class LogArchiveAdmin(admin.ModelAdmin):
+    list_display = ['user', 'month', 'log_count', 'alert_count', 'archived_at']
+    list_filter = ['month']
+    search_fields = ['user__username']
+    readonly_fields = ['log_path', 'alert_path', 'archived_at']
+
+
+@admin.register(ScanResultCache)
+class ScanResultCacheAdmin(admin.ModelAdmin):
+    list_display = ['image_hash', 'hit_count', 'created_at', 'expires_at']
+    list_filter = ['created_at']
+    search_fields = ['image_hash']
+    readonly_fields = ['created_at']
+
+
+@admin.register(LLMCallLog)
+class LLMCallLogAdmin(admin.ModelAdmin):
+    list_display = ['feature', 'model', 'latency_ms', 'prompt_tokens', 'completion_tokens', 'retries', 'outcome', 'created_at']
+    list_filter = ['feature', 'outcome', 'model', 'created_at']
+    date_hierarchy = 'created_at'
+    readonly_fields = [field.name for field in LLMCallLog._meta.fields]
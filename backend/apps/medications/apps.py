@@ -8,3 +8,8 @@ class MedicationsConfig(AppConfig):
 
     def ready(self):
         import apps.medications.signals  # noqa: F401
+        from core.llm_gateway import register_call_recorder
+        from .llm_usage_service import record_llm_call
+        
+        # LLM 게이트웨이 호출 기록 (core가 이 앱에 의존하지 않도록 여기서 등록)
+        register_call_recorder(record_llm_call)
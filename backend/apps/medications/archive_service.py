@@ -0,0 +1,381 @@
+"""
+Medications Archive Service - 오래된 복약 기록/비상 알림 콜드 아카이브
+보관 기간(ARCHIVE_AFTER_MONTHS)이 지난 월의 행을 사용자별 압축 JSONL 파일로 옮긴 뒤 배치 삭제
+
+- 파일: {ARCHIVE_PREFIX}/medication_logs/YYYY-MM/{user_id}-{version}.jsonl.gz (비상 알림은 alerts/)
+- 매니페스트: {ARCHIVE_PREFIX}/manifests/YYYY-MM-{version}.json (파일별 행 수, id 범위, sha256)
+- 재실행 시 새 버전 경로에 먼저 저장하고 LogArchive/매니페스트를 갱신한 뒤 이전 파일 삭제
+- 저장소: Django default_storage (로컬 MEDIA_ROOT 또는 STORAGES에 설정된 오브젝트 스토리지)
+- 일별 복약 집계(DailyAdherence)는 삭제하지 않으므로 캘린더는 아카이브 후에도 그대로 동작
+- 날짜별 조회(by_date)는 LogArchive로 파일을 찾아 읽음
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import tempfile
+from array import array
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import F, Min, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime, parse_time
+from .models import LogArchive, MedicationLog
+from .log_service import build_detached_log, get_local_day_range
+from .partition_service import add_months
+
+logger = logging.getLogger(__name__)
+
+LOG_FIELDS = [
+    'id', 'user_id', 'schedule_id', 'scheduled_datetime', 'taken_datetime', 'status',
+    'notes', 'reminded_at', 'created_at', 'updated_at',
+    'medication_id', 'medication_name', 'medication_dosage', 'group_id', 'group_name',
+    'time_of_day', 'scheduled_time',
+]
+LOG_DATETIME_FIELDS = ['scheduled_datetime', 'taken_datetime', 'reminded_at', 'created_at', 'updated_at']
+
+
+def _json_default(value):
+    """datetime/date/time은 마이크로초까지 ISO 8601 문자열로 저장"""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def get_archive_cutoff():
+    """아카이브 기준 월 (이 월 1일 이전이 아카이브 대상), 비활성화 시 None"""
+    months = settings.MEDICATION_LOG_SETTINGS.get('ARCHIVE_AFTER_MONTHS', 0)
+    if not months:
+        return None
+    return add_months(timezone.localdate().replace(day=1), -months)
+
+
+class _ArchiveFile:
+    """사용자 1명의 월별 압축 JSONL 파일 (임시 파일에 쓴 뒤 저장소로 업로드)"""
+    
+    def __init__(self, path, user_id):
+        self.path = path
+        self.user_id = user_id
+        self.rows = 0
+        self.ids = set()
+        self.min_id = None
+        self.max_id = None
+        self._temp = tempfile.TemporaryFile()
+        self._gzip = gzip.GzipFile(fileobj=self._temp, mode='wb')
+    
+    def write(self, row):
+        if row['id'] in self.ids:
+            return False
+        self._gzip.write(
+            (json.dumps(row, default=_json_default, ensure_ascii=False) + '\n').encode('utf-8')
+        )
+        self.ids.add(row['id'])
+        self.rows += 1
+        self.min_id = row['id'] if self.min_id is None else min(self.min_id, row['id'])
+        self.max_id = row['id'] if self.max_id is None else max(self.max_id, row['id'])
+        return True
+    
+    def save(self):
+        """저장소에 업로드 후 매니페스트 항목 반환 (이전 버전 파일은 호출 측에서 교체 후 삭제)"""
+        self._gzip.close()
+        self._temp.seek(0)
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: self._temp.read(1024 * 1024), b''):
+            digest.update(chunk)
+        self._temp.seek(0)
+        
+        saved_path = default_storage.save(self.path, File(self._temp))
+        self._temp.close()
+        
+        return {
+            'user_id': self.user_id,
+            'path': saved_path,
+            'rows': self.rows,
+            'min_id': self.min_id,
+            'max_id': self.max_id,
+            'sha256': digest.hexdigest(),
+        }
+
+
+def read_archive_rows(path):
+    """아카이브 파일의 행을 순서대로 읽기 (dict)"""
+    with default_storage.open(path, 'rb') as f:
+        with gzip.GzipFile(fileobj=f) as lines:
+            for line in lines:
+                yield json.loads(line)
+
+
+def _stream_rows(queryset, fields, chunk_size):
+    """(user_id, id) keyset 페이지 단위로 행 스트리밍 (사용자별로 연속)"""
+    last = None
+    while True:
+        page = queryset
+        if last:
+            page = page.filter(Q(user_id__gt=last[0]) | Q(user_id=last[0], id__gt=last[1]))
+        count = 0
+        for row in page.order_by('user_id', 'id').values(*fields)[:chunk_size].iterator(chunk_size=chunk_size):
+            count += 1
+            last = (row['user_id'], row['id'])
+            yield row
+        if count < chunk_size:
+            return
+
+
+def _export(rows, prefix, month_start, version, existing_paths, exported_ids):
+    """
+    사용자별 파일로 내보내기
+    이전 실행에서 만든 파일이 있으면 먼저 옮겨 담아 재실행 시에도 행이 유실되지 않도록 함
+    """
+    entries = {}
+    current = None
+    
+    def open_file(user_id):
+        archive_file = _ArchiveFile(f"{prefix}/{month_start:%Y-%m}/{user_id}-{version}.jsonl.gz", user_id)
+        if existing_paths.get(user_id):
+            for old_row in read_archive_rows(existing_paths[user_id]):
+                archive_file.write(old_row)
+        return archive_file
+    
+    for row in rows:
+        if current is None or current.user_id != row['user_id']:
+            if current:
+                entries[current.user_id] = current.save()
+            current = open_file(row['user_id'])
+        current.write(row)
+        exported_ids.append(row['id'])
+    if current:
+        entries[current.user_id] = current.save()
+    return entries
+
+
+def _delete_in_batches(model, ids, batch_size):
+    """내보낸 행만 id 배치로 삭제 (내보낸 뒤 추가된 행은 삭제하지 않음)"""
+    deleted = 0
+    for i in range(0, len(ids), batch_size):
+        batch = list(ids[i:i + batch_size])
+        model.objects.filter(id__in=batch).delete()
+        deleted += len(batch)
+    return deleted
+
+
+def _find_manifests(directory, month_start):
+    """해당 월의 기존 매니페스트 경로 (오래된 순, 버전 없는 이전 형식 포함)"""
+    if not default_storage.exists(directory):
+        return []
+    legacy = f"{month_start:%Y-%m}.json"
+    _, names = default_storage.listdir(directory)
+    names = [name for name in names if name == legacy or name.startswith(f"{month_start:%Y-%m}-")]
+    return [f"{directory}/{name}" for name in sorted(names, key=lambda name: (name != legacy, name))]
+
+
+def _write_manifest(directory, month_start, version, log_entries, alert_entries):
+    """
+    월 매니페스트 갱신 (이전 실행 항목과 사용자 단위로 병합)
+    새 버전을 저장한 뒤에만 이전 매니페스트 삭제
+    """
+    manifest = {'month': f"{month_start:%Y-%m}", 'medication_logs': {}, 'alerts': {}}
+    previous = _find_manifests(directory, month_start)
+    if previous:
+        with default_storage.open(previous[-1], 'rb') as f:
+            manifest.update(json.load(f))
+    
+    manifest['medication_logs'].update({str(user_id): entry for user_id, entry in log_entries.items()})
+    manifest['alerts'].update({str(user_id): entry for user_id, entry in alert_entries.items()})
+    manifest['archived_at'] = timezone.now().isoformat()
+    manifest['totals'] = {
+        'medication_logs': sum(entry['rows'] for entry in manifest['medication_logs'].values()),
+        'alerts': sum(entry['rows'] for entry in manifest['alerts'].values()),
+    }
+    saved_path = default_storage.save(
+        f"{directory}/{month_start:%Y-%m}-{version}.json",
+        ContentFile(json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8')),
+    )
+    for path in previous:
+        if path != saved_path:
+            default_storage.delete(path)
+    return manifest['totals']
+
+
+def archive_month(month_start, chunk_size=None, delete_batch_size=None):
+    """
+    한 달치 복약 기록/비상 알림 아카이브
+    
+    1. 사용자별 압축 JSONL 파일로 스트리밍 내보내기
+    2. LogArchive 갱신 및 매니페스트 기록 후 교체된 이전 버전 파일 삭제
+    3. 내보낸 행을 배치 삭제 (비상 알림 → 복약 기록)
+    
+    Args:
+        month_start: 아카이브할 월의 1일 (현지 날짜)
+    
+    Returns:
+        처리 결과 dict
+    """
+    from apps.alerts.models import Alert
+    
+    config = settings.MEDICATION_LOG_SETTINGS
+    prefix = config.get('ARCHIVE_PREFIX', 'archives')
+    chunk_size = chunk_size or config.get('ARCHIVE_CHUNK_SIZE', 2000)
+    delete_batch_size = delete_batch_size or config.get('ARCHIVE_DELETE_BATCH_SIZE', 1000)
+    
+    month_end = add_months(month_start, 1)
+    range_start, range_end = get_local_day_range(month_start, days=(month_end - month_start).days)
+    
+    logs = MedicationLog.objects.filter(
+        scheduled_datetime__gte=range_start,
+        scheduled_datetime__lt=range_end,
+    )
+    # 다음 달로 넘어간 알림도 원 복약 기록과 함께 보관 (복약 기록 삭제 시 CASCADE 대상)
+    alerts = Alert.objects.filter(
+        Q(scheduled_at__gte=range_start, scheduled_at__lt=range_end)
+        | Q(medication_log_id__in=logs.values('id'))
+    )
+    
+    existing = {
+        archive.user_id: archive
+        for archive in LogArchive.objects.filter(month=month_start)
+    }
+    
+    # 기존 파일을 덮어쓰지 않도록 실행마다 새 버전 경로에 저장
+    version = timezone.now().strftime('%Y%m%dT%H%M%S%f')
+    log_ids, alert_ids = array('q'), array('q')
+    log_entries = _export(
+        _stream_rows(
+            logs.annotate(
+                user_id=F('schedule__medication__user_id'),
+                medication_id=F('schedule__medication_id'),
+                medication_name=F('schedule__medication__name'),
+                medication_dosage=F('schedule__medication__dosage'),
+                group_id=F('schedule__medication__group_id'),
+                group_name=F('schedule__medication__group__name'),
+                time_of_day=F('schedule__time_of_day'),
+                scheduled_time=F('schedule__scheduled_time'),
+            ),
+            LOG_FIELDS,
+            chunk_size,
+        ),
+        f"{prefix}/medication_logs",
+        month_start,
+        version,
+        {user_id: archive.log_path for user_id, archive in existing.items()},
+        log_ids,
+    )
+    alert_entries = _export(
+        _stream_rows(alerts, [field.attname for field in Alert._meta.concrete_fields], chunk_size),
+        f"{prefix}/alerts",
+        month_start,
+        version,
+        {user_id: archive.alert_path for user_id, archive in existing.items()},
+        alert_ids,
+    )
+    
+    archives = {}
+    replaced_paths = []
+    for user_id in log_entries.keys() | alert_entries.keys():
+        previous = existing.get(user_id)
+        log_entry, alert_entry = log_entries.get(user_id), alert_entries.get(user_id)
+        archives[user_id] = LogArchive(
+            user_id=user_id,
+            month=month_start,
+            log_path=log_entry['path'] if log_entry else (previous.log_path if previous else ''),
+            log_count=log_entry['rows'] if log_entry else (previous.log_count if previous else 0),
+            alert_path=alert_entry['path'] if alert_entry else (previous.alert_path if previous else ''),
+            alert_count=alert_entry['rows'] if alert_entry else (previous.alert_count if previous else 0),
+            archived_at=timezone.now(),
+        )
+        if previous:
+            if log_entry and previous.log_path and previous.log_path != log_entry['path']:
+                replaced_paths.append(previous.log_path)
+            if alert_entry and previous.alert_path and previous.alert_path != alert_entry['path']:
+                replaced_paths.append(previous.alert_path)
+    LogArchive.objects.bulk_create(
+        archives.values(),
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['user', 'month'],
+        update_fields=['log_path', 'log_count', 'alert_path', 'alert_count', 'archived_at'],
+    )
+    totals = _write_manifest(
+        f"{prefix}/manifests", month_start, version, log_entries, alert_entries
+    )
+    # 새 파일을 가리키도록 갱신된 뒤에만 이전 버전 삭제
+    for path in replaced_paths:
+        default_storage.delete(path)
+    
+    # 파일과 LogArchive가 저장된 뒤에만 삭제
+    deleted_alerts = _delete_in_batches(Alert, alert_ids, delete_batch_size)
+    deleted_logs = _delete_in_batches(MedicationLog, log_ids, delete_batch_size)
+    
+    result = {
+        'month': f"{month_start:%Y-%m}",
+        'users': len(archives),
+        'archived_logs': len(log_ids),
+        'archived_alerts': len(alert_ids),
+        'deleted_logs': deleted_logs,
+        'deleted_alerts': deleted_alerts,
+        'manifest_totals': totals,
+    }
+    logger.info(f"[Archive] {result}")
+    return result
+
+
+def archive_expired_months(retention_months=None):
+    """
+    보관 기간이 지난 모든 월 아카이브 (가장 오래된 월부터)
+    
+    Returns:
+        월별 archive_month 결과 목록
+    """
+    from apps.alerts.models import Alert
+    
+    if retention_months is None:
+        cutoff_month = get_archive_cutoff()
+    else:
+        cutoff_month = add_months(timezone.localdate().replace(day=1), -retention_months)
+    if cutoff_month is None:
+        return []
+    
+    cutoff, _ = get_local_day_range(cutoff_month)
+    oldest = [
+        MedicationLog.objects.filter(scheduled_datetime__lt=cutoff).aggregate(
+            oldest=Min('scheduled_datetime')
+        )['oldest'],
+        Alert.objects.filter(scheduled_at__lt=cutoff).aggregate(oldest=Min('scheduled_at'))['oldest'],
+    ]
+    oldest = [value for value in oldest if value]
+    if not oldest:
+        return []
+    
+    results = []
+    month = timezone.localtime(min(oldest)).date().replace(day=1)
+    while month < cutoff_month:
+        results.append(archive_month(month))
+        month = add_months(month, 1)
+    return results
+
+
+def read_archived_logs(user, local_date):
+    """
+    아카이브된 날짜의 복약 기록 (날짜별 조회 read-through)
+    
+    Returns:
+        미저장 MedicationLog 목록 (시리얼라이저용 약/그룹 정보 포함)
+    """
+    archive = LogArchive.objects.filter(
+        user=user,
+        month=local_date.replace(day=1),
+    ).exclude(log_path='').first()
+    if not archive:
+        return []
+    
+    logs = []
+    for row in read_archive_rows(archive.log_path):
+        for field in LOG_DATETIME_FIELDS:
+            row[field] = parse_datetime(row[field]) if row[field] else None
+        if timezone.localtime(row['scheduled_datetime']).date() != local_date:
+            continue
+        row['scheduled_time'] = parse_time(row['scheduled_time'])
+        logs.append(build_detached_log(row))
+    return logs
@@ -0,0 +1,146 @@
+"""
+Medications Calendar Service - 월별 복약 현황 집계
+본인 캘린더(MedicationLogViewSet.calendar)와 보호자용 시니어 캘린더(SeniorCalendarView) 공통 로직
+
+- 날짜별 복약 현황은 일별 복약 집계(DailyAdherence)에서 조회 (복약 기록 변경 시 증분 갱신)
+- 병원 방문일(start_date + days_supply)도 SQL에서 계산
+- 완성된 월 응답은 사용자별로 캐시하고, 해당 월의 로그가 바뀔 때만 무효화
+"""
+
+from datetime import date
+from django.core.cache import cache
+from django.db.models import DateField, F, Func
+from django.utils import timezone
+from .models import DailyAdherence, Medication
+from .log_service import build_virtual_logs
+
+# 월별 캘린더 캐시 유지 시간 (초)
+CALENDAR_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+class DateAddDays(Func):
+    """date + integer (PostgreSQL) → date"""
+    template = '(%(expressions)s)'
+    arg_joiner = ' + '
+    output_field = DateField()
+
+
+def _month_range(year, month):
+    """해당 월의 [1일, 다음 달 1일) 날짜 구간"""
+    month_start = date(year, month, 1)
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    return month_start, next_month
+
+
+def _version_key(user_id):
+    return f"calendar_version:{user_id}"
+
+
+def _month_key(user_id, year, month):
+    version = cache.get(_version_key(user_id), 0)
+    return f"calendar:{user_id}:{version}:{year}-{month:02d}"
+
+
+def get_daily_summary(user, year, month):
+    """
+    날짜별 복약 현황 {'YYYY-MM-DD': {'total', 'taken', 'missed'}}
+    복약 기록 대신 일별 복약 집계(DailyAdherence)에서 해당 월의 행만 조회
+    """
+    month_start, next_month = _month_range(year, month)
+    
+    rows = DailyAdherence.objects.filter(
+        user=user,
+        date__gte=month_start,
+        date__lt=next_month,
+    ).order_by('date').values('date', 'total', 'taken', 'missed')
+    
+    daily_summary = {
+        row['date'].isoformat(): {
+            'total': row['total'],
+            'taken': row['taken'],
+            'missed': row['missed'],
+        }
+        for row in rows
+    }
+    
+    # rolling 모드의 미래 가상 복용 예정 포함
+    for log in build_virtual_logs(user, month_start, next_month):
+        date_str = timezone.localtime(log.scheduled_datetime).date().isoformat()
+        summary = daily_summary.setdefault(date_str, {'total': 0, 'taken': 0, 'missed': 0})
+        summary['total'] += 1
+    
+    return daily_summary
+
+
+def get_hospital_visits(user, year, month):
+    """병원 방문일 (약 떨어지는 날 = start_date + days_supply) 목록"""
+    month_start, next_month = _month_range(year, month)
+    
+    medications = Medication.objects.filter(
+        user=user,
+        is_active=True,
+        days_supply__isnull=False,
+        start_date__isnull=False,
+    ).annotate(
+        visit_date=DateAddDays(F('start_date'), F('days_supply'))
+    ).filter(
+        visit_date__gte=month_start,
+        visit_date__lt=next_month,
+    ).order_by('visit_date').values('id', 'name', 'days_supply', 'visit_date')
+    
+    return [
+        {
+            'date': med['visit_date'].isoformat(),
+            'medication_id': med['id'],
+            'medication_name': med['name'],
+            'days_supply': med['days_supply'],
+        }
+        for med in medications
+    ]
+
+
+def get_month_calendar(user, year, month):
+    """
+    월별 복약 현황 및 병원 방문일 (캐시 사용)
+    
+    Returns:
+        {'daily_summary': {...}, 'hospital_visits': [...]}
+    """
+    key = _month_key(user.id, year, month)
+    payload = cache.get(key)
+    if payload is None:
+        payload = {
+            'daily_summary': get_daily_summary(user, year, month),
+            'hospital_visits': get_hospital_visits(user, year, month),
+        }
+        cache.set(key, payload, CALENDAR_CACHE_TIMEOUT)
+    return payload
+
+
+def invalidate_calendar_months(log_keys):
+    """
+    복약 기록이 바뀐 월의 캘린더 캐시만 삭제
+    
+    Args:
+        log_keys: (user_id, scheduled_datetime) 목록
+    """
+    months = {
+        (user_id, local.year, local.month)
+        for user_id, local in (
+            (user_id, timezone.localtime(value)) for user_id, value in log_keys
+        )
+    }
+    if months:
+        cache.delete_many([
+            _month_key(user_id, year, month) for user_id, year, month in months
+        ])
+
+
+def invalidate_user_calendar(user_id):
+    """약 정보(기간, 활성 상태) 변경 시 사용자의 모든 월 캘린더 캐시 무효화"""
+    key = _version_key(user_id)
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
@@ -0,0 +1,174 @@
+"""
+Medications Embedding Cache - 약품명 임베딩 2단계 캐시 (프로세스 내 LRU → Redis)
+같은 약품명(암로디핀, 메트포르민 등)을 매번 임베딩하지 않도록 모델명 + 정규화 텍스트 기준으로 재사용
+(임베딩도 정규화 텍스트로 생성하여 키와 벡터가 항상 같은 입력에 대응)
+
+- 벡터는 float32 bytes로 저장 (1536차원 기준 약 6KB)
+- LRU는 항목 수 상한(LRU_SIZE), Redis는 TTL로 관리
+- 계층별 적중/미스 횟수를 일자별로 Redis에 누적 (llm_usage_report에서 적중률 출력)
+"""
+
+import hashlib
+import logging
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+STAT_TIERS = ('lru', 'redis', 'miss')
+
+_lru = OrderedDict()
+_lru_lock = threading.Lock()
+
+
+def _config():
+    return settings.EMBEDDING_CACHE_SETTINGS
+
+
+def normalize_text(text):
+    """캐시 키용 텍스트 정규화 (유니코드 호환 문자 통일, 소문자, 연속 공백 정리)"""
+    return ' '.join(unicodedata.normalize('NFKC', text).lower().split())
+
+
+def _cache_key(model, normalized):
+    digest = hashlib.sha1(normalized.encode()).hexdigest()
+    return f"medications:embedding:{model}:{digest}"
+
+
+def _stats_key(date, tier):
+    return f"medications:embedding_cache:stats:{date.isoformat()}:{tier}"
+
+
+def _pack(vector):
+    return array('f', vector).tobytes()
+
+
+def _unpack(data):
+    vector = array('f')
+    vector.frombytes(data)
+    return vector.tolist()
+
+
+def _lru_get(key):
+    with _lru_lock:
+        data = _lru.get(key)
+        if data is not None:
+            _lru.move_to_end(key)
+        return data
+
+
+def _lru_set(items):
+    size = _config().get('LRU_SIZE', 2000)
+    with _lru_lock:
+        for key, data in items.items():
+            _lru[key] = data
+            _lru.move_to_end(key)
+        while len(_lru) > size:
+            _lru.popitem(last=False)
+
+
+def _record_stats(counts):
+    """계층별 적중/미스 횟수 일자별 누적 (통계 실패는 무시)"""
+    today = timezone.localdate()
+    ttl = _config().get('STATS_TTL_SECONDS', 35 * 24 * 3600)
+    try:
+        for tier, count in counts.items():
+            if not count:
+                continue
+            key = _stats_key(today, tier)
+            try:
+                cache.incr(key, count)
+            except ValueError:
+                # 그날 첫 기록 (동시에 생성되면 한쪽이 add에 실패하므로 다시 incr)
+                if not cache.add(key, count, ttl):
+                    cache.incr(key, count)
+    except Exception as e:
+        logger.warning(f"[Embedding Cache] 통계 기록 실패: {e}")
+
+
+def get_cached_embeddings(texts, model, compute, use_cache=True):
+    """
+    캐시된 임베딩 조회, 없는 텍스트만 compute로 한 번에 생성 후 저장
+    
+    Args:
+        texts: 임베딩할 텍스트 목록
+        model: 임베딩 모델 이름 (캐시 키에 포함)
+        compute: 텍스트 목록 → 임베딩 목록 함수 (캐시에 없는 정규화 텍스트만 전달, 중복 제거됨)
+        use_cache: False면 캐시 조회/저장 없이 정규화 텍스트 전체를 생성 (색인 생성 등 대량 1회성 요청)
+    
+    Returns:
+        texts 순서대로 임베딩 목록
+    """
+    normalized = [normalize_text(text) for text in texts]
+    if not use_cache or not _config().get('ENABLED', True):
+        return compute(normalized)
+    
+    keys = [_cache_key(model, text) for text in normalized]
+    found = {}
+    counts = dict.fromkeys(STAT_TIERS, 0)
+    
+    for key in dict.fromkeys(keys):
+        data = _lru_get(key)
+        if data is not None:
+            found[key] = data
+            counts['lru'] += 1
+    
+    missing = [key for key in dict.fromkeys(keys) if key not in found]
+    if missing:
+        try:
+            from_redis = cache.get_many(missing)
+        except Exception as e:
+            logger.warning(f"[Embedding Cache] Redis 조회 실패: {e}")
+            from_redis = {}
+        found.update(from_redis)
+        counts['redis'] += len(from_redis)
+        _lru_set(from_redis)
+    
+    # 캐시에 없는 키는 정규화 텍스트로 한 번만 생성 (대소문자/공백만 다른 원문의 벡터가 키에 섞이지 않도록)
+    pending = {}
+    for key, text in zip(keys, normalized):
+        if key not in found and key not in pending:
+            pending[key] = text
+    if pending:
+        vectors = compute(list(pending.values()))
+        computed = {key: _pack(vector) for key, vector in zip(pending, vectors)}
+        found.update(computed)
+        counts['miss'] += len(computed)
+        _lru_set(computed)
+        try:
+            cache.set_many(computed, _config().get('TTL_SECONDS', 30 * 24 * 3600))
+        except Exception as e:
+            logger.warning(f"[Embedding Cache] Redis 저장 실패: {e}")
+    
+    _record_stats(counts)
+    return [_unpack(found[key]) for key in keys]
+
+
+def get_embedding_cache_stats(days=7):
+    """
+    최근 days일 일자별 계층 적중률
+    
+    Returns:
+        [{'date', 'lru', 'redis', 'miss', 'hit_rate'}, ...] (조회가 있었던 날만)
+    """
+    today = timezone.localdate()
+    dates = [today - timedelta(days=offset) for offset in range(days - 1, -1, -1)]
+    values = cache.get_many([_stats_key(date, tier) for date in dates for tier in STAT_TIERS])
+    
+    rows = []
+    for date in dates:
+        counts = {tier: values.get(_stats_key(date, tier), 0) for tier in STAT_TIERS}
+        total = sum(counts.values())
+        if total:
+            rows.append({
+                'date': date,
+                **counts,
+                'hit_rate': (counts['lru'] + counts['redis']) / total,
+            })
+    return rows
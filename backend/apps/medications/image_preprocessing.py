@@ -0,0 +1,135 @@
+"""
+Medications Image Preprocessing - 처방전 이미지를 GPT-4o Vision 입력 크기에 맞게 축소/압축
+EXIF 회전 직후, GPT-4o Vision 호출 전에 실행
+
+- Vision 모델은 high detail에서 2048px 박스에 맞춘 뒤 짧은 변 768px로 축소하여 처리하므로
+  그보다 큰 해상도는 전송량만 늘림
+- (선택) 문서 영역 자르기: 테두리 배경색과 다른 영역의 경계 상자로 크롭
+- 흑백 변환 후 목표 크기 이하가 될 때까지 JPEG 품질을 단계적으로 낮춤
+"""
+
+import hashlib
+import io
+from django.conf import settings
+from PIL import Image, ImageChops, ImageOps
+
+
+def _config():
+    return settings.OCR_IMAGE_SETTINGS
+
+
+def open_for_vision(image_content):
+    """
+    이미지를 열고 EXIF 기준으로 회전
+    JPEG은 디코딩 단계에서 Vision 해상도 근처까지 축소(DCT 스케일링)하여 전체 해상도 디코딩을 피함
+    
+    Returns:
+        (PIL Image, 원본 해상도)
+    """
+    config = _config()
+    image = Image.open(io.BytesIO(image_content))
+    source_size = image.size
+    # 크롭할 경우 남는 영역이 줄어들므로 축소 없이 디코딩
+    if not config.get('CROP_DOCUMENT', False):
+        short_side = config.get('SHORT_SIDE', 768)
+        image.draft('L' if config.get('GRAYSCALE', True) else 'RGB', (short_side, short_side))
+    return ImageOps.exif_transpose(image), source_size
+
+
+def fit_vision_size(size, max_side=2048, short_side=768):
+    """Vision 모델이 실제 사용하는 해상도 (원본보다 크게 확대하지 않음)"""
+    width, height = size
+    scale = min(1.0, max_side / max(width, height))
+    if min(width, height) * scale > short_side:
+        scale = short_side / min(width, height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def crop_document(image, margin_ratio=0.02, min_area_ratio=0.3):
+    """
+    테두리 배경과 구분되는 문서 영역으로 크롭
+    검출 영역이 너무 작으면(오검출) 원본 유지
+    """
+    gray = image.convert('L')
+    background = Image.new('L', gray.size, gray.getpixel((0, 0)))
+    diff = ImageChops.difference(gray, background).point(lambda value: 255 if value > 40 else 0)
+    bbox = diff.getbbox()
+    if not bbox:
+        return image
+    
+    left, top, right, bottom = bbox
+    if (right - left) * (bottom - top) < gray.size[0] * gray.size[1] * min_area_ratio:
+        return image
+    
+    margin_x = int(gray.size[0] * margin_ratio)
+    margin_y = int(gray.size[1] * margin_ratio)
+    return image.crop((
+        max(0, left - margin_x),
+        max(0, top - margin_y),
+        min(gray.size[0], right + margin_x),
+        min(gray.size[1], bottom + margin_y),
+    ))
+
+
+def encode_adaptive_jpeg(image, target_bytes, max_quality=85, min_quality=50, step=10):
+    """목표 크기 이하가 될 때까지 품질을 낮춰 JPEG 인코딩 (최저 품질에서 중단)"""
+    quality = max_quality
+    while True:
+        output = io.BytesIO()
+        image.save(output, format='JPEG', quality=quality, optimize=True)
+        data = output.getvalue()
+        if len(data) <= target_bytes or quality <= min_quality:
+            return data, quality
+        quality = max(min_quality, quality - step)
+
+
+def preprocess_for_vision(image, source_size=None):
+    """
+    EXIF 회전된 이미지를 Vision 전송용 JPEG bytes로 변환
+    
+    Args:
+        image: PIL Image (EXIF 회전 적용 후)
+        source_size: 디코딩 전 원본 해상도 (지표 기록용, 없으면 image.size)
+    
+    Returns:
+        (JPEG bytes, {'original_size', 'size', 'quality', 'cropped', 'grayscale', 'image_hash'})
+    """
+    config = _config()
+    original_size = source_size or image.size
+    
+    cropped = False
+    if config.get('CROP_DOCUMENT', False):
+        cropped_image = crop_document(image)
+        cropped = cropped_image.size != image.size
+        image = cropped_image
+    
+    # 흑백 변환을 먼저 하여 리샘플링 연산량을 1/3로 줄임
+    grayscale = config.get('GRAYSCALE', True)
+    image = image.convert('L') if grayscale else image.convert('RGB')
+    
+    target_size = fit_vision_size(
+        image.size,
+        max_side=config.get('MAX_SIDE', 2048),
+        short_side=config.get('SHORT_SIDE', 768),
+    )
+    if target_size != image.size:
+        # reducing_gap: 정수배 축소 후 리샘플링 (대용량 사진 축소 속도 개선)
+        image = image.resize(target_size, Image.LANCZOS, reducing_gap=3.0)
+    if grayscale:
+        image = ImageOps.autocontrast(image, cutoff=1)
+    
+    data, quality = encode_adaptive_jpeg(
+        image,
+        target_bytes=config.get('TARGET_BYTES', 300 * 1024),
+        max_quality=config.get('MAX_QUALITY', 85),
+        min_quality=config.get('MIN_QUALITY', 50),
+    )
+    return data, {
+        'original_size': list(original_size),
+        'size': list(image.size),
+        'quality': quality,
+        'cropped': cropped,
+        'grayscale': grayscale,
+        # 스캔 결과 캐시 키: 정규화된 전송 바이트의 내용 해시 (같은 원본 이미지는 같은 바이트로 변환됨)
+        'image_hash': hashlib.sha256(data).hexdigest(),
+    }
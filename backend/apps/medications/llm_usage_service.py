@@ -0,0 +1,178 @@
+"""
+Medications LLM Usage Service - OpenAI 호출 기록(LLMCallLog) 버퍼 저장 및 기능별 리포트
+core.llm_gateway가 호출마다 record_llm_call을 호출
+
+- 호출 경로에서는 프로세스 내 버퍼에 추가만 하고, 버퍼가 차거나 일정 시간이 지나면 bulk_create 1회로 저장
+- 요청/태스크 종료 시점과 프로세스 종료 시 남은 기록 저장
+- 기록 저장 실패는 호출 결과에 영향을 주지 않음 (로그만 남김)
+"""
+
+import atexit
+import logging
+import math
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .models import LLMCallLog
+
+logger = logging.getLogger(__name__)
+
+_buffer = []
+_buffer_lock = threading.Lock()
+_buffer_started = None
+
+
+def _config():
+    return settings.LLM_USAGE_SETTINGS
+
+
+def record_llm_call(feature, model, latency_ms, outcome, prompt_tokens=0, completion_tokens=0,
+                    wait_ms=0, retries=0, error_type=''):
+    """호출 기록을 버퍼에 추가 (버퍼가 차면 저장)"""
+    global _buffer_started
+    if not _config().get('ENABLED', True):
+        return
+    
+    record = LLMCallLog(
+        feature=feature,
+        model=model,
+        prompt_tokens=prompt_tokens or 0,
+        completion_tokens=completion_tokens or 0,
+        latency_ms=round(latency_ms),
+        wait_ms=round(wait_ms),
+        retries=retries,
+        outcome=outcome,
+        error_type=error_type[:60],
+        created_at=timezone.now(),
+    )
+    with _buffer_lock:
+        if not _buffer:
+            _buffer_started = time.monotonic()
+        _buffer.append(record)
+        full = len(_buffer) >= _config().get('BUFFER_SIZE', 50)
+    if full:
+        flush_llm_calls()
+    else:
+        flush_llm_calls_if_due()
+
+
+def flush_llm_calls_if_due():
+    """가장 오래된 기록이 FLUSH_INTERVAL_SECONDS를 넘었으면 저장"""
+    started = _buffer_started
+    if _buffer and started is not None and (
+        time.monotonic() - started >= _config().get('FLUSH_INTERVAL_SECONDS', 10)
+    ):
+        flush_llm_calls()
+
+
+def flush_llm_calls():
+    """버퍼의 기록을 한 번에 저장"""
+    global _buffer, _buffer_started
+    with _buffer_lock:
+        records, _buffer, _buffer_started = _buffer, [], None
+    if not records:
+        return 0
+    
+    try:
+        LLMCallLog.objects.bulk_create(records, batch_size=500)
+    except Exception as e:
+        logger.error(f"[LLM Usage] 호출 기록 {len(records)}건 저장 실패: {e}")
+        return 0
+    return len(records)
+
+
+# gunicorn 워커 등 일반 프로세스 종료 시 남은 기록 저장
+atexit.register(flush_llm_calls)
+
+
+def _percentile(sorted_values, ratio):
+    """정렬된 값의 백분위수 (nearest-rank)"""
+    if not sorted_values:
+        return None
+    index = max(0, math.ceil(ratio * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    """모델 단가(USD/100만 토큰) 기준 예상 비용, 단가 미등록 모델은 0"""
+    price = _config().get('PRICING', {}).get(model)
+    if not price:
+        return 0.0
+    return (prompt_tokens * price.get('input', 0) + completion_tokens * price.get('output', 0)) / 1_000_000
+
+
+def build_llm_usage_report(days=7, feature=None):
+    """
+    최근 days일 기능별 호출 리포트
+    
+    Returns:
+        {
+            'features': [{'feature', 'calls', 'errors', 'throttled', 'retries',
+                          'p50_ms', 'p95_ms', 'prompt_tokens', 'completion_tokens', 'cost_usd'}, ...],
+            'daily': [{'date', 'feature', 'calls', 'prompt_tokens', 'completion_tokens', 'cost_usd'}, ...],
+        }
+    """
+    
+    flush_llm_calls()
+    since = timezone.now() - timedelta(days=days)
+    queryset = LLMCallLog.objects.filter(created_at__gte=since)
+    if feature:
+        queryset = queryset.filter(feature=feature)
+    
+    rows = queryset.annotate(
+        date=TruncDate('created_at')
+    ).values_list(
+        'feature', 'model', 'date', 'latency_ms', 'prompt_tokens', 'completion_tokens', 'retries', 'outcome'
+    ).order_by()
+    
+    features = defaultdict(lambda: {
+        'calls': 0, 'errors': 0, 'throttled': 0, 'retries': 0,
+        'prompt_tokens': 0, 'completion_tokens': 0, 'cost_usd': 0.0, 'latencies': [],
+    })
+    daily = defaultdict(lambda: {'calls': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'cost_usd': 0.0})
+    for name, model, date, latency_ms, prompt_tokens, completion_tokens, retries, outcome in rows.iterator():
+        cost = estimate_cost(model, prompt_tokens, completion_tokens)
+        summary = features[name]
+        summary['calls'] += 1
+        summary['errors'] += outcome == LLMCallLog.Outcome.ERROR
+        summary['throttled'] += outcome == LLMCallLog.Outcome.THROTTLED
+        summary['retries'] += retries
+        summary['prompt_tokens'] += prompt_tokens
+        summary['completion_tokens'] += completion_tokens
+        summary['cost_usd'] += cost
+        # 지연 시간 분포는 실제 응답을 받은 호출만 (한도 대기 초과는 호출 전 실패)
+        if outcome != LLMCallLog.Outcome.THROTTLED:
+            summary['latencies'].append(latency_ms)
+        
+        day = daily[(date, name)]
+        day['calls'] += 1
+        day['prompt_tokens'] += prompt_tokens
+        day['completion_tokens'] += completion_tokens
+        day['cost_usd'] += cost
+    
+    feature_rows = []
+    for name, summary in sorted(features.items()):
+        latencies = sorted(summary.pop('latencies'))
+        feature_rows.append({
+            'feature': name,
+            **summary,
+            'p50_ms': _percentile(latencies, 0.5),
+            'p95_ms': _percentile(latencies, 0.95),
+        })
+    daily_rows = [
+        {'date': date, 'feature': name, **values}
+        for (date, name), values in sorted(daily.items())
+    ]
+    return {'features': feature_rows, 'daily': daily_rows}
+
+
+def purge_old_llm_calls():
+    """보관 기간(RETENTION_DAYS)이 지난 호출 기록 삭제"""
+    
+    cutoff = timezone.now() - timedelta(days=_config().get('RETENTION_DAYS', 90))
+    deleted, _ = LLMCallLog.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,401 @@
+"""
+Medications Log Service - 복약 기록(MedicationLog) 일괄 생성/복용 처리
+약 등록, 처방 갱신, 일괄 복용, 관리 명령어에서 공통으로 사용
+
+rolling 모드에서는 오늘부터 일정 구간만 실제 로그로 생성하고,
+그 이후의 복용 예정은 스케줄로부터 가상 로그로 계산
+"""
+
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import Medication, MedicationGroup, MedicationLog, MedicationSchedule
+
+# 처방 일수가 없을 때 기본 생성 기간 (일)
+DEFAULT_DAYS_SUPPLY = 30
+
+
+def get_medication_period(medication):
+    """
+    약의 복용 기간 [시작일, 종료일) 반환
+    시작일이 없으면 오늘, 처방 일수가 없으면 30일 기본
+    """
+    start_date = medication.start_date or timezone.localdate()
+    days_supply = medication.days_supply or DEFAULT_DAYS_SUPPLY
+    return start_date, start_date + timedelta(days=days_supply)
+
+
+def get_local_day_range(local_date, days=1):
+    """
+    현지 날짜의 [00:00, 다음 날 00:00) 반개구간 (aware datetime)
+    scheduled_datetime__date 대신 사용하여 컬럼을 함수로 감싸지 않고 인덱스 범위 스캔
+    """
+    start = timezone.make_aware(datetime.combine(local_date, datetime.min.time()))
+    end = timezone.make_aware(datetime.combine(local_date + timedelta(days=days), datetime.min.time()))
+    return start, end
+
+
+def get_materialized_until():
+    """
+    실제 로그로 생성되는 마지막 날짜(미포함) 반환
+    full 모드면 None (처방 기간 전체 생성)
+    """
+    config = settings.MEDICATION_LOG_SETTINGS
+    if config.get('MATERIALIZATION_MODE') != 'rolling':
+        return None
+    return timezone.localdate() + timedelta(days=config.get('ROLLING_WINDOW_DAYS', 2))
+
+
+def build_medication_logs(medication, from_date=None, until_date=None):
+    """
+    약의 활성 스케줄별 복용 기간 MedicationLog 목록 생성 (미저장)
+    
+    Args:
+        medication: Medication 인스턴스 (schedules prefetch 권장)
+        from_date: 이 날짜 이전은 생성하지 않음 (선택)
+        until_date: 이 날짜부터는 생성하지 않음 (선택)
+    """
+    start_date, end_date = get_medication_period(medication)
+    if from_date:
+        start_date = max(start_date, from_date)
+    if until_date:
+        end_date = min(end_date, until_date)
+    
+    logs = []
+    for schedule in medication.schedules.all():
+        if not schedule.is_active:
+            continue
+        current_date = start_date
+        while current_date < end_date:
+            logs.append(MedicationLog(
+                schedule=schedule,
+                scheduled_datetime=timezone.make_aware(
+                    datetime.combine(current_date, schedule.scheduled_time)
+                ),
+                status=MedicationLog.Status.PENDING,
+            ))
+            current_date += timedelta(days=1)
+    return logs
+
+
+def insert_medication_logs(logs, batch_size=1000):
+    """
+    INSERT ... ON CONFLICT DO NOTHING으로 로그 일괄 저장 후 실제로 저장된 행 수 반환
+    bulk_create(ignore_conflicts=True)는 건너뛴 행을 알려주지 않으므로 배치별 rowcount 합산
+    (같은 문장이 저장한 행만 세므로 동시 실행 중인 다른 트랜잭션의 저장은 포함되지 않음)
+    
+    Args:
+        logs: 저장할 MedicationLog 목록 (id 없음)
+        batch_size: INSERT 1회당 행 수
+    
+    Returns:
+        새로 저장된 로그 수
+    """
+    qn = connection.ops.quote_name
+    fields = [field for field in MedicationLog._meta.concrete_fields if not field.primary_key]
+    columns = ', '.join(qn(field.column) for field in fields)
+    placeholders = f"({', '.join(['%s'] * len(fields))})"
+    
+    inserted = 0
+    with connection.cursor() as cursor:
+        for start in range(0, len(logs), batch_size):
+            batch = logs[start:start + batch_size]
+            params = [
+                field.get_db_prep_save(field.pre_save(log, True), connection)
+                for log in batch
+                for field in fields
+            ]
+            cursor.execute(
+                f"INSERT INTO {qn(MedicationLog._meta.db_table)} ({columns}) "
+                f"VALUES {', '.join([placeholders] * len(batch))} ON CONFLICT DO NOTHING",
+                params,
+            )
+            inserted += cursor.rowcount
+    return inserted
+
+
+def materialize_medication_logs(medications, from_date=None, batch_size=1000):
+    """
+    여러 약의 MedicationLog를 메모리에서 계산하여 bulk_create로 일괄 저장
+    
+    - 이미 존재하는 (schedule, scheduled_datetime) 로그는 건너뜀 (조회 1회 + 유니크 제약)
+    - rolling 모드에서는 롤링 구간까지만 생성
+    - 하나의 트랜잭션에서 저장
+    - 오늘 날짜 로그는 커밋 후 비상 알림 일괄 계획 (00:05 스케줄러를 기다리지 않음)
+    
+    Args:
+        medications: Medication 목록
+        from_date: 이 날짜 이전은 생성하지 않음 (선택)
+        batch_size: bulk_create 배치 크기
+        
+    Returns:
+        새로 저장된 로그 수 (동시 실행으로 ON CONFLICT 건너뛴 로그 제외)
+    """
+    until_date = get_materialized_until()
+    logs = []
+    for medication in medications:
+        logs.extend(build_medication_logs(medication, from_date=from_date, until_date=until_date))
+    
+    if not logs:
+        return 0
+    
+    # 이미 존재하는 로그 제외
+    existing = set(
+        MedicationLog.objects.filter(
+            schedule_id__in={log.schedule_id for log in logs},
+            scheduled_datetime__gte=min(log.scheduled_datetime for log in logs),
+            scheduled_datetime__lte=max(log.scheduled_datetime for log in logs),
+        ).values_list('schedule_id', 'scheduled_datetime')
+    )
+    logs = [
+        log for log in logs
+        if (log.schedule_id, log.scheduled_datetime) not in existing
+    ]
+    if not logs:
+        return 0
+    
+    with transaction.atomic():
+        # 동시 실행(처방 갱신 경합 등)으로 그사이 생긴 로그는 유니크 제약으로 건너뜀 (ON CONFLICT DO NOTHING)
+        inserted = insert_medication_logs(logs, batch_size=batch_size)
+        
+        today = timezone.localdate()
+        today_schedule_ids = {
+            log.schedule_id for log in logs
+            if timezone.localtime(log.scheduled_datetime).date() == today
+        }
+        if today_schedule_ids:
+            transaction.on_commit(lambda: schedule_today_alerts(today_schedule_ids))
+    
+    # bulk_create는 시그널이 발생하지 않으므로 직접 후처리
+    notify_logs_changed(
+        (log.schedule.medication.user_id, log.scheduled_datetime) for log in logs
+    )
+    
+    return inserted
+
+
+def take_medication_logs(user_id, log_ids=None, group_id=None, time_of_day=None, local_date=None):
+    """
+    복약 기록 일괄 복용 완료 처리 (UPDATE ... RETURNING 1회)
+    pending 상태인 로그만 전이하며, 반환된 행으로 시리얼라이저용 인스턴스를 구성
+    
+    Args:
+        user_id: 복약자 ID (본인 로그만 처리)
+        log_ids: 직접 지정한 로그 ID 목록
+        group_id, time_of_day, local_date: 그룹 + 시간대 + 현지 날짜로 지정
+        
+    Returns:
+        복용 완료 처리된 MedicationLog 목록 (schedule/medication/group 연결, 예정 일시순)
+    """
+    qn = connection.ops.quote_name
+    adapt = connection.ops.adapt_datetimefield_value
+    now = timezone.now()
+    
+    conditions = ['l.schedule_id = s.id', 'm.user_id = %s', 'l.status = %s']
+    params = [
+        MedicationLog.Status.TAKEN, adapt(now), adapt(now),
+        user_id, MedicationLog.Status.PENDING,
+    ]
+    if log_ids is not None:
+        log_ids = list(log_ids)
+        if not log_ids:
+            return []
+        conditions.append(f"l.id IN ({', '.join(['%s'] * len(log_ids))})")
+        params.extend(log_ids)
+    else:
+        # 현지 날짜 기준 반개구간 (scheduled_datetime 인덱스 사용)
+        day_start, day_end = get_local_day_range(local_date)
+        conditions.extend([
+            'm.group_id = %s',
+            's.time_of_day = %s',
+            'l.scheduled_datetime >= %s',
+            'l.scheduled_datetime < %s',
+        ])
+        params.extend([group_id, time_of_day, adapt(day_start), adapt(day_end)])
+    
+    sql = f"""
+        UPDATE {qn(MedicationLog._meta.db_table)} AS l
+        SET status = %s, taken_datetime = %s, updated_at = %s
+        FROM {qn(MedicationSchedule._meta.db_table)} s
+        JOIN {qn(Medication._meta.db_table)} m ON m.id = s.medication_id
+        LEFT JOIN {qn(MedicationGroup._meta.db_table)} g ON g.id = m.group_id
+        WHERE {' AND '.join(conditions)}
+        RETURNING l.id, l.schedule_id, l.scheduled_datetime, l.notes, l.reminded_at, l.created_at,
+                  s.time_of_day, s.scheduled_time, m.id, m.name, m.dosage, g.id, g.name
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    
+    logs = [
+        build_detached_log({
+            'id': log_id,
+            'schedule_id': schedule_id,
+            'scheduled_datetime': scheduled_datetime,
+            'taken_datetime': now,
+            'status': MedicationLog.Status.TAKEN,
+            'notes': notes,
+            'reminded_at': reminded_at,
+            'created_at': created_at,
+            'updated_at': now,
+            'user_id': user_id,
+            'medication_id': medication_id,
+            'medication_name': name,
+            'medication_dosage': dosage,
+            'group_id': group_pk,
+            'group_name': group_name,
+            'time_of_day': time_of_day,
+            'scheduled_time': scheduled_time,
+        })
+        for (log_id, schedule_id, scheduled_datetime, notes, reminded_at, created_at,
+             time_of_day, scheduled_time, medication_id, name, dosage, group_pk, group_name) in rows
+    ]
+    logs.sort(key=lambda log: log.scheduled_datetime)
+    return logs
+
+
+def build_detached_log(row):
+    """
+    조회 없이 시리얼라이저에서 사용할 MedicationLog 인스턴스 구성
+    (UPDATE ... RETURNING 결과, 아카이브 파일 행 등)
+    
+    Args:
+        row: 로그 컬럼 + user_id, medication_id, medication_name, medication_dosage,
+             group_id, group_name, time_of_day, scheduled_time
+    """
+    medication = Medication(
+        id=row['medication_id'],
+        user_id=row['user_id'],
+        name=row['medication_name'],
+        dosage=row['medication_dosage'],
+        group_id=row['group_id'],
+    )
+    medication.group = (
+        MedicationGroup(id=row['group_id'], name=row['group_name']) if row['group_id'] else None
+    )
+    schedule = MedicationSchedule(
+        id=row['schedule_id'],
+        medication=medication,
+        time_of_day=row['time_of_day'],
+        scheduled_time=row['scheduled_time'],
+    )
+    return MedicationLog(
+        id=row['id'],
+        schedule=schedule,
+        scheduled_datetime=row['scheduled_datetime'],
+        taken_datetime=row['taken_datetime'],
+        status=row['status'],
+        notes=row['notes'],
+        reminded_at=row['reminded_at'],
+        created_at=row['created_at'],
+        updated_at=row['updated_at'],
+    )
+
+
+def delete_medication_logs(logs):
+    """
+    복약 기록 일괄 삭제 (연결된 비상 알림은 CASCADE로 함께 삭제)
+    삭제 전 (사용자, 예정 일시)를 수집해 일별 집계/캘린더 캐시를 한 번에 갱신
+    
+    Args:
+        logs: MedicationLog 쿼리셋
+        
+    Returns:
+        삭제된 로그 수
+    """
+    log_keys = list(logs.values_list('schedule__medication__user_id', 'scheduled_datetime'))
+    if not log_keys:
+        return 0
+    logs.delete()
+    notify_logs_changed(log_keys)
+    return len(log_keys)
+
+
+def notify_logs_changed(log_keys):
+    """
+    복약 기록 생성/상태 변경/삭제 후처리
+    시그널이 발생하지 않는 일괄 처리(bulk_create, update, 쿼리셋 delete) 후 직접 호출
+    
+    - 해당 날짜의 일별 복약 집계(DailyAdherence) 갱신
+    - 해당 월의 캘린더 캐시 무효화
+    
+    Args:
+        log_keys: (user_id, scheduled_datetime) 목록
+    """
+    from .adherence_service import refresh_daily_adherence
+    from .calendar_service import invalidate_calendar_months
+    
+    log_keys = list(log_keys)
+    if not log_keys:
+        return
+    refresh_daily_adherence(log_keys)
+    invalidate_calendar_months(log_keys)
+
+
+def schedule_today_alerts(schedule_ids):
+    """오늘 날짜 로그의 비상 알림 계획 (커밋 후 호출, 이미 계획된 로그는 태스크에서 제외)"""
+    day_start, day_end = get_local_day_range(timezone.localdate())
+    log_ids = list(MedicationLog.objects.filter(
+        schedule_id__in=schedule_ids,
+        scheduled_datetime__gte=day_start,
+        scheduled_datetime__lt=day_end,
+        status=MedicationLog.Status.PENDING,
+    ).values_list('id', flat=True))
+    if not log_ids:
+        return
+    try:
+        from apps.alerts.tasks import schedule_medication_alerts
+        schedule_medication_alerts.delay(log_ids)
+    except Exception:
+        pass
+
+
+def build_virtual_logs(user, start_date, end_date):
+    """
+    rolling 모드에서 아직 생성되지 않은 미래 복용 예정을 가상 로그로 계산
+    
+    Args:
+        user: 복약자 User
+        start_date, end_date: 조회 구간 [start_date, end_date)
+        
+    Returns:
+        미저장 MedicationLog 목록 (id 없음, status=pending, 예정 일시순)
+    """
+    materialized_until = get_materialized_until()
+    if materialized_until is None:
+        return []
+    
+    start_date = max(start_date, materialized_until)
+    if start_date >= end_date:
+        return []
+    
+    medications = Medication.objects.filter(
+        user=user,
+        is_active=True,
+    ).select_related('group').prefetch_related('schedules')
+    
+    logs = []
+    for medication in medications:
+        for log in build_medication_logs(medication, from_date=start_date, until_date=end_date):
+            # 시리얼라이저에서 추가 조회 없이 약 정보를 사용할 수 있도록 연결
+            log.schedule.medication = medication
+            logs.append(log)
+    
+    if not logs:
+        return []
+    
+    # 이미 실제 로그로 생성된 복용 예정 제외
+    existing = set(
+        MedicationLog.objects.filter(
+            schedule_id__in={log.schedule_id for log in logs},
+            scheduled_datetime__gte=min(log.scheduled_datetime for log in logs),
+            scheduled_datetime__lte=max(log.scheduled_datetime for log in logs),
+        ).values_list('schedule_id', 'scheduled_datetime')
+    )
+    logs = [
+        log for log in logs
+        if (log.schedule_id, log.scheduled_datetime) not in existing
+    ]
+    logs.sort(key=lambda log: log.scheduled_datetime)
+    return logs
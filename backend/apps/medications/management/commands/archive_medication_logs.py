@@ -0,0 +1,44 @@
+"""
+보관 기간이 지난 복약 기록/비상 알림을 압축 JSONL 파일로 아카이브하는 관리 명령어
+사용법: python manage.py archive_medication_logs [--after-months 6] [--month 2025-01]
+"""
+
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from apps.medications.archive_service import archive_expired_months, archive_month
+
+
+class Command(BaseCommand):
+    help = '보관 기간이 지난 복약 기록/비상 알림을 파일로 아카이브하고 삭제합니다'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--after-months',
+            type=int,
+            help='이번 달 기준 보관 개월 수 (기본: ARCHIVE_AFTER_MONTHS 설정)'
+        )
+        parser.add_argument(
+            '--month',
+            help='특정 월만 아카이브 (YYYY-MM)'
+        )
+
+    def handle(self, *args, **options):
+        if options['month']:
+            try:
+                month_start = datetime.strptime(options['month'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError('--month 형식은 YYYY-MM 입니다.')
+            results = [archive_month(month_start)]
+        else:
+            results = archive_expired_months(options['after_months'])
+        
+        if not results:
+            self.stdout.write('아카이브할 월이 없습니다. (ARCHIVE_AFTER_MONTHS 또는 --after-months 확인)')
+            return
+        
+        for result in results:
+            self.stdout.write(
+                f"{result['month']}: 사용자 {result['users']}명, "
+                f"복약 기록 {result['archived_logs']}건, 비상 알림 {result['archived_alerts']}건"
+            )
+        self.stdout.write(self.style.SUCCESS(f'완료! {len(results)}개월 아카이브'))
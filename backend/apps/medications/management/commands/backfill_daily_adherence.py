@@ -0,0 +1,60 @@
+"""
+기존 복약 기록으로 일별 복약 집계(DailyAdherence)를 채우는 관리 명령어
+사용법: python manage.py backfill_daily_adherence [--user-id 1] [--batch-size 100]
+"""
+
+import time
+from django.core.management.base import BaseCommand
+from apps.medications.models import DailyAdherence, LogArchive, Medication
+from apps.medications.adherence_service import aggregate_daily_adherence, save_daily_adherence
+
+
+class Command(BaseCommand):
+    help = '기존 복약 기록으로 일별 복약 집계를 다시 계산합니다'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user-id',
+            type=int,
+            help='특정 사용자만 처리'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='한 번에 집계할 사용자 수 (기본: 100)'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        user_ids = Medication.objects.order_by('user_id').values_list('user_id', flat=True).distinct()
+        if options['user_id']:
+            user_ids = user_ids.filter(user_id=options['user_id'])
+        user_ids = list(user_ids)
+        
+        started = time.monotonic()
+        total_rows = 0
+        for i in range(0, len(user_ids), batch_size):
+            batch = user_ids[i:i + batch_size]
+            summaries = aggregate_daily_adherence(batch, None, None)
+            
+            # 로그가 모두 사라진 날짜의 기존 집계 삭제 (아카이브된 월의 집계는 유지)
+            archived_months = set(
+                LogArchive.objects.filter(user_id__in=batch).values_list('user_id', 'month')
+            )
+            stale_keys = {
+                (user_id, date)
+                for user_id, date in DailyAdherence.objects.filter(
+                    user_id__in=batch
+                ).values_list('user_id', 'date')
+                if (user_id, date) not in summaries and (user_id, date.replace(day=1)) not in archived_months
+            }
+            save_daily_adherence(summaries, stale_keys=stale_keys)
+            
+            total_rows += len(summaries)
+            self.stdout.write(f'처리 중: 사용자 {i + len(batch)}/{len(user_ids)} (집계 {total_rows}행)')
+        
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'완료! 사용자 {len(user_ids)}명, 집계 {total_rows}행 ({elapsed:.1f}초)'
+        ))
@@ -0,0 +1,260 @@
+"""
+복약 기록/비상 알림 주요 조회의 실행 계획(EXPLAIN)과 지연 시간을 측정하는 관리 명령어
+사용법: python manage.py benchmark_log_queries [--users 200] [--days 60] [--repeat 20] [--output report.json]
+
+- 시드 데이터를 트랜잭션 안에서 생성하고 측정 후 롤백 (--keep 지정 시 유지)
+- before: 기존 조회 형태(__date/__year/__month) + 신규 인덱스 제거 상태
+- after: 현지 시간 반개구간 조회 + 인덱스 적용 상태
+"""
+
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from apps.alerts.models import Alert
+from apps.medications.adherence_service import aggregate_daily_adherence, save_daily_adherence
+from apps.medications.log_service import get_local_day_range
+from apps.medications.models import (
+    DailyAdherence, Medication, MedicationGroup, MedicationLog, MedicationSchedule,
+)
+from apps.users.models import User
+
+# before 단계에서 제거할 인덱스 (모델, 인덱스 이름)
+BENCHMARK_INDEXES = [
+    (MedicationLog, 'medlog_status_sched_idx'),
+    (Alert, 'alert_status_sched_idx'),
+    (Alert, 'alert_user_sched_idx'),
+]
+
+SCHEDULE_TIMES = [
+    (MedicationSchedule.TimeOfDay.MORNING, '08:00'),
+    (MedicationSchedule.TimeOfDay.NOON, '12:30'),
+    (MedicationSchedule.TimeOfDay.EVENING, '19:00'),
+]
+
+
+class Command(BaseCommand):
+    help = '복약 기록/비상 알림 주요 조회의 실행 계획과 지연 시간을 측정합니다'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help='시드 사용자 수 (기본: 200)')
+        parser.add_argument('--medications', type=int, default=3, help='사용자당 약 개수 (기본: 3)')
+        parser.add_argument('--days', type=int, default=60, help='오늘 기준 과거 일수 (기본: 60)')
+        parser.add_argument('--repeat', type=int, default=20, help='조회별 반복 측정 횟수 (기본: 20)')
+        parser.add_argument('--output', help='측정 결과 JSON 저장 경로')
+        parser.add_argument('--keep', action='store_true', help='시드 데이터를 롤백하지 않고 유지')
+
+    def handle(self, *args, **options):
+        self.repeat = options['repeat']
+
+        with transaction.atomic():
+            dataset = self._seed(options['users'], options['medications'], options['days'])
+            self.stdout.write(f"시드 완료: {dataset}")
+
+            report = {'dataset': dataset, 'vendor': connection.vendor}
+            report['before'] = self._run_without_indexes()
+            report['after'] = self._run_phase(legacy=False)
+
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+        self._print_report(report)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+            self.stdout.write(self.style.SUCCESS(f"결과 저장: {options['output']}"))
+
+    def _seed(self, user_count, medication_count, days):
+        """사용자 × 약 × 시간대 × 일수만큼 복약 기록과 오늘 비상 알림 생성"""
+        rng = random.Random(42)
+        today = timezone.localdate()
+        now = timezone.now()
+        start_date = today - timedelta(days=days)
+        tag = int(time.time())
+
+        password = make_password(None)
+        users = User.objects.bulk_create([
+            User(username=f'bench_{tag}_{i}', password=password)
+            for i in range(user_count)
+        ])
+        groups = MedicationGroup.objects.bulk_create([
+            MedicationGroup(user=user, name='벤치마크') for user in users
+        ])
+        medications = Medication.objects.bulk_create([
+            Medication(
+                user=user,
+                group=group,
+                name=f'벤치마크약{j}',
+                start_date=start_date,
+                days_supply=days + 2,
+            )
+            for user, group in zip(users, groups)
+            for j in range(medication_count)
+        ])
+        schedules = MedicationSchedule.objects.bulk_create([
+            MedicationSchedule(medication=med, time_of_day=time_of_day, scheduled_time=scheduled_time)
+            for med in medications
+            for time_of_day, scheduled_time in SCHEDULE_TIMES
+        ])
+
+        logs = []
+        for schedule in schedules:
+            scheduled_time = datetime.strptime(schedule.scheduled_time, '%H:%M').time()
+            for offset in range(days + 2):
+                scheduled = timezone.make_aware(
+                    datetime.combine(start_date + timedelta(days=offset), scheduled_time)
+                )
+                if scheduled >= now:
+                    log_status, taken = MedicationLog.Status.PENDING, None
+                elif rng.random() < 0.85:
+                    log_status, taken = MedicationLog.Status.TAKEN, scheduled + timedelta(minutes=rng.randint(0, 90))
+                else:
+                    log_status, taken = MedicationLog.Status.MISSED, None
+                logs.append(MedicationLog(
+                    schedule=schedule,
+                    scheduled_datetime=scheduled,
+                    status=log_status,
+                    taken_datetime=taken,
+                ))
+        MedicationLog.objects.bulk_create(logs, batch_size=5000)
+
+        user_by_schedule = {schedule.id: schedule.medication.user_id for schedule in schedules}
+        alerts = Alert.objects.bulk_create([
+            Alert(
+                user_id=user_by_schedule[log.schedule_id],
+                medication_log=log,
+                alert_type=Alert.AlertType.REMINDER,
+                title='벤치마크',
+                message='벤치마크',
+                scheduled_at=log.scheduled_datetime + timedelta(minutes=30),
+            )
+            for log in logs
+            if log.status == MedicationLog.Status.PENDING
+        ], batch_size=5000)
+
+        user_ids = [user.id for user in users]
+        save_daily_adherence(aggregate_daily_adherence(user_ids, None, None))
+
+        self.user = users[0]
+        self.group = groups[0]
+        return {
+            'users': len(users),
+            'medications': len(medications),
+            'logs': len(logs),
+            'alerts': len(alerts),
+            'daily_adherence': DailyAdherence.objects.filter(user_id__in=user_ids).count(),
+        }
+
+    def _run_without_indexes(self):
+        """신규 인덱스를 제거한 상태에서 기존 조회 형태 측정 (세이브포인트 롤백으로 인덱스 복구)"""
+        if not connection.features.can_rollback_ddl:
+            self.stdout.write(self.style.WARNING('DDL 롤백 미지원 DB: 인덱스를 유지한 채 before 측정'))
+            return self._run_phase(legacy=True)
+
+        with transaction.atomic():
+            with connection.schema_editor() as editor:
+                for model, index_name in BENCHMARK_INDEXES:
+                    index = next(idx for idx in model._meta.indexes if idx.name == index_name)
+                    editor.remove_index(model, index)
+            results = self._run_phase(legacy=True)
+            transaction.set_rollback(True)
+        return results
+
+    def _run_phase(self, legacy):
+        """조회별 실행 계획 및 지연 시간 측정"""
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        results = {}
+        for name, queryset in self._queries(legacy).items():
+            results[name] = self._measure(queryset)
+        return results
+
+    def _queries(self, legacy):
+        """API/태스크의 주요 조회 (legacy=True이면 변경 전 조회 형태)"""
+        user = self.user
+        today = timezone.localdate()
+        past_date = today - timedelta(days=7)
+        now = timezone.now()
+        user_logs = MedicationLog.objects.filter(
+            schedule__medication__user=user
+        ).select_related('schedule__medication__group', 'schedule')
+
+        def on_date(queryset, local_date):
+            if legacy:
+                return queryset.filter(scheduled_datetime__date=local_date)
+            day_start, day_end = get_local_day_range(local_date)
+            return queryset.filter(scheduled_datetime__gte=day_start, scheduled_datetime__lt=day_end)
+
+        if legacy:
+            calendar = MedicationLog.objects.filter(
+                schedule__medication__user=user,
+                scheduled_datetime__year=today.year,
+                scheduled_datetime__month=today.month,
+            )
+        else:
+            calendar = DailyAdherence.objects.filter(
+                user=user,
+                date__gte=today.replace(day=1),
+                date__lt=(today.replace(day=1) + timedelta(days=32)).replace(day=1),
+            ).order_by('date')
+
+        return {
+            'today': on_date(user_logs, today).order_by('schedule__scheduled_time'),
+            'by_date': on_date(user_logs, past_date).order_by('schedule__scheduled_time'),
+            'calendar_month': calendar,
+            'batch_take': on_date(MedicationLog.objects.filter(
+                schedule__medication__user=user,
+                schedule__medication__group=self.group,
+                schedule__time_of_day=MedicationSchedule.TimeOfDay.MORNING,
+                status=MedicationLog.Status.PENDING,
+            ), today),
+            'missed_sweep': MedicationLog.objects.filter(
+                status=MedicationLog.Status.PENDING,
+                scheduled_datetime__lt=now - timedelta(hours=2),
+            ).order_by('scheduled_datetime').values_list('id', flat=True)[:1000],
+            'reminder_dispatch': MedicationLog.objects.filter(
+                status=MedicationLog.Status.PENDING,
+                scheduled_datetime__gte=now,
+                scheduled_datetime__lt=now + timedelta(minutes=1),
+                reminded_at__isnull=True,
+            ).order_by('scheduled_datetime').values_list('id', flat=True)[:500],
+            'alert_dispatch': Alert.objects.filter(
+                status=Alert.Status.PENDING,
+                scheduled_at__gte=now - timedelta(hours=1),
+                scheduled_at__lt=now + timedelta(minutes=1),
+            ).order_by('scheduled_at').values_list('id', flat=True)[:500],
+            'alert_list': Alert.objects.filter(user=user).order_by('-scheduled_at')[:50],
+        }
+
+    def _measure(self, queryset):
+        """EXPLAIN 결과와 반복 실행 지연 시간(ms)"""
+        if connection.vendor == 'postgresql':
+            plan = queryset.explain(analyze=True, buffers=True)
+        else:
+            plan = queryset.explain()
+
+        timings = []
+        for _ in range(self.repeat):
+            started = time.perf_counter()
+            list(queryset.all())
+            timings.append((time.perf_counter() - started) * 1000)
+
+        return {
+            'plan': plan,
+            'p50_ms': round(statistics.median(timings), 3),
+            'mean_ms': round(statistics.mean(timings), 3),
+            'max_ms': round(max(timings), 3),
+        }
+
+    def _print_report(self, report):
+        self.stdout.write(f"\n{'조회':<20}{'before p50(ms)':>16}{'after p50(ms)':>16}")
+        for name, after in report['after'].items():
+            before = report['before'][name]
+            self.stdout.write(f"{name:<20}{before['p50_ms']:>16.3f}{after['p50_ms']:>16.3f}")
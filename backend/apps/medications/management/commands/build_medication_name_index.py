@@ -0,0 +1,39 @@
+"""
+medications.json으로 로컬 약품명 색인 파일을 미리 만드는 관리 명령어
+배포 시 한 번 실행하면 웹/워커 프로세스가 시작할 때 색인을 새로 만들지 않고 파일만 로드
+사용법: python manage.py build_medication_name_index [--data-path ...] [--output ...]
+"""
+
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from apps.medications.name_index import MedicationNameIndex
+
+
+class Command(BaseCommand):
+    help = 'medications.json으로 로컬 약품명 색인 파일을 생성합니다'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--data-path',
+            default=settings.RAG_SETTINGS.get('NAME_DATA_PATH'),
+            help='medications.json 파일 경로 (기본: RAG_SETTINGS NAME_DATA_PATH)'
+        )
+        parser.add_argument(
+            '--output',
+            default=settings.RAG_SETTINGS.get('NAME_INDEX_PATH'),
+            help='색인 파일 경로 (기본: RAG_SETTINGS NAME_INDEX_PATH)'
+        )
+    
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            index = MedicationNameIndex.from_json(options['data_path'])
+        except FileNotFoundError:
+            raise CommandError(f"약품 데이터 파일이 없습니다: {options['data_path']}")
+        index.save(options['output'])
+        
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"완료! 약품 {len(index)}개, 기본명 {len(index.bases)}개 → {options['output']} ({elapsed:.1f}초)"
+        ))
@@ -0,0 +1,87 @@
+"""
+medications.json으로 로컬 벡터 색인(mmap .npy + 메타데이터)을 만드는 관리 명령어
+RAG_SETTINGS VECTOR_BACKEND='local'일 때 Pinecone 대신 사용
+(전체 약품명을 한 번씩만 임베딩하므로 임베딩 캐시(LRU/Redis)를 거치지 않고 질의 캐시 공간을 차지하지 않음)
+사용법: python manage.py build_medication_vector_index [--data-path ...] [--output-dir ...] [--dimensions 1536] [--lists 170] [--batch-size 500]
+"""
+
+import json
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from apps.medications.rag_service import EMBEDDING_MODEL, get_rag_service
+from apps.medications.vector_index import build_vector_index
+
+
+class Command(BaseCommand):
+    help = 'medications.json으로 로컬 약품명 벡터 색인을 생성합니다'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--data-path',
+            default=settings.RAG_SETTINGS.get('NAME_DATA_PATH'),
+            help='medications.json 파일 경로 (기본: RAG_SETTINGS NAME_DATA_PATH)'
+        )
+        parser.add_argument(
+            '--output-dir',
+            default=settings.RAG_SETTINGS.get('VECTOR_INDEX_DIR'),
+            help='색인 디렉터리 (기본: RAG_SETTINGS VECTOR_INDEX_DIR)'
+        )
+        parser.add_argument(
+            '--dimensions',
+            type=int,
+            default=settings.RAG_SETTINGS.get('VECTOR_INDEX_DIMENSIONS'),
+            help='저장할 앞쪽 차원 수 (기본: RAG_SETTINGS VECTOR_INDEX_DIMENSIONS, 0이면 전체, '
+                 '줄이면 RAG_SETTINGS VECTOR_INDEX_THRESHOLD 재보정 필요)'
+        )
+        parser.add_argument(
+            '--lists',
+            type=int,
+            default=None,
+            help='IVF 목록 수 (기본: 약품 수의 제곱근, 1이면 목록 없이 전체 검색)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='임베딩 요청 1회당 약품명 수 (기본: 500)'
+        )
+    
+    def handle(self, *args, **options):
+        try:
+            with open(options['data_path'], 'r', encoding='utf-8') as f:
+                medications = json.load(f)
+        except FileNotFoundError:
+            raise CommandError(f"약품 데이터 파일이 없습니다: {options['data_path']}")
+        
+        # Pinecone 업로드와 같이 약품명으로만 임베딩, 성분/제조사는 메타데이터로 저장
+        entries = [
+            {
+                'name': med['name'],
+                'ingredient': med.get('ingredient', ''),
+                'manufacturer': med.get('manufacturer', ''),
+            }
+            for med in medications if med.get('name')
+        ]
+        
+        started = time.monotonic()
+        rag_service = get_rag_service()
+        batch_size = options['batch_size']
+        embeddings = []
+        for i in range(0, len(entries), batch_size):
+            batch = entries[i:i + batch_size]
+            embeddings.extend(rag_service.get_embeddings(
+                [entry['name'] for entry in batch], use_cache=False
+            ))
+            self.stdout.write(f'임베딩 중: {i + len(batch)}/{len(entries)}')
+        
+        manifest = build_vector_index(
+            options['output_dir'], entries, embeddings, EMBEDDING_MODEL,
+            dimensions=options['dimensions'] or None,
+            n_lists=options['lists'],
+        )
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"완료! 약품 {manifest['count']}개 ({manifest['dimensions']}차원, 버전 {manifest['version']}) "
+            f"→ {options['output_dir']} ({elapsed:.1f}초)"
+        ))
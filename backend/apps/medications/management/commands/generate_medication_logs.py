@@ -1,62 +1,236 @@
 """
 기존 약의 복약 로그를 생성하는 관리 명령어
-사용법: python manage.py generate_medication_logs
+사용법: python manage.py generate_medication_logs [--workers 4] [--range-size 500] [--batch-size 5000]
+                                                [--checkpoint generate_logs.json] [--no-summaries]
+
+- 활성 약을 ID 구간으로 나누어 구간별로 로그를 계산하고 INSERT ... ON CONFLICT DO NOTHING으로 저장
+  ((schedule, scheduled_datetime) 유니크 제약으로 중복 없이 몇 번이든 재실행 가능)
+- --workers N: 구간을 N개 프로세스에서 병렬 처리
+- --checkpoint: 완료한 구간을 파일에 기록하여 중단 후 재실행 시 건너뜀
+- 완료 후 로그가 저장된 사용자/날짜 구간의 일별 복약 집계 재계산, 캘린더 캐시 무효화, 오늘 비상 알림 계획
 """
 
-from datetime import datetime, timedelta
+import json
+import multiprocessing
+import os
+import time
+from datetime import date, timedelta
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from django.core.management.base import BaseCommand
+from django.db import connections, transaction
 from django.utils import timezone
-from apps.medications.models import Medication, MedicationSchedule, MedicationLog
+from apps.medications.models import Medication
+from apps.medications.adherence_service import aggregate_daily_adherence, save_daily_adherence
+from apps.medications.log_service import build_medication_logs, get_materialized_until, insert_medication_logs
+
+
+def _active_medications():
+    return Medication.objects.filter(
+        is_active=True,
+        start_date__isnull=False,
+        days_supply__isnull=False
+    )
+
+
+def generate_range(start_id, end_id, batch_size):
+    """
+    약 ID 구간 [start_id, end_id]의 복약 로그 생성 (워커 프로세스에서 실행)
+    
+    Returns:
+        (start_id, end_id, 계산한 로그 수, 새로 저장된 로그 수, 사용자 ID 목록,
+         집계 재계산 구간 {사용자 ID: [시작일, 종료일]} (저장된 로그가 없으면 빈 dict), 소요 시간(초))
+    """
+    started = time.monotonic()
+    medications = list(
+        _active_medications().filter(id__gte=start_id, id__lte=end_id).prefetch_related('schedules')
+    )
+    until_date = get_materialized_until()
+    logs = []
+    for medication in medications:
+        logs.extend(build_medication_logs(medication, until_date=until_date))
+    
+    with transaction.atomic():
+        inserted = insert_medication_logs(logs, batch_size=batch_size)
+    
+    # 워커 프로세스가 연결을 남기지 않도록 정리
+    connections.close_all()
+    user_ids = sorted({medication.user_id for medication in medications})
+    
+    # 저장된 행 수만 알 수 있으므로 계산한 로그의 사용자별 날짜 구간을 재계산 대상으로 (이미 있던 날짜도 다시 집계해도 결과 같음)
+    refresh_ranges = {}
+    if inserted:
+        user_by_medication = {medication.id: medication.user_id for medication in medications}
+        user_by_schedule = {
+            schedule.id: user_by_medication[schedule.medication_id]
+            for medication in medications
+            for schedule in medication.schedules.all()
+        }
+        for log in logs:
+            day = timezone.localtime(log.scheduled_datetime).date().isoformat()
+            user_range = refresh_ranges.setdefault(user_by_schedule[log.schedule_id], [day, day])
+            user_range[0] = min(user_range[0], day)
+            user_range[1] = max(user_range[1], day)
+    return start_id, end_id, len(logs), inserted, user_ids, refresh_ranges, time.monotonic() - started
+
+
+def _merge_ranges(target, ranges):
+    """{사용자 ID: [시작일, 종료일]} 구간 합치기 (ISO 날짜 문자열이라 문자열 비교로 충분)"""
+    for user_id, (start, end) in ranges.items():
+        if user_id in target:
+            start, end = min(start, target[user_id][0]), max(end, target[user_id][1])
+        target[user_id] = [start, end]
 
 
 class Command(BaseCommand):
     help = '기존 약의 복약 로그를 start_date부터 end_date까지 생성합니다'
-
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='병렬 처리 프로세스 수 (기본: 1)'
+        )
+        parser.add_argument(
+            '--range-size',
+            type=int,
+            default=500,
+            help='작업 구간당 약 개수 (기본: 500)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='INSERT 한 번에 저장할 로그 개수 (기본: 5000)'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='완료한 구간을 기록할 JSON 파일 경로 (재실행 시 완료 구간 건너뜀)'
+        )
+        parser.add_argument(
+            '--no-summaries',
+            action='store_true',
+            help='일별 복약 집계 재계산 및 오늘 비상 알림 계획 생략'
+        )
+    
     def handle(self, *args, **options):
-        medications = Medication.objects.filter(
-            is_active=True,
-            start_date__isnull=False,
-            days_supply__isnull=False
+        workers = max(1, options['workers'])
+        batch_size = options['batch_size']
+        checkpoint_path = options['checkpoint']
+        
+        done, refresh_ranges = self._load_checkpoint(checkpoint_path)
+        ranges = [
+            item for item in self._split_ranges(options['range_size'])
+            if list(item) not in done
+        ]
+        self.stdout.write(
+            f'처리할 구간 {len(ranges)}개 (완료 구간 {len(done)}개 건너뜀, 워커 {workers}개)'
         )
         
-        total_created = 0
+        started = time.monotonic()
+        total_built = total_inserted = 0
+        user_ids = set()
         
-        for med in medications:
-            start_date = med.start_date
-            end_date = med.end_date
-            
-            if not end_date:
-                continue
+        for start_id, end_id, built, inserted, range_users, range_refresh, elapsed in self._run(
+            ranges, workers, batch_size
+        ):
+            total_built += built
+            total_inserted += inserted
+            user_ids.update(range_users)
+            _merge_ranges(refresh_ranges, range_refresh)
+            done.append([start_id, end_id])
+            self._save_checkpoint(checkpoint_path, done, refresh_ranges)
             
-            self.stdout.write(f'처리 중: {med.name} ({start_date} ~ {end_date})')
-            
-            for schedule in med.schedules.filter(is_active=True):
-                current_date = start_date
-                logs_created = 0
-                
-                while current_date < end_date:
-                    scheduled_datetime = timezone.make_aware(
-                        datetime.combine(current_date, schedule.scheduled_time)
-                    )
-                    
-                    # 이미 존재하는 로그는 건너뛰기
-                    exists = MedicationLog.objects.filter(
-                        schedule=schedule,
-                        scheduled_datetime__date=current_date
-                    ).exists()
-                    
-                    if not exists:
-                        MedicationLog.objects.create(
-                            schedule=schedule,
-                            scheduled_datetime=scheduled_datetime,
-                            status=MedicationLog.Status.PENDING
-                        )
-                        logs_created += 1
-                        total_created += 1
-                    
-                    current_date += timedelta(days=1)
-                
-                if logs_created > 0:
-                    self.stdout.write(f'  - {schedule.get_time_of_day_display()}: {logs_created}개 로그 생성')
+            rate = inserted / elapsed if elapsed else 0
+            total_rate = total_inserted / (time.monotonic() - started)
+            self.stdout.write(
+                f'구간 {start_id}~{end_id}: 계산 {built}개, 저장 {inserted}개 '
+                f'({elapsed:.1f}초, {rate:.0f}행/초, 누적 {total_inserted}개 {total_rate:.0f}행/초)'
+            )
+        
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'완료! 총 {total_inserted}개의 복약 로그가 생성되었습니다. '
+            f'(계산 {total_built}개, {elapsed:.1f}초, {total_inserted / elapsed if elapsed else 0:.0f}행/초)'
+        ))
+        
+        if user_ids:
+            self._invalidate_calendars(user_ids)
+        # 이전 실행에서 저장 후 집계 전에 중단된 구간도 체크포인트에서 이어받아 재계산
+        if refresh_ranges and not options['no_summaries']:
+            self._refresh_summaries(refresh_ranges)
+            self._save_checkpoint(checkpoint_path, done, {})
+    
+    def _split_ranges(self, range_size):
+        """활성 약 ID를 range_size개씩 (시작 ID, 끝 ID) 구간으로 분할"""
+        ids = list(_active_medications().order_by('id').values_list('id', flat=True))
+        return [
+            (chunk[0], chunk[-1])
+            for chunk in (ids[i:i + range_size] for i in range(0, len(ids), range_size))
+        ]
+    
+    def _run(self, ranges, workers, batch_size):
+        """구간 처리 결과를 완료 순서대로 반환"""
+        if workers == 1 or len(ranges) <= 1:
+            for start_id, end_id in ranges:
+                yield generate_range(start_id, end_id, batch_size)
+            return
+        
+        # fork 전에 부모 연결을 닫아 워커가 같은 소켓을 공유하지 않도록 함
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            futures = [
+                executor.submit(generate_range, start_id, end_id, batch_size)
+                for start_id, end_id in ranges
+            ]
+            for future in as_completed(futures):
+                yield future.result()
+    
+    def _load_checkpoint(self, path):
+        """(완료 구간 목록, 집계 재계산이 남은 {사용자 ID: [시작일, 종료일]})"""
+        if not path or not os.path.exists(path):
+            return [], {}
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        refresh_ranges = {int(user_id): days for user_id, days in data.get('refresh', {}).items()}
+        return data.get('done', []), refresh_ranges
+    
+    def _save_checkpoint(self, path, done, refresh_ranges):
+        if not path:
+            return
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'done': done, 'refresh': refresh_ranges}, f)
+        os.replace(tmp_path, path)
+    
+    def _invalidate_calendars(self, user_ids):
+        from apps.medications.calendar_service import invalidate_user_calendar
+        for user_id in user_ids:
+            invalidate_user_calendar(user_id)
+    
+    def _refresh_summaries(self, refresh_ranges, batch_size=100):
+        """
+        bulk_create는 시그널이 발생하지 않으므로 로그가 저장된 사용자/날짜 구간만 집계 재계산 및 오늘 비상 알림 계획
+        로그를 추가만 하므로 집계 upsert만 수행 (삭제할 집계 없음)
+        """
+        user_ids = sorted(refresh_ranges)
+        total_rows = 0
+        for i in range(0, len(user_ids), batch_size):
+            batch = user_ids[i:i + batch_size]
+            start = min(date.fromisoformat(refresh_ranges[user_id][0]) for user_id in batch)
+            end = max(date.fromisoformat(refresh_ranges[user_id][1]) for user_id in batch)
+            summaries = aggregate_daily_adherence(batch, start, end + timedelta(days=1))
+            summaries = {
+                (user_id, day): values for (user_id, day), values in summaries.items()
+                if refresh_ranges[user_id][0] <= day.isoformat() <= refresh_ranges[user_id][1]
+            }
+            save_daily_adherence(summaries)
+            total_rows += len(summaries)
+        self.stdout.write(f'일별 복약 집계 재계산: 사용자 {len(user_ids)}명, 집계 {total_rows}행')
         
-        self.stdout.write(self.style.SUCCESS(f'완료! 총 {total_created}개의 복약 로그가 생성되었습니다.'))
+        try:
+            from apps.alerts.tasks import schedule_daily_reminders
+            schedule_daily_reminders.delay()
+        except Exception as e:
+            self.stdout.write(self.style.WARNING(f'비상 알림 계획 실패: {e}'))
@@ -0,0 +1,70 @@
+"""
+기능별 OpenAI 호출 지연 시간/토큰 사용량 리포트 관리 명령어
+사용법: python manage.py llm_usage_report [--days 7] [--feature ocr_vision] [--daily]
+약품명 임베딩 캐시 일자별 적중률도 함께 출력
+"""
+
+from django.core.management.base import BaseCommand
+from apps.medications.embedding_cache import get_embedding_cache_stats
+from apps.medications.llm_usage_service import build_llm_usage_report
+
+
+class Command(BaseCommand):
+    help = '기능별 OpenAI 호출 p50/p95 지연 시간과 일별 토큰 사용량을 출력합니다'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=7,
+            help='최근 며칠간의 호출을 집계할지 (기본: 7)'
+        )
+        parser.add_argument(
+            '--feature',
+            help='특정 기능만 집계 (예: ocr_vision, rag_embedding, condition_inference)'
+        )
+        parser.add_argument(
+            '--daily',
+            action='store_true',
+            help='일별 기능별 토큰 사용량도 출력'
+        )
+    
+    def handle(self, *args, **options):
+        days = options['days']
+        report = build_llm_usage_report(days=days, feature=options['feature'])
+        if not report['features']:
+            self.stdout.write(self.style.WARNING(f'최근 {days}일간 호출 기록이 없습니다'))
+        else:
+            self.stdout.write(f'최근 {days}일 기능별 호출')
+            self.stdout.write(
+                f"{'기능':<22}{'호출':>8}{'실패':>6}{'한도초과':>8}{'재시도':>7}"
+                f"{'p50(ms)':>9}{'p95(ms)':>9}{'일평균 토큰':>13}{'비용($)':>10}"
+            )
+            for row in report['features']:
+                tokens = row['prompt_tokens'] + row['completion_tokens']
+                p50 = '-' if row['p50_ms'] is None else row['p50_ms']
+                p95 = '-' if row['p95_ms'] is None else row['p95_ms']
+                self.stdout.write(
+                    f"{row['feature']:<22}{row['calls']:>8}{row['errors']:>6}{row['throttled']:>8}{row['retries']:>7}"
+                    f"{p50:>9}{p95:>9}{tokens // days:>13}{row['cost_usd']:>10.3f}"
+                )
+            
+            if options['daily']:
+                self.stdout.write('')
+                self.stdout.write('일별 기능별 토큰 사용량')
+                self.stdout.write(f"{'날짜':<12}{'기능':<22}{'호출':>8}{'입력 토큰':>12}{'출력 토큰':>12}{'비용($)':>10}")
+                for row in report['daily']:
+                    self.stdout.write(
+                        f"{row['date']!s:<12}{row['feature']:<22}{row['calls']:>8}"
+                        f"{row['prompt_tokens']:>12}{row['completion_tokens']:>12}{row['cost_usd']:>10.3f}"
+                    )
+        
+        cache_stats = get_embedding_cache_stats(days)
+        if cache_stats:
+            self.stdout.write('')
+            self.stdout.write('약품명 임베딩 캐시 적중률')
+            self.stdout.write(f"{'날짜':<12}{'LRU':>8}{'Redis':>8}{'미스':>8}{'적중률':>9}")
+            for row in cache_stats:
+                self.stdout.write(
+                    f"{row['date']!s:<12}{row['lru']:>8}{row['redis']:>8}{row['miss']:>8}{row['hit_rate']:>9.1%}"
+                )
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-17 17:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medications', '0004_medication_days_supply_medication_start_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='medicationlog',
+            name='reminded_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='리마인더 발송 일시'),
+        ),
+        migrations.AddIndex(
+            model_name='medicationlog',
+            index=models.Index(fields=['status', 'scheduled_datetime'], name='medlog_status_sched_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-17 18:08
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('medications', '0005_medicationlog_reminded_at_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyAdherence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='날짜')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='전체')),
+                ('taken', models.PositiveIntegerField(default=0, verbose_name='복용 완료')),
+                ('missed', models.PositiveIntegerField(default=0, verbose_name='미복용')),
+                ('skipped', models.PositiveIntegerField(default=0, verbose_name='건너뜀')),
+                ('first_taken_at', models.DateTimeField(blank=True, null=True, verbose_name='첫 복용 일시')),
+                ('last_taken_at', models.DateTimeField(blank=True, null=True, verbose_name='마지막 복용 일시')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_adherence', to=settings.AUTH_USER_MODEL, verbose_name='사용자')),
+            ],
+            options={
+                'verbose_name': '일별 복약 집계',
+                'verbose_name_plural': '일별 복약 집계 목록',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailyadherence',
+            constraint=models.UniqueConstraint(fields=('user', 'date'), name='unique_daily_adherence'),
+        ),
+    ]
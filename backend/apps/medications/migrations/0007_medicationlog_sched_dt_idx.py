@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-17 18:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medications', '0006_dailyadherence'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='medicationlog',
+            index=models.Index(fields=['schedule', 'scheduled_datetime'], name='medlog_sched_dt_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-17 18:19
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('medications', '0008_partition_medicationlog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LogArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(verbose_name='월 (1일)')),
+                ('log_path', models.CharField(blank=True, max_length=255, verbose_name='복약 기록 파일 경로')),
+                ('log_count', models.PositiveIntegerField(default=0, verbose_name='복약 기록 수')),
+                ('alert_path', models.CharField(blank=True, max_length=255, verbose_name='비상 알림 파일 경로')),
+                ('alert_count', models.PositiveIntegerField(default=0, verbose_name='비상 알림 수')),
+                ('archived_at', models.DateTimeField(auto_now=True, verbose_name='아카이브 일시')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='log_archives', to=settings.AUTH_USER_MODEL, verbose_name='사용자')),
+            ],
+            options={
+                'verbose_name': '복약 기록 아카이브',
+                'verbose_name_plural': '복약 기록 아카이브 목록',
+                'ordering': ['-month'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='logarchive',
+            constraint=models.UniqueConstraint(fields=('user', 'month'), name='unique_log_archive'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.30 on 2026-10-17 18:30
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def remove_duplicate_logs(apps, schema_editor):
+    """
+    (schedule, scheduled_datetime) 중복 로그 정리
+    복용/미복용 처리된 로그(없으면 가장 먼저 생성된 로그)를 남기고,
+    나머지 로그의 비상 알림은 남기는 로그로 옮긴 뒤 삭제
+    """
+    MedicationLog = apps.get_model('medications', 'MedicationLog')
+    Alert = apps.get_model('alerts', 'Alert')
+    
+    duplicates = MedicationLog.objects.values(
+        'schedule_id', 'scheduled_datetime'
+    ).annotate(count=Count('id')).filter(count__gt=1).order_by()
+    
+    for duplicate in duplicates.iterator():
+        logs = list(MedicationLog.objects.filter(
+            schedule_id=duplicate['schedule_id'],
+            scheduled_datetime=duplicate['scheduled_datetime'],
+        ).order_by('id'))
+        keep = next((log for log in logs if log.status != 'pending'), logs[0])
+        remove_ids = [log.id for log in logs if log.id != keep.id]
+        Alert.objects.filter(medication_log_id__in=remove_ids).update(medication_log_id=keep.id)
+        MedicationLog.objects.filter(id__in=remove_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alerts', '0007_partition_alert'),
+        ('medications', '0009_logarchive'),
+    ]
+    
+    operations = [
+        migrations.RunPython(remove_duplicate_logs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='medicationlog',
+            constraint=models.UniqueConstraint(fields=('schedule', 'scheduled_datetime'), name='unique_medlog_schedule_datetime'),
+        ),
+        # 유니크 제약 인덱스가 같은 컬럼을 덮으므로 중복 인덱스 제거
+        migrations.RemoveIndex(
+            model_name='medicationlog',
+            name='medlog_sched_dt_idx',
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-17 18:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medications', '0010_unique_medlog_schedule_datetime'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScanResultCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image_hash', models.CharField(max_length=80, unique=True, verbose_name='이미지 해시')),
+                ('perceptual_hash', models.CharField(max_length=256, verbose_name='지각 해시 비트열')),
+                ('result', models.JSONField(verbose_name='스캔 결과')),
+                ('hit_count', models.PositiveIntegerField(default=0, verbose_name='재사용 횟수')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='만료 일시')),
+            ],
+            options={
+                'verbose_name': '처방전 스캔 결과 캐시',
+                'verbose_name_plural': '처방전 스캔 결과 캐시 목록',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-17 18:36
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medications', '0011_scanresultcache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LLMCallLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('feature', models.CharField(max_length=40, verbose_name='기능')),
+                ('model', models.CharField(max_length=60, verbose_name='모델')),
+                ('prompt_tokens', models.PositiveIntegerField(default=0, verbose_name='입력 토큰')),
+                ('completion_tokens', models.PositiveIntegerField(default=0, verbose_name='출력 토큰')),
+                ('latency_ms', models.PositiveIntegerField(verbose_name='지연 시간(ms)')),
+                ('wait_ms', models.PositiveIntegerField(default=0, verbose_name='한도 대기 시간(ms)')),
+                ('retries', models.PositiveSmallIntegerField(default=0, verbose_name='재시도 횟수')),
+                ('outcome', models.CharField(choices=[('success', '성공'), ('error', '실패'), ('throttled', '호출 한도 대기 초과')], max_length=10, verbose_name='결과')),
+                ('error_type', models.CharField(blank=True, max_length=60, verbose_name='오류 유형')),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='호출 일시')),
+            ],
+            options={
+                'verbose_name': 'LLM 호출 기록',
+                'verbose_name_plural': 'LLM 호출 기록 목록',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['feature', 'created_at'], name='llmcall_feature_created_idx')],
+            },
+        ),
+    ]
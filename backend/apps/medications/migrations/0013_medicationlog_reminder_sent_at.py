@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-17 18:57
+
+from datetime import timedelta
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def mark_reminded_logs_sent(apps, schema_editor):
+    """
+    배포 전에 이미 리마인더가 발송된 로그를 완료로 표시 (재선점되어 다시 발송되지 않도록)
+    디스패처의 재발송 지연 한도 안에 있는 최근 로그만 대상
+    """
+    MedicationLog = apps.get_model('medications', 'MedicationLog')
+    MedicationLog.objects.filter(
+        scheduled_datetime__gte=timezone.now() - timedelta(days=1),
+        reminded_at__isnull=False,
+        reminder_sent_at__isnull=True,
+    ).update(reminder_sent_at=models.F('reminded_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medications', '0012_llmcalllog'),
+    ]
+    
+    operations = [
+        migrations.AddField(
+            model_name='medicationlog',
+            name='reminder_sent_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='리마인더 발송 완료 일시'),
+        ),
+        migrations.AlterField(
+            model_name='medicationlog',
+            name='reminded_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='리마인더 선점 일시'),
+        ),
+        migrations.RunPython(mark_reminded_logs_sent, migrations.RunPython.noop),
+    ]
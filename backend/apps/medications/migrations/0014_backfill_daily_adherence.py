@@ -0,0 +1,77 @@
+# 일별 복약 집계(DailyAdherence) 도입 이전의 복약 기록으로 집계 채우기
+# 캘린더가 집계만 조회하므로, 배포 직후 과거 월이 비어 보이지 않도록 마이그레이션에서 실행
+# 사용자 100명 단위로 커밋하여(atomic=False) 긴 트랜잭션/잠금 없이 진행하며, 중단 후 다시 실행해도 안전
+
+from django.db import migrations
+from django.db.models import Count, F, Max, Min, Q
+from django.db.models.functions import TruncDate
+
+BATCH_SIZE = 100
+
+
+def backfill_daily_adherence(apps, schema_editor):
+    """
+    사용자별, 현지 날짜별 복약 집계 생성
+    이미 증분 갱신된 (사용자, 날짜) 행은 최신이므로 그대로 둠 (ON CONFLICT DO NOTHING)
+    """
+    from apps.medications.calendar_service import invalidate_user_calendar
+    
+    Medication = apps.get_model('medications', 'Medication')
+    MedicationLog = apps.get_model('medications', 'MedicationLog')
+    DailyAdherence = apps.get_model('medications', 'DailyAdherence')
+    
+    user_ids = list(
+        Medication.objects.order_by('user_id').values_list('user_id', flat=True).distinct()
+    )
+    taken = Q(status='taken')
+    
+    for i in range(0, len(user_ids), BATCH_SIZE):
+        batch = user_ids[i:i + BATCH_SIZE]
+        rows = MedicationLog.objects.filter(
+            schedule__medication__user_id__in=batch,
+        ).annotate(
+            user_id=F('schedule__medication__user_id'),
+            local_date=TruncDate('scheduled_datetime'),
+        ).values('user_id', 'local_date').annotate(
+            total=Count('id'),
+            taken=Count('id', filter=taken),
+            missed=Count('id', filter=Q(status='missed')),
+            skipped=Count('id', filter=Q(status='skipped')),
+            first_taken_at=Min('taken_datetime', filter=taken),
+            last_taken_at=Max('taken_datetime', filter=taken),
+        ).order_by()
+        
+        DailyAdherence.objects.bulk_create(
+            [
+                DailyAdherence(
+                    user_id=row['user_id'],
+                    date=row['local_date'],
+                    total=row['total'],
+                    taken=row['taken'],
+                    missed=row['missed'],
+                    skipped=row['skipped'],
+                    first_taken_at=row['first_taken_at'],
+                    last_taken_at=row['last_taken_at'],
+                )
+                for row in rows
+            ],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+        
+        # 집계 없이 캐시된(빈) 월 캘린더 무효화
+        for user_id in batch:
+            invalidate_user_calendar(user_id)
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+    
+    dependencies = [
+        ('medications', '0013_medicationlog_reminder_sent_at'),
+    ]
+    
+    operations = [
+        migrations.RunPython(backfill_daily_adherence, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-17 19:10
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medications', '0014_backfill_daily_adherence'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='scanresultcache',
+            name='perceptual_hash',
+        ),
+    ]
@@ -4,6 +4,7 @@ Medications Models - 복약 스케줄 및 OCR 파싱
 
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 
 class MedicationGroup(models.Model):
@@ -192,6 +193,18 @@ class MedicationLog(models.Model):
         default=Status.PENDING,
         verbose_name='상태'
     )
+    # 정시 리마인더 선점 일시 - 분 단위 디스패처의 중복 발송 방지 (임대 시간이 지나도록 완료되지 않으면 재선점)
+    reminded_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='리마인더 선점 일시'
+    )
+    # 정시 리마인더 완료 일시 - 발송 성공 또는 발송 불필요(토큰 없음, 같은 시간대 이미 발송)로 확정된 시점
+    reminder_sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='리마인더 발송 완료 일시'
+    )
     # Celery 태스크 ID (취소를 위해 저장)
     celery_task_id = models.CharField(
         max_length=255,
@@ -209,6 +222,166 @@ class MedicationLog(models.Model):
         verbose_name = '복약 기록'
         verbose_name_plural = '복약 기록 목록'
         ordering = ['-scheduled_datetime']
+        indexes = [
+            # 분 단위 디스패처의 범위 스캔 (status='pending' AND scheduled_datetime 구간)
+            models.Index(fields=['status', 'scheduled_datetime'], name='medlog_status_sched_idx'),
+        ]
+        constraints = [
+            # 스케줄당 같은 시각의 복용 기록은 1건 (동시 생성 시 ON CONFLICT DO NOTHING)
+            # 스케줄별 날짜 구간 조회(오늘/날짜별 목록, 처방 갱신 시 미래 로그 삭제)도 이 인덱스 사용
+            models.UniqueConstraint(
+                fields=['schedule', 'scheduled_datetime'],
+                name='unique_medlog_schedule_datetime',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.schedule.medication.name} - {self.scheduled_datetime.date()} ({self.get_status_display()})"
+
+
+class DailyAdherence(models.Model):
+    """
+    일별 복약 집계 (사용자 + 날짜당 1행)
+    MedicationLog 상태가 바뀔 때마다 해당 날짜만 증분 갱신
+    캘린더/보호자 대시보드/복약 순응도 리포트에서 로그 대신 조회
+    """
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='daily_adherence',
+        verbose_name='사용자'
+    )
+    date = models.DateField(
+        verbose_name='날짜'
+    )
+    total = models.PositiveIntegerField(default=0, verbose_name='전체')
+    taken = models.PositiveIntegerField(default=0, verbose_name='복용 완료')
+    missed = models.PositiveIntegerField(default=0, verbose_name='미복용')
+    skipped = models.PositiveIntegerField(default=0, verbose_name='건너뜀')
+    first_taken_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='첫 복용 일시'
+    )
+    last_taken_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='마지막 복용 일시'
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = '일별 복약 집계'
+        verbose_name_plural = '일별 복약 집계 목록'
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'date'], name='unique_daily_adherence'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.date} ({self.taken}/{self.total})"
+
+
+class LogArchive(models.Model):
+    """
+    복약 기록/비상 알림 월별 아카이브 (사용자 + 월당 1행)
+    보관 기간이 지난 행은 압축 JSONL 파일로 옮기고, 날짜별 조회 시 파일에서 읽음
+    """
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='log_archives',
+        verbose_name='사용자'
+    )
+    month = models.DateField(
+        verbose_name='월 (1일)'
+    )
+    log_path = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name='복약 기록 파일 경로'
+    )
+    log_count = models.PositiveIntegerField(default=0, verbose_name='복약 기록 수')
+    alert_path = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name='비상 알림 파일 경로'
+    )
+    alert_count = models.PositiveIntegerField(default=0, verbose_name='비상 알림 수')
+    archived_at = models.DateTimeField(auto_now=True, verbose_name='아카이브 일시')
+    
+    class Meta:
+        verbose_name = '복약 기록 아카이브'
+        verbose_name_plural = '복약 기록 아카이브 목록'
+        ordering = ['-month']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'month'], name='unique_log_archive'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.month:%Y-%m} ({self.log_count}건)"
+
+
+class ScanResultCache(models.Model):
+    """
+    처방전 스캔 결과 캐시 (정규화 이미지의 내용 해시당 1행)
+    Redis 캐시가 비었을 때의 대체 저장소 (image_hash 정확 일치 조회), 만료 시각이 지난 행은 조회하지 않음
+    """
+    
+    image_hash = models.CharField(
+        max_length=80,
+        unique=True,
+        verbose_name='이미지 해시'
+    )
+    result = models.JSONField(verbose_name='스캔 결과')
+    hit_count = models.PositiveIntegerField(default=0, verbose_name='재사용 횟수')
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True, verbose_name='만료 일시')
+    
+    class Meta:
+        verbose_name = '처방전 스캔 결과 캐시'
+        verbose_name_plural = '처방전 스캔 결과 캐시 목록'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.image_hash} ({self.hit_count}회 재사용)"
+
+
+class LLMCallLog(models.Model):
+    """
+    OpenAI 호출 기록 (core.llm_gateway를 거치는 모든 호출 1건당 1행)
+    기능별 지연 시간/토큰 사용량 리포트용, 프로세스 내 버퍼에서 일괄 저장
+    """
+    
+    class Outcome(models.TextChoices):
+        SUCCESS = 'success', '성공'
+        ERROR = 'error', '실패'
+        THROTTLED = 'throttled', '호출 한도 대기 초과'
+    
+    feature = models.CharField(max_length=40, verbose_name='기능')
+    model = models.CharField(max_length=60, verbose_name='모델')
+    prompt_tokens = models.PositiveIntegerField(default=0, verbose_name='입력 토큰')
+    completion_tokens = models.PositiveIntegerField(default=0, verbose_name='출력 토큰')
+    latency_ms = models.PositiveIntegerField(verbose_name='지연 시간(ms)')
+    wait_ms = models.PositiveIntegerField(default=0, verbose_name='한도 대기 시간(ms)')
+    retries = models.PositiveSmallIntegerField(default=0, verbose_name='재시도 횟수')
+    outcome = models.CharField(
+        max_length=10,
+        choices=Outcome.choices,
+        verbose_name='결과'
+    )
+    error_type = models.CharField(max_length=60, blank=True, verbose_name='오류 유형')
+    created_at = models.DateTimeField(default=timezone.now, db_index=True, verbose_name='호출 일시')
+    
+    class Meta:
+        verbose_name = 'LLM 호출 기록'
+        verbose_name_plural = 'LLM 호출 기록 목록'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['feature', 'created_at'], name='llmcall_feature_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.feature} {self.model} {self.latency_ms}ms ({self.get_outcome_display()})"
@@ -0,0 +1,327 @@
+"""
+Medications Name Index - medications.json 기반 프로세스 내 약품명 색인 (RAG 보정 우선 경로)
+OCR 약품명 대부분은 데이터의 약품명과 같거나 거의 같으므로, 확실한 경우 임베딩/Pinecone 없이 바로 보정
+
+- 정규화: 공백/기호/괄호 내용 제거, 용량 단위 통일(밀리그램·㎎ → mg 등), 제형 접미사(정/캡슐/서방정 등) 분리
+- 조회 순서: 정규화 완전 일치 → 기본명(용량/제형 제외) 일치 → 기본명 접두어 → 한글 자모 trigram 후보 + 편집 거리
+- 후보가 여러 개로 갈리거나 유사도가 낮으면 None (벡터 검색으로 넘김)
+- 색인은 medications.json에서 만들거나, build_medication_name_index 명령어로 미리 만든 파일(pickle)을 로드
+"""
+
+import json
+import logging
+import os
+import pickle
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+
+_UNIT_ALIASES = [
+    ('마이크로그램', 'mcg'), ('마이크로그람', 'mcg'), ('μg', 'mcg'), ('µg', 'mcg'), ('ug', 'mcg'),
+    ('밀리그램', 'mg'), ('밀리그람', 'mg'),
+    ('밀리리터', 'ml'),
+    ('그램', 'g'), ('그람', 'g'),
+    ('아이유', 'iu'),
+]
+_BRACKETS = re.compile(r'\(.*?\)|\[.*?\]')
+_INVALID_CHARS = re.compile(r'[^0-9a-z가-힣./%]')
+_DOSAGE = re.compile(r'(\d+(?:\.\d+)?(?:/\d+(?:\.\d+)?)*)(?:mcg|mg|ml|iu|g|%)')
+_TRAILING_NUMBER = re.compile(r'(\d+(?:\.\d+)?(?:/\d+(?:\.\d+)?)*)$')
+# 긴 접미사부터 제거
+_FORM_SUFFIXES = sorted([
+    '필름코팅정', '구강붕해정', '츄어블정', '서방정', '장용정', '발포정', '정',
+    '연질캡슐', '경질캡슐', '서방캡슐', '장용캡슐', '캡슐',
+    '건조시럽', '시럽', '현탁액', '과립', '크림', '연고', '패치',
+], key=len, reverse=True)
+
+
+def normalize_name(name):
+    """비교용 약품명 (소문자, 단위 통일, 괄호 내용/공백/기호 제거)"""
+    text = unicodedata.normalize('NFKC', name or '').lower()
+    text = _BRACKETS.sub('', text)
+    for alias, unit in _UNIT_ALIASES:
+        text = text.replace(alias, unit)
+    return _INVALID_CHARS.sub('', text)
+
+
+def split_name(normalized):
+    """
+    정규화 약품명을 (기본명, 용량) 으로 분리
+    예: '데팍신서방정25mg' → ('데팍신', ('25',))
+    """
+    dosage = tuple(_DOSAGE.findall(normalized))
+    base = _DOSAGE.sub('', normalized)
+    # 단위 없이 끝에 붙은 숫자도 용량으로 취급 (예: 타이레놀정500)
+    trailing = _TRAILING_NUMBER.search(base)
+    if trailing and trailing.start() > 0:
+        dosage += (trailing.group(1),)
+        base = base[:trailing.start()]
+    base = base.strip('./%')
+    
+    stripped = True
+    while stripped:
+        stripped = False
+        for suffix in _FORM_SUFFIXES:
+            if base.endswith(suffix) and len(base) > len(suffix):
+                base = base[:-len(suffix)]
+                stripped = True
+                break
+    return base, dosage
+
+
+def to_jamo(text):
+    """한글 음절을 초성/중성/종성 자모로 분해 (그 외 문자는 그대로)"""
+    chars = []
+    for char in text:
+        code = ord(char) - 0xAC00
+        if 0 <= code < 11172:
+            chars.append(chr(0x1100 + code // 588))
+            chars.append(chr(0x1161 + (code % 588) // 28))
+            if code % 28:
+                chars.append(chr(0x11A7 + code % 28))
+        else:
+            chars.append(char)
+    return ''.join(chars)
+
+
+def _trigrams(jamo):
+    padded = f"$${jamo}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, max_distance=None):
+    """레벤슈타인 거리 (max_distance를 넘으면 max_distance + 1 반환)"""
+    if len(a) < len(b):
+        a, b = b, a
+    if max_distance is not None and len(a) - len(b) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        if max_distance is not None and min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+class MedicationNameIndex:
+    """약품명 정규화/접두어/자모 유사도 색인"""
+    
+    def __init__(self, entries):
+        """
+        Args:
+            entries: [{'name', 'ingredient', 'manufacturer'}, ...] (medications.json 항목)
+        """
+        self.entries = [
+            {
+                'name': entry['name'],
+                'ingredient': entry.get('ingredient', ''),
+                'manufacturer': entry.get('manufacturer', ''),
+            }
+            for entry in entries if entry.get('name')
+        ]
+        self.by_full = defaultdict(list)
+        self.dosages = []
+        base_ids = {}
+        self.bases = []
+        self.base_entries = []
+        for entry_id, entry in enumerate(self.entries):
+            normalized = normalize_name(entry['name'])
+            base, dosage = split_name(normalized)
+            self.by_full[normalized].append(entry_id)
+            self.dosages.append(dosage)
+            if base not in base_ids:
+                base_ids[base] = len(self.bases)
+                self.bases.append(base)
+                self.base_entries.append([])
+            self.base_entries[base_ids[base]].append(entry_id)
+        self.by_full = dict(self.by_full)
+        self.base_ids = base_ids
+        self.sorted_bases = sorted(base_ids)
+        
+        trigram_postings = defaultdict(list)
+        self.base_jamo = []
+        for base_id, base in enumerate(self.bases):
+            jamo = to_jamo(base)
+            self.base_jamo.append(jamo)
+            for trigram in _trigrams(jamo):
+                trigram_postings[trigram].append(base_id)
+        self.trigram_postings = dict(trigram_postings)
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def _pick(self, entry_ids, dosage):
+        """후보 중 용량이 맞는 약품 1개 (약품명이 하나로 정해지지 않으면 None)"""
+        if dosage:
+            entry_ids = [entry_id for entry_id in entry_ids if self.dosages[entry_id] == dosage]
+        names = {self.entries[entry_id]['name'] for entry_id in entry_ids}
+        if len(names) != 1:
+            return None
+        return self.entries[entry_ids[0]]
+    
+    def _prefix_base(self, base):
+        """base로 시작하는 기본명이 정확히 1개면 반환"""
+        position = bisect_left(self.sorted_bases, base)
+        matches = []
+        for candidate in self.sorted_bases[position:position + 2]:
+            if candidate.startswith(base):
+                matches.append(candidate)
+        return matches[0] if len(matches) == 1 else None
+    
+    def _fuzzy_base(self, base, threshold, margin, candidate_limit):
+        """
+        자모 trigram 공유가 많은 기본명 후보를 편집 거리로 비교
+        
+        Returns:
+            (기본명, 유사도) 또는 None (임계값 미만이거나 1·2위 차이가 margin 미만)
+        """
+        jamo = to_jamo(base)
+        counts = Counter()
+        for trigram in _trigrams(jamo):
+            counts.update(self.trigram_postings.get(trigram, ()))
+        if not counts:
+            return None
+        
+        max_distance = int(len(jamo) * (1 - threshold)) + 1
+        scored = []
+        for base_id, _ in counts.most_common(candidate_limit):
+            candidate = self.base_jamo[base_id]
+            distance = edit_distance(jamo, candidate, max_distance)
+            if distance <= max_distance:
+                scored.append((1 - distance / max(len(jamo), len(candidate)), base_id))
+        if not scored:
+            return None
+        
+        scored.sort(reverse=True)
+        best_score, best_id = scored[0]
+        if best_score < threshold:
+            return None
+        if len(scored) > 1 and best_score - scored[1][0] < margin:
+            return None
+        return self.bases[best_id], best_score
+    
+    def match(self, raw_name, fuzzy_threshold=0.85, fuzzy_margin=0.05, prefix_min_length=3, candidate_limit=20):
+        """
+        OCR 약품명 로컬 보정
+        
+        Returns:
+            {'entry': 약품 항목, 'method': 'exact' | 'normalized' | 'prefix' | 'fuzzy', 'confidence': 점수}
+            확실한 후보가 없으면 None
+        """
+        normalized = normalize_name(raw_name)
+        if not normalized:
+            return None
+        
+        entry = self._pick(self.by_full.get(normalized, []), ())
+        if entry:
+            return {'entry': entry, 'method': 'exact', 'confidence': 1.0}
+        
+        base, dosage = split_name(normalized)
+        if not base:
+            return None
+        
+        if base in self.base_ids:
+            entry = self._pick(self.base_entries[self.base_ids[base]], dosage)
+            if entry:
+                return {'entry': entry, 'method': 'normalized', 'confidence': 0.98}
+            # 기본명은 같지만 용량/약품이 하나로 정해지지 않음: 유사 검색으로 좁힐 수 없으므로 벡터 검색으로
+            return None
+        
+        if len(base) >= prefix_min_length:
+            prefix_base = self._prefix_base(base)
+            if prefix_base:
+                entry = self._pick(self.base_entries[self.base_ids[prefix_base]], dosage)
+                if entry:
+                    return {'entry': entry, 'method': 'prefix', 'confidence': 0.9}
+        
+        fuzzy = self._fuzzy_base(base, fuzzy_threshold, fuzzy_margin, candidate_limit)
+        if fuzzy:
+            fuzzy_base, score = fuzzy
+            entry = self._pick(self.base_entries[self.base_ids[fuzzy_base]], dosage)
+            if entry:
+                return {'entry': entry, 'method': 'fuzzy', 'confidence': round(score, 3)}
+        return None
+    
+    def save(self, path):
+        """미리 만든 색인 파일 저장 (pickle)"""
+        with open(path, 'wb') as f:
+            pickle.dump({'version': INDEX_FORMAT_VERSION, 'index': self}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    
+    @classmethod
+    def load(cls, path):
+        """색인 파일 로드 (형식 버전이 다르면 None)"""
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+        if data.get('version') != INDEX_FORMAT_VERSION:
+            return None
+        return data['index']
+    
+    @classmethod
+    def from_json(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def _load_index():
+    config = settings.RAG_SETTINGS
+    index_path = config.get('NAME_INDEX_PATH')
+    data_path = config.get('NAME_DATA_PATH')
+    
+    # 미리 만든 색인이 원본 데이터보다 최신이면 사용
+    if index_path and os.path.exists(index_path) and (
+        not data_path or not os.path.exists(data_path)
+        or os.path.getmtime(index_path) >= os.path.getmtime(data_path)
+    ):
+        try:
+            index = MedicationNameIndex.load(index_path)
+            if index is not None:
+                return index
+        except Exception as e:
+            logger.warning(f"[Name Index] 색인 파일 로드 실패, 원본 데이터로 생성: {e}")
+    
+    if data_path and os.path.exists(data_path):
+        return MedicationNameIndex.from_json(data_path)
+    logger.warning("[Name Index] 약품 데이터 파일이 없어 로컬 약품명 보정을 사용하지 않습니다")
+    return MedicationNameIndex([])
+
+
+def get_name_index():
+    """프로세스 공용 약품명 색인 (최초 호출 시 로드)"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = _load_index()
+                logger.info(f"[Name Index] 약품명 {len(_index)}개 색인 로드")
+    return _index
+
+
+def match_medication_name(raw_name):
+    """설정값 기준 로컬 약품명 보정 (사용 안 함 설정이면 None)"""
+    config = settings.RAG_SETTINGS
+    if not config.get('NAME_INDEX_ENABLED', True):
+        return None
+    return get_name_index().match(
+        raw_name,
+        fuzzy_threshold=config.get('NAME_FUZZY_THRESHOLD', 0.85),
+        fuzzy_margin=config.get('NAME_FUZZY_MARGIN', 0.05),
+        prefix_min_length=config.get('NAME_PREFIX_MIN_LENGTH', 3),
+    )
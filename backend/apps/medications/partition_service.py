@@ -0,0 +1,346 @@
+"""
+Medications Partition Service - 복약 기록/비상 알림 테이블 월별 파티션 관리 (PostgreSQL)
+MedicationLog(scheduled_datetime), Alert(scheduled_at)를 현지 시간 기준 월 단위 RANGE 파티션으로 운영
+
+- 기존 테이블 변환: 마이그레이션에서 convert_to_partitioned 호출 (배치 복사, 역방향 convert_to_plain)
+- 미래 파티션 사전 생성 / 보관 기간이 지난 파티션 분리(DETACH) 및 삭제: maintain_partitions 태스크
+- 범위를 벗어난 행은 기본(default) 파티션에 저장되며, 해당 월 파티션 생성 시 이동
+"""
+
+import logging
+from datetime import date, datetime
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def get_partitioned_models():
+    """파티션 대상 (모델, 파티션 키 컬럼) 목록"""
+    from apps.alerts.models import Alert
+    from .models import MedicationLog
+    return [
+        (MedicationLog, 'scheduled_datetime'),
+        (Alert, 'scheduled_at'),
+    ]
+
+
+def add_months(month_start, months):
+    """월 시작일에 months개월 더하기"""
+    index = month_start.year * 12 + month_start.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_bound(month_start):
+    """월 시작일의 현지 00:00 (파티션 경계, timestamptz 리터럴)"""
+    return timezone.make_aware(datetime.combine(month_start, datetime.min.time())).isoformat()
+
+
+def partition_name(table, month_start):
+    return f"{table}_p{month_start:%Y%m}"
+
+
+def default_partition_name(table):
+    return f"{table}_default"
+
+
+def is_partitioned(table, using_connection=None):
+    """PostgreSQL 파티션 테이블 여부 (다른 DB에서는 항상 False)"""
+    conn = using_connection or connection
+    if conn.vendor != 'postgresql':
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT 1 FROM pg_partitioned_table pt
+            JOIN pg_class c ON c.oid = pt.partrelid
+            WHERE c.relname = %s AND pg_table_is_visible(c.oid)
+            """,
+            [table],
+        )
+        return cursor.fetchone() is not None
+
+
+def list_month_partitions(table):
+    """연결된 월 파티션 {월 시작일: 파티션 이름}"""
+    prefix = f"{table}_p"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_class p ON p.oid = i.inhparent
+            WHERE p.relname = %s AND pg_table_is_visible(p.oid)
+            """,
+            [table],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    
+    partitions = {}
+    for name in names:
+        suffix = name[len(prefix):]
+        if name.startswith(prefix) and len(suffix) == 6 and suffix.isdigit():
+            partitions[date(int(suffix[:4]), int(suffix[4:]), 1)] = name
+    return partitions
+
+
+def create_month_partition(table, column, month_start, cursor):
+    """
+    월 파티션 생성
+    기본 파티션에 해당 월의 행이 있으면 기본 파티션을 잠시 분리한 뒤 행을 옮기고 다시 연결
+    """
+    qn = connection.ops.quote_name
+    name = partition_name(table, month_start)
+    default_name = default_partition_name(table)
+    lower, upper = month_bound(month_start), month_bound(add_months(month_start, 1))
+    
+    cursor.execute(
+        f"SELECT 1 FROM {qn(default_name)} WHERE {qn(column)} >= %s AND {qn(column)} < %s LIMIT 1",
+        [lower, upper],
+    )
+    has_default_rows = cursor.fetchone() is not None
+    
+    if has_default_rows:
+        cursor.execute(f"ALTER TABLE {qn(table)} DETACH PARTITION {qn(default_name)}")
+    cursor.execute(
+        f"CREATE TABLE {qn(name)} PARTITION OF {qn(table)} FOR VALUES FROM (%s) TO (%s)",
+        [lower, upper],
+    )
+    if has_default_rows:
+        cursor.execute(
+            f"""
+            WITH moved AS (
+                DELETE FROM {qn(default_name)}
+                WHERE {qn(column)} >= %s AND {qn(column)} < %s
+                RETURNING *
+            )
+            INSERT INTO {qn(name)} SELECT * FROM moved
+            """,
+            [lower, upper],
+        )
+        cursor.execute(f"ALTER TABLE {qn(table)} ATTACH PARTITION {qn(default_name)} DEFAULT")
+    return name
+
+
+def _capture_indexes_and_constraints(cursor, table):
+    """
+    기본 키를 제외한 인덱스/유니크·외래 키 제약 정의 (테이블 재생성 후 같은 이름으로 복원)
+    카탈로그에서 읽으므로 나중 마이그레이션에서 추가된 인덱스/제약도 그대로 유지됨
+    """
+    cursor.execute(
+        """
+        SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i
+        WHERE i.indrelid = %s::regclass
+          AND NOT EXISTS (
+              SELECT 1 FROM pg_constraint c
+              WHERE c.conrelid = i.indrelid AND c.conindid = i.indexrelid
+          )
+        """,
+        [table],
+    )
+    # 파티션 부모의 인덱스 정의는 ON ONLY로 나오므로 일반 테이블/파티션 양쪽에 맞게 정리
+    statements = [row[0].replace(' ON ONLY ', ' ON ') for row in cursor.fetchall()]
+    
+    cursor.execute(
+        """
+        SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+        WHERE conrelid = %s::regclass AND contype IN ('u', 'f')
+        ORDER BY contype DESC, conname
+        """,
+        [table],
+    )
+    qn = connection.ops.quote_name
+    statements += [
+        f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(name)} {definition}"
+        for name, definition in cursor.fetchall()
+    ]
+    return statements
+
+
+def _rebuild_table(schema_editor, model, create_table, finish_table):
+    """
+    테이블 재생성 공통 절차 (마이그레이션용, PostgreSQL 전용)
+    
+    1. 인덱스/제약 정의 보관, 기존 테이블 이름 변경 후 create_table로 새 테이블 생성
+    2. 기본 키 구간별 배치 복사 (배치마다 커밋, 큰 테이블도 단일 트랜잭션으로 묶지 않음)
+    3. 기존 테이블 삭제 후 finish_table로 id 기본값/기본 키 설정, 인덱스/제약 복원
+    
+    2~3단계 실패 시 새 테이블을 삭제하고 기존 테이블 이름을 되돌린 뒤 예외를 다시 발생
+    (복사 중에는 원래 테이블 이름이 일부 데이터만 가리키므로 쓰기를 멈춘 상태에서 실행)
+    """
+    conn = schema_editor.connection
+    qn = schema_editor.quote_name
+    table = model._meta.db_table
+    legacy = f"{table}_legacy"
+    pk_column = model._meta.pk.column
+    batch_size = settings.MEDICATION_LOG_SETTINGS.get('PARTITION_COPY_BATCH_SIZE', 10000)
+    
+    with transaction.atomic(using=conn.alias), conn.cursor() as cursor:
+        statements = _capture_indexes_and_constraints(cursor, table)
+        cursor.execute(f"ALTER TABLE {qn(table)} RENAME TO {qn(legacy)}")
+        create_table(cursor, table, legacy)
+        cursor.execute(f"SELECT MIN({qn(pk_column)}), MAX({qn(pk_column)}) FROM {qn(legacy)}")
+        min_id, max_id = cursor.fetchone()
+    
+    try:
+        if max_id is not None:
+            for lower in range(min_id, max_id + 1, batch_size):
+                with transaction.atomic(using=conn.alias), conn.cursor() as cursor:
+                    cursor.execute(
+                        f"INSERT INTO {qn(table)} SELECT * FROM {qn(legacy)} "
+                        f"WHERE {qn(pk_column)} >= %s AND {qn(pk_column)} < %s",
+                        [lower, lower + batch_size],
+                    )
+        
+        with transaction.atomic(using=conn.alias), conn.cursor() as cursor:
+            cursor.execute(f"DROP TABLE {qn(legacy)}")
+            finish_table(cursor, table, pk_column, max_id or 0)
+            for sql in statements:
+                cursor.execute(sql)
+    except Exception:
+        with transaction.atomic(using=conn.alias), conn.cursor() as cursor:
+            cursor.execute(f"DROP TABLE {qn(table)}")
+            cursor.execute(f"ALTER TABLE {qn(legacy)} RENAME TO {qn(table)}")
+        logger.exception(f"[Partitions] {table} 변환 실패, 기존 테이블 복원")
+        raise
+    
+    logger.info(f"[Partitions] {table} 재생성 완료 (max id {max_id})")
+
+
+def convert_to_partitioned(schema_editor, model, column, months_ahead=3):
+    """
+    기존 테이블을 월별 RANGE 파티션 테이블로 변환 (마이그레이션용, PostgreSQL 전용)
+    
+    - 같은 컬럼 구성의 파티션 부모 테이블 + 기존 데이터 범위 ~ 이번 달 + months_ahead 월 파티션, 기본 파티션
+    - id 시퀀스, 기본 키 (id, 파티션 키), 인덱스/제약 재생성
+    
+    파티션 테이블의 기본 키/유니크 제약은 파티션 키를 포함해야 하므로,
+    이 테이블을 참조하는 외래 키는 사전에 db_constraint=False로 전환되어 있어야 함
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    if is_partitioned(model._meta.db_table, schema_editor.connection):
+        return
+    
+    qn = schema_editor.quote_name
+    
+    def create_table(cursor, table, legacy):
+        cursor.execute(
+            f"CREATE TABLE {qn(table)} (LIKE {qn(legacy)} INCLUDING CONSTRAINTS) "
+            f"PARTITION BY RANGE ({qn(column)})"
+        )
+        cursor.execute(
+            f"CREATE TABLE {qn(default_partition_name(table))} PARTITION OF {qn(table)} DEFAULT"
+        )
+        
+        # 기존 데이터 범위 ~ 미래 파티션
+        cursor.execute(f"SELECT MIN({qn(column)}) FROM {qn(legacy)}")
+        oldest = cursor.fetchone()[0]
+        current_month = timezone.localdate().replace(day=1)
+        month = timezone.localtime(oldest).date().replace(day=1) if oldest else current_month
+        month = min(month, current_month)
+        while month <= add_months(current_month, months_ahead):
+            cursor.execute(
+                f"CREATE TABLE {qn(partition_name(table, month))} PARTITION OF {qn(table)} "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [month_bound(month), month_bound(add_months(month, 1))],
+            )
+            month = add_months(month, 1)
+    
+    def finish_table(cursor, table, pk_column, max_id):
+        # IDENTITY 대신 시퀀스 기본값 (기존 최대 id 다음부터)
+        sequence = f"{table}_{pk_column}_seq"
+        cursor.execute(f"CREATE SEQUENCE {qn(sequence)} OWNED BY {qn(table)}.{qn(pk_column)}")
+        cursor.execute("SELECT setval(%s, %s, false)", [sequence, max_id + 1])
+        cursor.execute(
+            f"ALTER TABLE {qn(table)} ALTER COLUMN {qn(pk_column)} SET DEFAULT nextval(%s::regclass)",
+            [sequence],
+        )
+        cursor.execute(
+            f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(f'{table}_pkey')} "
+            f"PRIMARY KEY ({qn(pk_column)}, {qn(column)})"
+        )
+    
+    _rebuild_table(schema_editor, model, create_table, finish_table)
+
+
+def convert_to_plain(schema_editor, model):
+    """
+    파티션 테이블을 일반 테이블로 되돌림 (convert_to_partitioned 마이그레이션의 역방향)
+    기본 키는 id 단독, id는 IDENTITY 컬럼으로 복원
+    """
+    if not is_partitioned(model._meta.db_table, schema_editor.connection):
+        return
+    
+    qn = schema_editor.quote_name
+    
+    def create_table(cursor, table, legacy):
+        cursor.execute(f"CREATE TABLE {qn(table)} (LIKE {qn(legacy)} INCLUDING CONSTRAINTS)")
+    
+    def finish_table(cursor, table, pk_column, max_id):
+        cursor.execute(
+            f"ALTER TABLE {qn(table)} ALTER COLUMN {qn(pk_column)} ADD GENERATED BY DEFAULT AS IDENTITY"
+        )
+        cursor.execute(
+            "SELECT setval(pg_get_serial_sequence(%s, %s), %s, false)",
+            [table, pk_column, max_id + 1],
+        )
+        cursor.execute(
+            f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(f'{table}_pkey')} PRIMARY KEY ({qn(pk_column)})"
+        )
+    
+    _rebuild_table(schema_editor, model, create_table, finish_table)
+
+
+def maintain_partitions(months_ahead=None, retention_months=None, drop_detached=None):
+    """
+    파티션 유지보수 (Celery Beat에서 매일 실행)
+    - 이번 달 ~ months_ahead 개월 후까지 월 파티션 사전 생성
+    - retention_months가 지난 월 파티션 분리(DETACH), drop_detached이면 삭제
+    
+    Returns:
+        {테이블: {'created': [...], 'detached': [...], 'dropped': [...]}}
+    """
+    config = settings.MEDICATION_LOG_SETTINGS
+    if months_ahead is None:
+        months_ahead = config.get('PARTITION_MONTHS_AHEAD', 3)
+    if retention_months is None:
+        retention_months = config.get('PARTITION_RETENTION_MONTHS', 0)
+    if drop_detached is None:
+        drop_detached = config.get('PARTITION_DROP_DETACHED', False)
+    
+    qn = connection.ops.quote_name
+    current_month = timezone.localdate().replace(day=1)
+    results = {}
+    
+    for model, column in get_partitioned_models():
+        table = model._meta.db_table
+        if not is_partitioned(table):
+            continue
+        
+        result = {'created': [], 'detached': [], 'dropped': []}
+        partitions = list_month_partitions(table)
+        
+        with transaction.atomic(), connection.cursor() as cursor:
+            for offset in range(months_ahead + 1):
+                month = add_months(current_month, offset)
+                if month not in partitions:
+                    result['created'].append(create_month_partition(table, column, month, cursor))
+            
+            # 보관 기간 0이면 삭제하지 않음 (보관 기간 이후는 아카이브로 이전)
+            if retention_months:
+                cutoff = add_months(current_month, -retention_months)
+                for month, name in sorted(partitions.items()):
+                    if month >= cutoff:
+                        break
+                    cursor.execute(f"ALTER TABLE {qn(table)} DETACH PARTITION {qn(name)}")
+                    result['detached'].append(name)
+                    if drop_detached:
+                        cursor.execute(f"DROP TABLE {qn(name)}")
+                        result['dropped'].append(name)
+        
+        results[table] = result
+        logger.info(f"[Partitions] {table}: {result}")
+    
+    return results
@@ -1,38 +1,55 @@
 """
 Medication RAG Service
 약학정보원 데이터 기반 RAG를 활용한 약품명 보정 서비스
+
+처방전 1건의 약품명 보정(correct_medication_names)은 로컬 약품명 색인에서 먼저 찾고,
+나머지만 임베딩 요청 1회 + Pinecone 검색 동시 실행으로 약 개수와 관계없이 왕복 2회 수준의 지연 시간
 """
 
 import os
 import json
-import httpx
-import urllib3
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 from pathlib import Path
-
-# SSL 경고 비활성화
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
-from openai import OpenAI
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from core.llm_gateway import create_embedding
+from .embedding_cache import get_cached_embeddings
+from .name_index import get_name_index, match_medication_name
+from .vector_index import get_vector_index
 
 # Pinecone REST API 설정
 PINECONE_HOST = "https://medications-xbyhqv2.svc.aped-4627-b74a.pinecone.io"
 
+EMBEDDING_MODEL = "text-embedding-3-small"
+
 
 class MedicationRAGService:
     """약품명 RAG 보정 서비스"""
     
     def __init__(self):
-        # Windows SSL 권한 문제 해결을 위해 SSL 검증 비활성화
-        http_client = httpx.Client(verify=False)
-        self.openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'), http_client=http_client)
-        
         self.pinecone_api_key = os.getenv('PINECONE_API_KEY')
         self.pinecone_host = PINECONE_HOST
         
+        # Pinecone 요청용 연결 풀 (keep-alive 재사용, 동시 검색 수만큼 연결 유지)
+        pool_size = settings.RAG_SETTINGS.get('QUERY_CONCURRENCY', 8)
+        self.session = requests.Session()
+        # 기본은 인증서 검증, Windows 개발 환경에서만 PINECONE_VERIFY_SSL=False로 비활성화
+        self.session.verify = settings.RAG_SETTINGS.get('VERIFY_SSL', True)
+        self.session.headers.update({"Api-Key": self.pinecone_api_key or ''})
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        
+        # 로컬 약품명 색인 미리 로드 (첫 스캔 요청에서 색인 생성 시간이 걸리지 않도록)
+        if settings.RAG_SETTINGS.get('NAME_INDEX_ENABLED', True):
+            get_name_index()
+        
+        # 벡터 검색 방식: 'pinecone' (원격 REST) 또는 'local' (mmap 로컬 색인, vector_index)
+        self.vector_backend = settings.RAG_SETTINGS.get('VECTOR_BACKEND', 'pinecone')
+        if self.vector_backend == 'local':
+            self.index = get_vector_index()
         # Pinecone 연결 테스트 (REST API)
-        if self.pinecone_api_key:
+        elif self.pinecone_api_key:
             try:
                 self._test_pinecone_connection()
                 self.index = True  # 연결 성공 표시
@@ -46,33 +63,35 @@ class MedicationRAGService:
     def _test_pinecone_connection(self):
         """Pinecone 연결 테스트"""
         url = f"{self.pinecone_host}/describe_index_stats"
-        headers = {"Api-Key": self.pinecone_api_key}
-        response = requests.get(url, headers=headers, verify=False, timeout=10)
+        response = self.session.get(url, timeout=10)
         response.raise_for_status()
     
     def _query_pinecone(self, vector: list, top_k: int = 1) -> dict:
         """Pinecone 벡터 검색 (REST API 직접 호출)"""
         url = f"{self.pinecone_host}/query"
-        headers = {
-            "Api-Key": self.pinecone_api_key,
-            "Content-Type": "application/json"
-        }
         payload = {
             "vector": vector,
             "topK": top_k,
             "includeMetadata": True
         }
-        response = requests.post(url, json=payload, headers=headers, verify=False, timeout=30)
+        response = self.session.post(url, json=payload, timeout=settings.RAG_SETTINGS.get('QUERY_TIMEOUT_SECONDS', 10))
         response.raise_for_status()
         return response.json()
     
     def get_embedding(self, text: str) -> list[float]:
         """텍스트 임베딩 생성"""
-        response = self.openai_client.embeddings.create(
-            model="text-embedding-3-small",
-            input=text
-        )
-        return response.data[0].embedding
+        return self.get_embeddings([text])[0]
+    
+    def get_embeddings(self, texts: list[str], use_cache: bool = True) -> list[list[float]]:
+        """
+        여러 텍스트 임베딩 (캐시에 없는 텍스트만 요청 1회로 생성, 입력 순서대로 반환)
+        use_cache=False: 캐시를 거치지 않고 전체 생성 (색인 생성처럼 다시 조회하지 않는 대량 요청)
+        """
+        return get_cached_embeddings(texts, EMBEDDING_MODEL, self._create_embeddings, use_cache=use_cache)
+    
+    def _create_embeddings(self, texts: list[str]) -> list[list[float]]:
+        response = create_embedding('rag_embedding', EMBEDDING_MODEL, texts)
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
     
     def correct_medication_name(self, raw_name: str, threshold: float = 0.7) -> dict:
         """
@@ -90,81 +109,169 @@ class MedicationRAGService:
                 'matched': 매칭 성공 여부
             }
         """
+        return self.correct_medication_names([raw_name], threshold)[0]
+    
+    def correct_medication_names(self, raw_names: list[str], threshold: float = 0.7) -> list[dict]:
+        """
+        OCR로 인식된 약품명 여러 개를 한 번에 보정
+        로컬 약품명 색인(name_index)에서 확실히 일치하면 바로 반환하고,
+        나머지 이름만 한 번씩 임베딩(요청 1회)하여 Pinecone 검색을 동시에 실행
+        
+        Args:
+            raw_names: OCR로 인식된 약품명 목록
+            threshold: 유사도 임계값 (기본 0.7)
+            
+        Returns:
+            raw_names 순서대로 correct_medication_name과 같은 형식의 결과 목록
+        """
+        if not raw_names:
+            return []
+        
+        unique_names = list(dict.fromkeys(raw_names))
+        # 로컬 약품명 색인에서 확실히 일치하는 이름은 임베딩/Pinecone 없이 보정
+        corrections = {}
+        for raw_name in unique_names:
+            correction = self._correct_with_name_index(raw_name)
+            if correction:
+                corrections[raw_name] = correction
+        remaining = [raw_name for raw_name in unique_names if raw_name not in corrections]
+        corrections.update(self._correct_with_vectors(remaining, threshold))
+        return [dict(corrections[raw_name]) for raw_name in raw_names]
+    
+    def _correct_with_name_index(self, raw_name: str) -> Optional[dict]:
+        try:
+            local = match_medication_name(raw_name)
+        except Exception as e:
+            print(f"로컬 약품명 색인 오류: {e}")
+            return None
+        if not local:
+            return None
+        entry = local['entry']
+        print(f"[RAG] '{raw_name}' → '{entry['name']}' (로컬 {local['method']}: {local['confidence']:.3f}) ✅")
+        return {
+            'original': raw_name,
+            'corrected': entry['name'],
+            'ingredient': entry['ingredient'],
+            'manufacturer': entry['manufacturer'],
+            'confidence': local['confidence'],
+            'matched': True,
+            'method': local['method'],
+        }
+    
+    def _correct_with_vectors(self, raw_names: list[str], threshold: float) -> dict:
+        """임베딩 요청 1회 + 벡터 검색(로컬 색인 행렬 곱 1회 또는 Pinecone 동시 검색)으로 보정 ({원본 이름: 결과})"""
+        if not raw_names:
+            return {}
+        if self.vector_backend == 'local':
+            return self._correct_with_local_index(raw_names, threshold)
         if not self.index:
             return {
-                'original': raw_name,
-                'corrected': raw_name,
-                'confidence': 0,
-                'matched': False,
-                'error': 'Pinecone 인덱스가 설정되지 않았습니다.'
+                raw_name: self._unmatched(raw_name, error='Pinecone 인덱스가 설정되지 않았습니다.')
+                for raw_name in raw_names
             }
         
         try:
-            # 약품명 임베딩 생성
-            query_embedding = self.get_embedding(raw_name)
-            
+            embeddings = self.get_embeddings(raw_names)
+        except Exception as e:
+            print(f"RAG 임베딩 오류: {e}")
+            return {raw_name: self._unmatched(raw_name, error=str(e)) for raw_name in raw_names}
+        
+        concurrency = min(len(raw_names), settings.RAG_SETTINGS.get('QUERY_CONCURRENCY', 8))
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = executor.map(
+                lambda args: self._correct_with_embedding(*args, threshold),
+                zip(raw_names, embeddings),
+            )
+            return dict(zip(raw_names, results))
+    
+    def _correct_with_local_index(self, raw_names: list[str], threshold: float) -> dict:
+        index = get_vector_index()
+        if index is None:
+            error = '로컬 벡터 색인이 없습니다.'
+        elif index.model != EMBEDDING_MODEL:
+            error = f'로컬 벡터 색인 모델({index.model})이 질의 모델과 다릅니다.'
+        else:
+            error = None
+        if error:
+            return {raw_name: self._unmatched(raw_name, error=error) for raw_name in raw_names}
+        
+        # 앞쪽 차원만 저장한 색인은 유사도 분포가 달라지므로 별도 임계값 사용 (설정 시)
+        local_threshold = settings.RAG_SETTINGS.get('VECTOR_INDEX_THRESHOLD')
+        if local_threshold is not None:
+            threshold = local_threshold
+        
+        try:
+            embeddings = self.get_embeddings(raw_names)
+            matches = index.search(embeddings, top_k=1)
+        except Exception as e:
+            print(f"RAG 검색 오류: {e}")
+            return {raw_name: self._unmatched(raw_name, error=str(e)) for raw_name in raw_names}
+        return {
+            raw_name: self._judge_match(raw_name, raw_matches, threshold)
+            for raw_name, raw_matches in zip(raw_names, matches)
+        }
+    
+    def _unmatched(self, raw_name: str, confidence: float = 0, error: Optional[str] = None) -> dict:
+        result = {
+            'original': raw_name,
+            'corrected': raw_name,
+            'confidence': confidence,
+            'matched': False
+        }
+        if error:
+            result['error'] = error
+        return result
+    
+    def _correct_with_embedding(self, raw_name: str, query_embedding: list[float], threshold: float) -> dict:
+        """임베딩으로 Pinecone 검색 후 보정 결과 판정"""
+        try:
             # 유사도 검색 (REST API 직접 호출)
             results = self._query_pinecone(query_embedding, top_k=1)
+        except Exception as e:
+            print(f"RAG 검색 오류: {e}")
+            return self._unmatched(raw_name, error=str(e))
+        return self._judge_match(raw_name, results.get('matches', []), threshold)
+    
+    def _judge_match(self, raw_name: str, matches: list[dict], threshold: float) -> dict:
+        """벡터 검색 최상위 결과로 보정 여부 판정"""
+        best_match = matches[0] if matches else None
+        
+        if best_match:
+            metadata = best_match.get('metadata', {})
+            score = best_match.get('score', 0)
+            matched_name = metadata.get('name', '')
             
-            matches = results.get('matches', [])
-            best_match = matches[0] if matches else None
-            
-            if best_match:
-                metadata = best_match.get('metadata', {})
-                score = best_match.get('score', 0)
-                matched_name = metadata.get('name', '')
-                
-                # 1. 유사도가 임계값 이상인 경우 (일반적인 RAG 매칭)
-                if score >= threshold:
-                    print(f"[RAG] '{raw_name}' → '{matched_name}' (유사도: {score:.3f}) ✅")
-                    return {
-                        'original': raw_name,
-                        'corrected': matched_name,
-                        'ingredient': metadata.get('ingredient', ''),
-                        'manufacturer': metadata.get('manufacturer', ''),
-                        'confidence': score,
-                        'matched': True
-                    }
-                
-                # 2. 유사도는 낮지만 문자열이 완전히 일치하는 경우 (임베딩Context 차이에 의한 유사도 저하 대응)
-                if raw_name.replace(' ', '') == matched_name.replace(' ', ''):
-                    print(f"[RAG] '{raw_name}' → '{matched_name}' (문자열 완전 일치로 강제 매칭) ✅")
-                    return {
-                        'original': raw_name,
-                        'corrected': matched_name,
-                        'ingredient': metadata.get('ingredient', ''),
-                        'manufacturer': metadata.get('manufacturer', ''),
-                        'confidence': 1.0,  # 완전 일치이므로 점수 1.0 부여
-                        'matched': True
-                    }
-                
-                # 3. 매칭 실패
-                closest = matched_name if matched_name else 'N/A'
-                print(f"[RAG] '{raw_name}' → 매칭 실패 (가장 가까운: '{closest}', 유사도: {score:.3f}, 임계값: {threshold}) ❌")
+            # 1. 유사도가 임계값 이상인 경우 (일반적인 RAG 매칭)
+            if score >= threshold:
+                print(f"[RAG] '{raw_name}' → '{matched_name}' (유사도: {score:.3f}) ✅")
                 return {
                     'original': raw_name,
-                    'corrected': raw_name,
+                    'corrected': matched_name,
+                    'ingredient': metadata.get('ingredient', ''),
+                    'manufacturer': metadata.get('manufacturer', ''),
                     'confidence': score,
-                    'matched': False
+                    'matched': True
                 }
-            else:
-                print(f"[RAG] '{raw_name}' → 검색 결과 없음 ❌")
+            
+            # 2. 유사도는 낮지만 문자열이 완전히 일치하는 경우 (임베딩Context 차이에 의한 유사도 저하 대응)
+            if raw_name.replace(' ', '') == matched_name.replace(' ', ''):
+                print(f"[RAG] '{raw_name}' → '{matched_name}' (문자열 완전 일치로 강제 매칭) ✅")
                 return {
                     'original': raw_name,
-                    'corrected': raw_name,
-                    'confidence': 0,
-                    'matched': False
+                    'corrected': matched_name,
+                    'ingredient': metadata.get('ingredient', ''),
+                    'manufacturer': metadata.get('manufacturer', ''),
+                    'confidence': 1.0,  # 완전 일치이므로 점수 1.0 부여
+                    'matched': True
                 }
-                
-        except Exception as e:
-            print(f"RAG 검색 오류: {e}")
-            return {
-                'original': raw_name,
-                'corrected': raw_name,
-                'confidence': 0,
-                'matched': False,
-                'error': str(e)
-            }
+            
+            # 3. 매칭 실패
+            closest = matched_name if matched_name else 'N/A'
+            print(f"[RAG] '{raw_name}' → 매칭 실패 (가장 가까운: '{closest}', 유사도: {score:.3f}, 임계값: {threshold}) ❌")
+            return self._unmatched(raw_name, confidence=score)
+        else:
+            print(f"[RAG] '{raw_name}' → 검색 결과 없음 ❌")
+            return self._unmatched(raw_name)
     
     def upload_medications_to_pinecone(self, data_path: Optional[str] = None) -> dict:
         """
@@ -176,6 +283,14 @@ class MedicationRAGService:
         Returns:
             업로드 결과
         """
+        if self.vector_backend == 'local':
+            # 로컬 색인(LocalVectorIndex)은 읽기 전용 mmap 파일이므로 upsert 불가
+            return {
+                'success': False,
+                'error': "VECTOR_BACKEND='local'에서는 Pinecone 업로드를 사용할 수 없습니다. "
+                         "python manage.py build_medication_vector_index로 로컬 색인을 생성하세요.",
+            }
+        
         if not self.index:
             return {'success': False, 'error': 'Pinecone 인덱스가 설정되지 않았습니다.'}
         
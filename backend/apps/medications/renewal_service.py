@@ -0,0 +1,152 @@
+"""
+Medications Renewal Service - 처방 갱신(병원 재방문) 일괄 반영
+빠진 약 비활성화 + 계속 복용하는 약 기간 갱신을 하나의 트랜잭션에서 처리
+
+약별 조회/저장/로그 삭제/일자별 생성 대신,
+앞으로의 복용 예정을 (스케줄, 예정 일시) 집합으로 비교하여 삭제/추가할 로그만 일괄 반영
+"""
+
+import logging
+from django.db import transaction
+from django.utils import timezone
+from .models import Medication, MedicationLog, MedicationSchedule
+from .log_service import (
+    build_medication_logs,
+    get_local_day_range,
+    get_materialized_until,
+    notify_logs_changed,
+    schedule_today_alerts,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def apply_prescription_renewal(user, deactivate_ids=(), renewals=()):
+    """
+    처방 변경 일괄 반영
+    
+    1. 대상 약을 잠금 조회 1회 후 비활성화/기간 갱신을 UPDATE로 일괄 저장
+    2. 현재 이후 pending 로그 중 새 처방에 없는 예정은 삭제, 새 처방에만 있는 예정은 추가
+       (이미 복용/미복용 처리된 로그와 지난 예정은 유지)
+    3. 삭제되는 로그의 비상 알림은 한 번에 삭제
+    4. 커밋 후 오늘 추가된 복용 예정만 비상 알림 계획, 사용자 캘린더/건강 프로필 갱신 1회
+    
+    Args:
+        user: 복약자
+        deactivate_ids: 비활성화할 약 ID 목록 (int, 뷰에서 시리얼라이저로 검증)
+        renewals: [{'id': 약 ID, 'start_date': date | None, 'days_supply': 양의 정수 | None}, ...]
+    
+    Returns:
+        {'deactivated': 비활성화한 약 수, 'renewed': 갱신한 약 수,
+         'deleted_logs': 삭제한 로그 수, 'created_logs': 추가한 로그 수}
+    """
+    from apps.alerts.models import Alert
+    
+    deactivate_ids = set(deactivate_ids)
+    renewals = {item['id']: item for item in renewals if item['id'] not in deactivate_ids}
+    now = timezone.now()
+    today = timezone.localdate()
+    today_start, _ = get_local_day_range(today)
+    
+    with transaction.atomic():
+        # 기본 정렬(group)의 외부 조인은 잠글 수 없으므로 id순 (잠금 순서 고정으로 교착 방지)
+        medications = {
+            med.id: med
+            for med in Medication.objects.select_for_update().filter(
+                user=user, id__in=deactivate_ids | renewals.keys()
+            ).order_by('id').prefetch_related('schedules')
+        }
+        deactivated = [
+            med_id for med_id in deactivate_ids
+            if med_id in medications and medications[med_id].is_active
+        ]
+        renewed = []
+        for med_id, item in renewals.items():
+            med = medications.get(med_id)
+            if med is None:
+                continue
+            if item.get('start_date'):
+                med.start_date = item['start_date']
+            if item.get('days_supply'):
+                med.days_supply = item['days_supply']
+            med.updated_at = now
+            renewed.append(med)
+        
+        if deactivated:
+            Medication.objects.filter(id__in=deactivated).update(is_active=False, updated_at=now)
+            MedicationSchedule.objects.filter(medication_id__in=deactivated).update(is_active=False)
+        if renewed:
+            Medication.objects.bulk_update(renewed, ['start_date', 'days_supply', 'updated_at'])
+        
+        # 새 처방 기준 오늘 이후 복용 예정 (비활성화한 약은 없음)
+        schedule_ids = [
+            schedule.id for med_id in deactivated + [med.id for med in renewed]
+            for schedule in medications[med_id].schedules.all()
+        ]
+        until_date = get_materialized_until()
+        desired = {
+            (log.schedule_id, log.scheduled_datetime): log
+            for med in renewed
+            for log in build_medication_logs(med, from_date=today, until_date=until_date)
+        }
+        
+        # 오늘 00:00 이후 기존 로그 (파티션 키 범위 조건으로 최근 파티션만 조회)
+        existing = list(MedicationLog.objects.filter(
+            schedule_id__in=schedule_ids,
+            scheduled_datetime__gte=today_start,
+        ).values_list('id', 'schedule_id', 'scheduled_datetime', 'status'))
+        existing_keys = {(schedule_id, scheduled) for _, schedule_id, scheduled, _ in existing}
+        
+        removed = [
+            (log_id, schedule_id, scheduled)
+            for log_id, schedule_id, scheduled, log_status in existing
+            if log_status == MedicationLog.Status.PENDING
+            and scheduled >= now
+            and (schedule_id, scheduled) not in desired
+        ]
+        added = [log for key, log in desired.items() if key not in existing_keys]
+        
+        removed_ids = [log_id for log_id, _, _ in removed]
+        if removed_ids:
+            # 외래 키 제약이 없으므로 알림을 먼저 일괄 삭제 (로그 삭제 시 CASCADE 조회 대상 없음)
+            Alert.objects.filter(medication_log_id__in=removed_ids).delete()
+            MedicationLog.objects.filter(
+                id__in=removed_ids, scheduled_datetime__gte=today_start
+            ).delete()
+        if added:
+            MedicationLog.objects.bulk_create(added, batch_size=1000, ignore_conflicts=True)
+        
+        notify_logs_changed(
+            [(user.id, scheduled) for _, _, scheduled in removed]
+            + [(user.id, log.scheduled_datetime) for log in added]
+        )
+        
+        today_schedule_ids = {
+            log.schedule_id for log in added
+            if timezone.localtime(log.scheduled_datetime).date() == today
+        }
+        if today_schedule_ids:
+            transaction.on_commit(lambda: schedule_today_alerts(today_schedule_ids))
+        if deactivated or renewed:
+            # 일괄 UPDATE는 시그널이 발생하지 않으므로 약 변경 후처리를 사용자 단위로 1회 실행
+            transaction.on_commit(lambda: _medications_changed(user.id))
+    
+    result = {
+        'deactivated': len(deactivated),
+        'renewed': len(renewed),
+        'deleted_logs': len(removed),
+        'created_logs': len(added),
+    }
+    logger.info(f"[Renewal] 사용자 {user.id} 처방 갱신: {result}")
+    return result
+
+
+def _medications_changed(user_id):
+    """사용자 캘린더 캐시 무효화 및 건강 프로필 재분석 트리거 (커밋 후 호출)"""
+    from .calendar_service import invalidate_user_calendar
+    invalidate_user_calendar(user_id)
+    try:
+        from apps.health.tasks import refresh_user_health_profile
+        refresh_user_health_profile.delay(user_id)
+    except Exception as e:
+        logger.error(f"[Renewal] 건강 프로필 재분석 트리거 실패: {e}")
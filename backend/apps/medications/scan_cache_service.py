@@ -0,0 +1,138 @@
+"""
+Medications Scan Cache Service - 처방전 스캔 결과 캐시
+정규화 이미지(Vision 전송 바이트)의 내용 해시(sha256)로 OCR + RAG 보정 결과를 재사용
+
+- 조회 순서: Redis 정확 일치 → DB 정확 일치 → 계산
+- 유사 이미지 일치는 사용하지 않음 (다른 사용자의 비슷한 처방전 결과가 섞이지 않도록 같은 이미지만 재사용)
+- 같은 이미지의 동시 스캔은 잠금(cache.add)을 얻은 요청 1개만 계산하고 나머지는 결과를 기다림
+- 성공한 결과만 저장 (실패는 재시도 시 다시 계산)
+"""
+
+import hashlib
+import logging
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+from .models import ScanResultCache
+
+logger = logging.getLogger(__name__)
+
+
+def _config():
+    return settings.SCAN_RESULT_CACHE_SETTINGS
+
+
+def _digest(image_hash):
+    # 파이프라인(프롬프트, 전처리) 버전이 바뀌면 이전 결과를 사용하지 않음
+    return hashlib.sha256(f"{_config().get('VERSION', 1)}:{image_hash}".encode()).hexdigest()
+
+
+def _result_key(digest):
+    return f"medications:scan_result:{digest}"
+
+
+def _lock_key(digest):
+    return f"medications:scan_result:{digest}:lock"
+
+
+def get_cached_scan(image_hash, use_db=True):
+    """
+    캐시된 스캔 결과 조회 (DB에서 찾으면 Redis에 다시 적재)
+    
+    Returns:
+        스캔 결과 dict 또는 None
+    """
+    digest = _digest(image_hash)
+    entry = cache.get(_result_key(digest))
+    if entry is None and use_db:
+        row = ScanResultCache.objects.filter(
+            image_hash=digest,
+            expires_at__gt=timezone.now(),
+        ).values_list('result', 'expires_at').first()
+        if row:
+            result, expires_at = row
+            entry = {'digest': digest, 'result': result}
+            ttl = int((expires_at - timezone.now()).total_seconds())
+            if ttl > 0:
+                cache.set(_result_key(digest), entry, ttl)
+    
+    if entry is None:
+        return None
+    ScanResultCache.objects.filter(image_hash=entry['digest']).update(hit_count=F('hit_count') + 1)
+    return entry['result']
+
+
+def store_scan_result(image_hash, result):
+    """성공한 스캔 결과를 Redis와 DB에 TTL로 저장"""
+    ttl = _config().get('TTL_SECONDS', 7 * 24 * 3600)
+    digest = _digest(image_hash)
+    cache.set(_result_key(digest), {'digest': digest, 'result': result}, ttl)
+    ScanResultCache.objects.update_or_create(
+        image_hash=digest,
+        defaults={
+            'result': result,
+            'expires_at': timezone.now() + timedelta(seconds=ttl),
+        },
+    )
+
+
+def get_or_compute_scan(image_hash, compute):
+    """
+    캐시된 결과가 있으면 반환, 없으면 계산 후 저장 (같은 이미지의 동시 계산은 1회)
+    
+    Args:
+        image_hash: 정규화 이미지 내용 해시 (없으면 캐시 없이 계산)
+        compute: 스캔 결과 dict를 반환하는 함수
+    
+    Returns:
+        (스캔 결과 dict, 캐시 사용 여부)
+    """
+    if not image_hash or not _config().get('ENABLED', True):
+        return compute(), False
+    
+    cached = get_cached_scan(image_hash)
+    if cached is not None:
+        return cached, True
+    
+    lock_key = _lock_key(_digest(image_hash))
+    lock_timeout = _config().get('LOCK_TIMEOUT_SECONDS', 120)
+    if not cache.add(lock_key, 1, lock_timeout):
+        # 다른 요청이 같은 이미지를 계산 중: 결과가 저장되거나 잠금이 풀릴 때까지 대기
+        interval = _config().get('WAIT_INTERVAL_SECONDS', 0.5)
+        deadline = time.monotonic() + lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(interval)
+            cached = get_cached_scan(image_hash, use_db=False)
+            if cached is not None:
+                return cached, True
+            if cache.get(lock_key) is None:
+                break
+        logger.info(f"[Scan Cache] 진행 중인 계산 결과 없음, 직접 계산: {image_hash[:12]}")
+        cached = get_cached_scan(image_hash)
+        if cached is not None:
+            return cached, True
+        return _compute_and_store(image_hash, compute), False
+    
+    try:
+        return _compute_and_store(image_hash, compute), False
+    finally:
+        cache.delete(lock_key)
+
+
+def _compute_and_store(image_hash, compute):
+    result = compute()
+    if result.get('success'):
+        try:
+            store_scan_result(image_hash, result)
+        except Exception as e:
+            logger.error(f"[Scan Cache] 결과 저장 실패: {e}")
+    return result
+
+
+def purge_expired_scan_results():
+    """만료된 DB 캐시 행 삭제"""
+    deleted, _ = ScanResultCache.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
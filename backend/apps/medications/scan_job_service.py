@@ -0,0 +1,129 @@
+"""
+Medications Scan Job Service - 처방전 OCR 스캔 비동기 작업 상태 관리
+요청 스레드는 작업 등록 후 즉시 응답하고, 전용 큐(ocr)의 Celery 워커가 OCR 처리
+
+- 작업 상태(단계, 진행률, 결과)와 업로드 이미지는 캐시(Redis)에 TTL로 저장
+- 상태 조회는 대기 없이 즉시 응답하고 클라이언트가 간격을 늘려가며 재조회 (웹 워커 스레드 점유 방지)
+- 상태가 바뀔 때마다 version을 올려 클라이언트가 변경 여부 확인
+"""
+
+import base64
+import binascii
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+
+class ScanJobStatus:
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    
+    FINISHED = (COMPLETED, FAILED)
+
+
+# 처리 단계별 진행률 (%)
+SCAN_STAGES = {
+    'queued': 0,
+    'decoding': 5,
+    'preprocessing': 15,
+    'vision': 30,
+    'correcting': 80,
+    'done': 100,
+}
+
+
+def _state_key(job_id):
+    return f"medications:scan_job:{job_id}"
+
+
+def _image_key(job_id):
+    return f"medications:scan_job:{job_id}:image"
+
+
+def _config():
+    return settings.SCAN_JOB_SETTINGS
+
+
+def create_scan_job(user_id, image_base64):
+    """
+    스캔 작업 등록 후 OCR 태스크를 전용 큐에 발행
+    
+    Args:
+        user_id: 요청 사용자 ID
+        image_base64: Base64 인코딩된 처방전 이미지
+    
+    Returns:
+        작업 상태 dict (job_id 포함)
+    
+    Raises:
+        ValueError: Base64 디코딩 실패 또는 이미지 크기 초과
+    """
+    try:
+        image_content = base64.b64decode(image_base64, validate=False)
+    except (binascii.Error, ValueError):
+        raise ValueError('이미지 데이터를 디코딩할 수 없습니다.')
+    if not image_content:
+        raise ValueError('이미지 데이터가 비어있습니다.')
+    if len(image_content) > _config().get('MAX_IMAGE_BYTES', 15 * 1024 * 1024):
+        raise ValueError('이미지 크기가 너무 큽니다.')
+    
+    job_id = uuid.uuid4().hex
+    state = {
+        'job_id': job_id,
+        'user_id': user_id,
+        'status': ScanJobStatus.QUEUED,
+        'stage': 'queued',
+        'progress': SCAN_STAGES['queued'],
+        'version': 1,
+        'result': None,
+        'error': None,
+        'created_at': timezone.now().isoformat(),
+        'updated_at': timezone.now().isoformat(),
+    }
+    # 브로커 메시지에 이미지를 싣지 않도록 원본 바이트는 캐시에 저장하고 작업 ID만 전달
+    cache.set(_image_key(job_id), image_content, _config().get('IMAGE_TTL_SECONDS', 600))
+    cache.set(_state_key(job_id), state, _config().get('RESULT_TTL_SECONDS', 3600))
+    
+    from .tasks import process_scan_job
+    process_scan_job.delay(job_id)
+    return get_scan_job(job_id) or state
+
+
+def get_scan_job(job_id):
+    """작업 상태 조회 (만료/없음이면 None)"""
+    return cache.get(_state_key(job_id))
+
+
+def get_scan_image(job_id):
+    """워커에서 처리할 이미지 바이트 조회 (재전달 시 다시 처리할 수 있도록 삭제하지 않음)"""
+    return cache.get(_image_key(job_id))
+
+
+def delete_scan_image(job_id):
+    """작업이 완료/실패로 끝난 뒤 업로드 이미지 삭제"""
+    cache.delete(_image_key(job_id))
+
+
+def update_scan_job(job_id, **fields):
+    """
+    작업 상태 갱신 (단계 지정 시 진행률 자동 설정, version 증가)
+    작업을 수행하는 워커만 갱신하므로 읽기-수정-쓰기로 충분
+    """
+    state = get_scan_job(job_id)
+    if state is None:
+        return None
+    if 'stage' in fields and 'progress' not in fields:
+        fields['progress'] = SCAN_STAGES.get(fields['stage'], state['progress'])
+    state.update(fields)
+    state['version'] += 1
+    state['updated_at'] = timezone.now().isoformat()
+    cache.set(_state_key(job_id), state, _config().get('RESULT_TTL_SECONDS', 3600))
+    return state
+
+
+def public_scan_job(state):
+    """클라이언트 응답용 작업 상태 (내부 필드 제외)"""
+    return {key: value for key, value in state.items() if key != 'user_id'}
@@ -68,8 +68,9 @@ class MedicationSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at', 'end_date']
     
     def create(self, validated_data):
-        from datetime import datetime
+        from django.db import transaction
         from django.utils import timezone
+        from .log_service import materialize_medication_logs
         
         schedules_data = validated_data.pop('schedules_input', [])
         group_id = validated_data.pop('group_id', None)
@@ -87,44 +88,21 @@ class MedicationSerializer(serializers.ModelSerializer):
             except MedicationGroup.DoesNotExist:
                 pass
         
-        medication = super().create(validated_data)
-        
-        # 스케줄 생성 + 처방 기간 동안의 로그 자동 생성
-        from datetime import timedelta
-        
-        start_date = medication.start_date or timezone.localdate()
-        # end_date 계산 (days_supply가 있으면 사용, 없으면 30일 기본)
-        days_supply = medication.days_supply or 30
-        end_date = start_date + timedelta(days=days_supply)
-        today = timezone.localdate()
-        
-        for schedule_data in schedules_data:
-            schedule = MedicationSchedule.objects.create(
-                medication=medication,
-                time_of_day=schedule_data['time_of_day'],
-                scheduled_time=schedule_data['scheduled_time']
-            )
+        with transaction.atomic():
+            medication = super().create(validated_data)
             
-            # start_date부터 end_date까지 모든 날짜의 MedicationLog 생성
-            current_date = start_date
-            while current_date < end_date:
-                scheduled_datetime = timezone.make_aware(
-                    datetime.combine(current_date, schedule_data['scheduled_time'])
-                )
-                log = MedicationLog.objects.create(
-                    schedule=schedule,
-                    scheduled_datetime=scheduled_datetime,
-                    status=MedicationLog.Status.PENDING
+            # 스케줄 생성
+            MedicationSchedule.objects.bulk_create([
+                MedicationSchedule(
+                    medication=medication,
+                    time_of_day=schedule_data['time_of_day'],
+                    scheduled_time=schedule_data['scheduled_time']
                 )
-                
-                # 오늘 날짜의 로그는 즉시 알림 예약 (00:05 스케줄러를 기다리지 않음)
-                if current_date == today:
-                    try:
-                        from apps.alerts.tasks import schedule_medication_alert
-                        schedule_medication_alert.delay(log.id)
-                    except Exception:
-                        pass
-                current_date += timedelta(days=1)
+                for schedule_data in schedules_data
+            ])
+            
+            # 처방 기간 동안의 로그 일괄 생성 (오늘 로그는 커밋 후 알림 계획)
+            materialize_medication_logs([medication])
         
         # 건강 프로필 자동 분석 (질병 추론 + YouTube 검색)
         try:
@@ -146,6 +124,7 @@ class MedicationLogSerializer(serializers.ModelSerializer):
     group_name = serializers.CharField(source='schedule.medication.group.name', read_only=True, allow_null=True)
     time_of_day = serializers.CharField(source='schedule.time_of_day', read_only=True)
     time_of_day_display = serializers.CharField(source='schedule.get_time_of_day_display', read_only=True)
+    is_virtual = serializers.SerializerMethodField()  # rolling 모드의 미생성 미래 복용 예정
     
     class Meta:
         model = MedicationLog
@@ -153,10 +132,41 @@ class MedicationLogSerializer(serializers.ModelSerializer):
             'id', 'schedule', 'medication_name', 'medication_dosage',
             'group_id', 'group_name', 'time_of_day', 'time_of_day_display',
             'scheduled_datetime', 'taken_datetime',
-            'status', 'status_display', 'notes',
+            'status', 'status_display', 'notes', 'is_virtual',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+    
+    def get_is_virtual(self, obj):
+        return obj.pk is None
+
+
+class MedicationDeactivateSerializer(serializers.Serializer):
+    """약 일괄 비활성화 요청 시리얼라이저"""
+    
+    medication_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+    )
+
+
+class MedicationRenewalItemSerializer(serializers.Serializer):
+    """처방 갱신 약 항목 (start_date/days_supply가 비어 있으면 기존 값 유지)"""
+    
+    id = serializers.IntegerField(min_value=1)
+    start_date = serializers.DateField(required=False, allow_null=True)
+    days_supply = serializers.IntegerField(required=False, allow_null=True, min_value=1)
+
+
+class MedicationRenewalSerializer(serializers.Serializer):
+    """처방 갱신 요청 시리얼라이저 (계속 복용하는 약 + 함께 비활성화할 약)"""
+    
+    medications = MedicationRenewalItemSerializer(many=True, allow_empty=False)
+    deactivate_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        default=list,
+    )
 
 
 class OCRScanSerializer(serializers.Serializer):
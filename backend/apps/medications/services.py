@@ -6,10 +6,11 @@ GPT-4o Vision을 사용하여 처방전 이미지에서 직접 약품 정보 추
 import json
 import base64
 import io
-import httpx
-from openai import OpenAI
+import time
 from django.conf import settings
+from core.llm_gateway import chat_completion
 from PIL import Image, ExifTags
+from .image_preprocessing import open_for_vision, preprocess_for_vision
 
 
 class OCRService:
@@ -18,11 +19,6 @@ class OCRService:
     GPT-4o Vision으로 이미지에서 직접 약품 정보 추출
     """
 
-    def __init__(self):
-        # Windows SSL 권한 문제 해결을 위해 SSL 검증 비활성화
-        http_client = httpx.Client(verify=False)
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY, http_client=http_client)
-    
     def _auto_rotate_image(self, image_content: bytes) -> bytes:
         """
         EXIF 데이터를 기반으로 이미지 자동 회전
@@ -63,6 +59,31 @@ class OCRService:
             # 그 외의 경우에도 원본 반환 (GPT가 처리 시도)
             return image_content
 
+    def _prepare_image(self, image_content: bytes):
+        """
+        EXIF 회전 후 Vision 전송용 전처리 (축소, 문서 영역 크롭, 흑백, 적응형 압축)
+        전처리 실패 시 기존 회전 처리 결과 사용
+        
+        Returns:
+            (전송할 이미지 bytes, 전처리 지표 dict)
+        """
+        started = time.perf_counter()
+        try:
+            image, source_size = open_for_vision(image_content)
+            processed, info = preprocess_for_vision(image, source_size)
+        except Exception as e:
+            print(f"이미지 전처리 건너뜀: {e}")
+            processed, info = self._auto_rotate_image(image_content), {}
+        
+        metrics = {
+            'original_bytes': len(image_content),
+            'processed_bytes': len(processed),
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+            **info,
+        }
+        print(f"[이미지 전처리] {metrics}")
+        return processed, metrics
+    
     def _extract_with_gpt4o_vision(self, image_content: bytes) -> str:
         """
         GPT-4o Vision으로 처방전 이미지에서 직접 약품 정보 추출
@@ -70,7 +91,9 @@ class OCRService:
         """
         image_base64 = base64.b64encode(image_content).decode('utf-8')
         
-        response = self.client.chat.completions.create(
+        # 공용 게이트웨이: 연결 풀 재사용, 호출 한도/재시도 처리
+        response = chat_completion(
+            'ocr_vision',
             model="gpt-4o",
             messages=[
                 {
@@ -99,7 +122,7 @@ class OCRService:
                             "type": "image_url",
                             "image_url": {
                                 "url": f"data:image/jpeg;base64,{image_base64}",
-                                "detail": "high"
+                                "detail": settings.OCR_IMAGE_SETTINGS.get('VISION_DETAIL', 'high')
                             }
                         }
                     ]
@@ -114,67 +137,85 @@ class OCRService:
         print(f"[GPT-4o Vision] Raw Response:\n{content}")
         return content
 
-    def parse_prescription(self, image_file):
+    def _analyze_prescription(self, image_content: bytes, image_metrics: dict, report) -> dict:
+        """
+        전처리된 이미지로 GPT-4o Vision 추출 + RAG 약품명 보정 (스캔 결과 캐시의 계산 단계)
+        """
+        # GPT-4o Vision으로 직접 추출
+        report('vision')
+        vision_started = time.perf_counter()
+        content = self._extract_with_gpt4o_vision(image_content)
+        image_metrics['vision_ms'] = round((time.perf_counter() - vision_started) * 1000, 1)
+
+        # JSON 파싱 (마크다운 코드블록 제거)
+        content = content.replace('```json', '').replace('```', '').strip()
+
+        try:
+            start_idx = content.find('{')
+            end_idx = content.rfind('}')
+            if start_idx != -1 and end_idx != -1:
+                content = content[start_idx:end_idx+1]
+        except:
+            pass
+
+        result = json.loads(content)
+
+        # RAG를 통한 약품명 보정
+        medications = result.get('medications', [])
+        report('correcting')
+        try:
+            from .rag_service import get_rag_service
+            rag_service = get_rag_service()
+            
+            # 약품명 전체를 한 번에 보정 (임베딩 1회 + Pinecone 동시 검색)
+            named = [med for med in medications if med.get('name')]
+            corrections = rag_service.correct_medication_names([med['name'] for med in named])
+            for med, correction in zip(named, corrections):
+                if correction.get('matched'):
+                    med['name'] = correction['corrected']
+                    med['rag_confidence'] = correction['confidence']
+                    # 성분/제조사 정보도 추가
+                    if correction.get('ingredient'):
+                        med['ingredient'] = correction['ingredient']
+                    if correction.get('manufacturer'):
+                        med['manufacturer'] = correction['manufacturer']
+        except Exception as rag_error:
+            print(f"RAG 보정 건너뜀: {rag_error}")
+            # RAG 오류 시에도 OCR 결과는 반환
+
+        return {
+            'success': True,
+            'symptom': result.get('symptom', ''),
+            'medications': medications,
+            'message': 'OCR 처리가 완료되었습니다.'
+        }
+
+    def parse_prescription(self, image_file, progress=None):
         """
         처방전 이미지에서 약품 정보 추출
         GPT-4o Vision으로 이미지에서 직접 추출
 
         Args:
             image_file: 업로드된 이미지 파일
+            progress: 처리 단계 콜백 progress(stage) (스캔 작업 진행률 기록용, 선택)
 
         Returns:
             dict: 추출된 약품 정보 리스트
         """
+        report = progress or (lambda stage: None)
         try:
-            # 이미지 읽기 및 자동 회전
+            # 이미지 읽기, 자동 회전 및 전처리
+            report('preprocessing')
             image_content = image_file.read()
-            print(f"[OCR Debug] 원본 바이트 크기: {len(image_content)}")
-            image_content = self._auto_rotate_image(image_content)
-            print(f"[OCR Debug] 처리 후 바이트 크기: {len(image_content)}")
-
-            # GPT-4o Vision으로 직접 추출
-            content = self._extract_with_gpt4o_vision(image_content)
-
-            # JSON 파싱 (마크다운 코드블록 제거)
-            content = content.replace('```json', '').replace('```', '').strip()
-
-            try:
-                start_idx = content.find('{')
-                end_idx = content.rfind('}')
-                if start_idx != -1 and end_idx != -1:
-                    content = content[start_idx:end_idx+1]
-            except:
-                pass
-
-            result = json.loads(content)
+            image_content, image_metrics = self._prepare_image(image_content)
             
-            # RAG를 통한 약품명 보정
-            medications = result.get('medications', [])
-            try:
-                from .rag_service import get_rag_service
-                rag_service = get_rag_service()
-                
-                for med in medications:
-                    if med.get('name'):
-                        correction = rag_service.correct_medication_name(med['name'])
-                        if correction.get('matched'):
-                            med['name'] = correction['corrected']
-                            med['rag_confidence'] = correction['confidence']
-                            # 성분/제조사 정보도 추가
-                            if correction.get('ingredient'):
-                                med['ingredient'] = correction['ingredient']
-                            if correction.get('manufacturer'):
-                                med['manufacturer'] = correction['manufacturer']
-            except Exception as rag_error:
-                print(f"RAG 보정 건너뜀: {rag_error}")
-                # RAG 오류 시에도 OCR 결과는 반환
-            
-            return {
-                'success': True,
-                'symptom': result.get('symptom', ''),
-                'medications': medications,
-                'message': 'OCR 처리가 완료되었습니다.'
-            }
+            # 같은 이미지의 이전/진행 중 스캔 결과 재사용 (Vision + RAG 보정 생략)
+            from .scan_cache_service import get_or_compute_scan
+            result, cached = get_or_compute_scan(
+                image_metrics.get('image_hash'),
+                lambda: self._analyze_prescription(image_content, image_metrics, report),
+            )
+            return {**result, 'cached': cached, 'image_metrics': image_metrics}
             
         except Exception as e:
             print(f"OCR Error: {str(e)}")
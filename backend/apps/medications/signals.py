@@ -1,11 +1,13 @@
 """
-Medications Signals - 약 변경 시 건강 프로필 자동 재분석
+Medications Signals - 약 변경 시 건강 프로필 자동 재분석, 일별 복약 집계/캘린더 캐시 갱신, OpenAI 호출 기록 버퍼 저장
 """
 
 import logging
-from django.db.models.signals import post_save, post_delete
+from celery.signals import task_postrun, worker_process_shutdown
+from django.core.signals import request_finished
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
-from .models import Medication
+from .models import Medication, MedicationSchedule, MedicationLog
 
 logger = logging.getLogger(__name__)
 
@@ -27,3 +29,97 @@ def trigger_health_profile_refresh(sender, instance, **kwargs):
         )
     except Exception as e:
         logger.error(f"[Medications Signal] 건강 프로필 재분석 트리거 실패: {e}")
+
+
+@receiver(post_save, sender=Medication)
+@receiver(post_delete, sender=Medication)
+def invalidate_medication_calendar(sender, instance, **kwargs):
+    """약 정보가 바뀌면 병원 방문일/가상 복용 예정이 달라지므로 사용자 캘린더 캐시 전체 무효화"""
+    from .calendar_service import invalidate_user_calendar
+    invalidate_user_calendar(instance.user_id)
+
+
+@receiver(pre_delete, sender=Medication)
+def collect_medication_log_keys(sender, instance, **kwargs):
+    """약 삭제 시 CASCADE로 사라질 복약 기록의 날짜를 미리 수집 (일별 집계 갱신용)"""
+    instance._deleted_log_keys = [
+        (instance.user_id, scheduled)
+        for scheduled in MedicationLog.objects.filter(
+            schedule__medication=instance
+        ).values_list('scheduled_datetime', flat=True)
+    ]
+
+
+@receiver(post_delete, sender=Medication)
+def refresh_deleted_medication_adherence(sender, instance, **kwargs):
+    """삭제된 약의 복약 기록이 있던 날짜의 일별 집계 갱신"""
+    from .log_service import notify_logs_changed
+    notify_logs_changed(getattr(instance, '_deleted_log_keys', []))
+
+
+@receiver(post_save, sender=MedicationSchedule)
+@receiver(post_delete, sender=MedicationSchedule)
+def invalidate_schedule_calendar(sender, instance, **kwargs):
+    """스케줄이 바뀌면 가상 복용 예정이 달라지므로 사용자 캘린더 캐시 전체 무효화"""
+    from .calendar_service import invalidate_user_calendar
+    user_id = Medication.objects.filter(
+        id=instance.medication_id
+    ).values_list('user_id', flat=True).first()
+    if user_id:
+        invalidate_user_calendar(user_id)
+
+
+def _log_user_id(instance, allow_query):
+    """복약 기록의 사용자 ID (관계가 캐시되어 있지 않으면 allow_query일 때만 조회)"""
+    if MedicationLog.schedule.is_cached(instance):
+        schedule = instance.schedule
+        if MedicationSchedule.medication.is_cached(schedule):
+            return schedule.medication.user_id
+    if not allow_query:
+        return None
+    return Medication.objects.filter(
+        schedules__id=instance.schedule_id
+    ).values_list('user_id', flat=True).first()
+
+
+@receiver(post_save, sender=MedicationLog)
+def refresh_saved_log_summary(sender, instance, **kwargs):
+    """복약 기록이 바뀐 날짜의 일별 집계 갱신 및 월 캘린더 캐시 무효화"""
+    from .log_service import notify_logs_changed
+    user_id = _log_user_id(instance, allow_query=True)
+    if user_id:
+        notify_logs_changed([(user_id, instance.scheduled_datetime)])
+
+
+@receiver(post_delete, sender=MedicationLog)
+def refresh_deleted_log_summary(sender, instance, **kwargs):
+    """
+    삭제된 복약 기록의 일별 집계 갱신 및 월 캘린더 캐시 무효화
+    일괄 삭제(처방 갱신/비활성화, 약 삭제)는 호출 측에서 notify_logs_changed로 한 번에
+    처리하므로 관계가 캐시된 경우에만 처리 (로그별 추가 조회 방지)
+    """
+    from .log_service import notify_logs_changed
+    user_id = _log_user_id(instance, allow_query=False)
+    if user_id:
+        notify_logs_changed([(user_id, instance.scheduled_datetime)])
+
+
+@receiver(request_finished)
+def flush_llm_usage_after_request(sender, **kwargs):
+    """요청 종료 시 오래된 OpenAI 호출 기록 버퍼 저장"""
+    from .llm_usage_service import flush_llm_calls_if_due
+    flush_llm_calls_if_due()
+
+
+@task_postrun.connect(weak=False)
+def flush_llm_usage_after_task(**kwargs):
+    """Celery 태스크 종료 시 오래된 OpenAI 호출 기록 버퍼 저장"""
+    from .llm_usage_service import flush_llm_calls_if_due
+    flush_llm_calls_if_due()
+
+
+@worker_process_shutdown.connect(weak=False)
+def flush_llm_usage_on_worker_shutdown(**kwargs):
+    """prefork 자식 프로세스는 atexit을 실행하지 않으므로 워커 종료 시 남은 기록 저장"""
+    from .llm_usage_service import flush_llm_calls
+    flush_llm_calls()
@@ -0,0 +1,198 @@
+"""
+Medications Tasks - Celery 태스크
+복약 기록 생성(rolling 모드), 상태 관리 (미복용 처리), 월별 파티션 유지보수, 콜드 아카이브, 처방전 스캔 작업/결과 캐시 정리
+"""
+
+import logging
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def sweep_missed_doses():
+    """
+    미복용 기록 정리 - 예정 시간 + 유예 시간이 지난 pending 로그를 missed로 일괄 전환
+    Celery Beat에서 10분마다 실행
+    
+    - 배치 크기만큼 ID를 조회한 뒤 배치당 UPDATE 1회로 상태 전이
+    - 해당 로그의 대기 중 비상 알림도 함께 취소
+    - 일별 복약 집계/캘린더 캐시 갱신
+    """
+    from .models import MedicationLog
+    from .log_service import notify_logs_changed
+    from apps.alerts.tasks import cancel_pending_alerts
+    
+    config = settings.SAFETY_LINE_SETTINGS
+    grace_minutes = config.get('MISSED_GRACE_MINUTES', 120)
+    batch_size = config.get('MISSED_SWEEP_BATCH_SIZE', 1000)
+    cutoff = timezone.now() - timezone.timedelta(minutes=grace_minutes)
+    
+    overdue = MedicationLog.objects.filter(
+        status=MedicationLog.Status.PENDING,
+        scheduled_datetime__lt=cutoff,
+    ).order_by('scheduled_datetime')
+    
+    missed_count = 0
+    cancelled_alerts = 0
+    batches = 0
+    while True:
+        rows = list(
+            overdue.values_list(
+                'id', 'schedule__medication__user_id', 'scheduled_datetime'
+            )[:batch_size]
+        )
+        if not rows:
+            break
+        log_ids = [log_id for log_id, _, _ in rows]
+        
+        missed_count += MedicationLog.objects.filter(
+            id__in=log_ids,
+            status=MedicationLog.Status.PENDING,
+        ).update(status=MedicationLog.Status.MISSED, updated_at=timezone.now())
+        cancelled_alerts += cancel_pending_alerts(log_ids)
+        notify_logs_changed((user_id, scheduled) for _, user_id, scheduled in rows)
+        batches += 1
+    
+    result = {
+        'missed': missed_count,
+        'cancelled_alerts': cancelled_alerts,
+        'batches': batches,
+        'cutoff': cutoff.isoformat(),
+    }
+    logger.info(f"[Missed Sweeper] {result}")
+    return result
+
+
+@shared_task
+def materialize_rolling_window():
+    """
+    rolling 모드 복약 기록 생성 - 오늘부터 롤링 구간(기본: 오늘 + 내일)까지 실제 로그 생성
+    Celery Beat에서 매일 00:01 실행 (00:05 알림 계획 이전)
+    """
+    from .models import Medication
+    from .log_service import get_materialized_until, materialize_medication_logs
+    
+    if get_materialized_until() is None:
+        return {'status': 'skipped', 'reason': 'full_mode'}
+    
+    batch_size = 200
+    today = timezone.localdate()
+    medications = Medication.objects.filter(
+        is_active=True
+    ).prefetch_related('schedules').order_by('id')
+    
+    created_count = 0
+    batch = []
+    for medication in medications.iterator(chunk_size=batch_size):
+        batch.append(medication)
+        if len(batch) >= batch_size:
+            created_count += materialize_medication_logs(batch, from_date=today)
+            batch = []
+    if batch:
+        created_count += materialize_medication_logs(batch, from_date=today)
+    
+    result = {'status': 'completed', 'created': created_count}
+    logger.info(f"[Rolling Window] {result}")
+    return result
+
+
+@shared_task
+def maintain_partitions():
+    """
+    복약 기록/비상 알림 월별 파티션 유지보수
+    Celery Beat에서 매일 03:30 실행 (파티션 테이블이 아니면 건너뜀)
+    """
+    from .partition_service import maintain_partitions as run_maintenance
+    return run_maintenance()
+
+
+@shared_task
+def archive_cold_logs():
+    """
+    보관 기간이 지난 월의 복약 기록/비상 알림을 압축 파일로 아카이브 후 삭제
+    Celery Beat에서 매월 2일 04:00 실행 (ARCHIVE_AFTER_MONTHS=0이면 건너뜀)
+    """
+    from .archive_service import archive_expired_months
+    
+    results = archive_expired_months()
+    if not results:
+        return {'status': 'skipped'}
+    return {'status': 'archived', 'months': results}
+
+
+@shared_task(bind=True, acks_late=True, soft_time_limit=120, time_limit=150)
+def process_scan_job(self, job_id):
+    """
+    처방전 OCR 스캔 작업 처리 (전용 ocr 큐)
+    단계별 진행률과 최종 결과를 캐시에 기록하며, 클라이언트는 상태 API로 조회
+    acks_late 재전달(워커 종료 등) 시 다시 처리할 수 있도록 이미지는 완료/실패 후에만 삭제
+    """
+    import io
+    from celery.exceptions import SoftTimeLimitExceeded
+    from .services import OCRService
+    from .scan_job_service import (
+        ScanJobStatus,
+        delete_scan_image,
+        get_scan_image,
+        get_scan_job,
+        update_scan_job,
+    )
+    
+    state = get_scan_job(job_id)
+    if state is None or state['status'] in ScanJobStatus.FINISHED:
+        return {'status': 'skipped', 'job_id': job_id}
+    
+    update_scan_job(job_id, status=ScanJobStatus.RUNNING, stage='decoding')
+    image_content = get_scan_image(job_id)
+    if image_content is None:
+        update_scan_job(job_id, status=ScanJobStatus.FAILED, error='이미지가 만료되었습니다. 다시 스캔해주세요.')
+        return {'status': ScanJobStatus.FAILED, 'job_id': job_id}
+    
+    try:
+        result = OCRService().parse_prescription(
+            io.BytesIO(image_content),
+            progress=lambda stage: update_scan_job(job_id, stage=stage),
+        )
+    except SoftTimeLimitExceeded:
+        result = {'success': False, 'error': 'timeout', 'message': 'OCR 처리 시간이 초과되었습니다.'}
+    
+    job_status = ScanJobStatus.COMPLETED if result.get('success') else ScanJobStatus.FAILED
+    update_scan_job(
+        job_id,
+        status=job_status,
+        stage='done',
+        result=result,
+        error=None if result.get('success') else result.get('message'),
+    )
+    delete_scan_image(job_id)
+    logger.info(f"[Scan Job] {job_id}: {job_status}")
+    return {'status': job_status, 'job_id': job_id}
+
+
+@shared_task
+def purge_scan_result_cache():
+    """
+    만료된 처방전 스캔 결과 캐시(DB) 삭제
+    Celery Beat에서 매일 04:30 실행
+    """
+    from .scan_cache_service import purge_expired_scan_results
+    
+    deleted = purge_expired_scan_results()
+    logger.info(f"[Scan Cache] 만료 캐시 {deleted}건 삭제")
+    return {'deleted': deleted}
+
+
+@shared_task
+def purge_llm_call_logs():
+    """
+    보관 기간이 지난 OpenAI 호출 기록 삭제
+    Celery Beat에서 매일 04:40 실행
+    """
+    from .llm_usage_service import purge_old_llm_calls
+    
+    deleted = purge_old_llm_calls()
+    logger.info(f"[LLM Usage] 오래된 호출 기록 {deleted}건 삭제")
+    return {'deleted': deleted}
@@ -0,0 +1,143 @@
+"""
+Medications Tests - 복약 기록 아카이브, 일괄 복용 완료
+"""
+
+import shutil
+import tempfile
+from unittest import skipUnless
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.medications.archive_service import archive_month, read_archive_rows
+from apps.medications.log_service import get_local_day_range
+from apps.medications.models import (
+    LogArchive, Medication, MedicationGroup, MedicationLog, MedicationSchedule,
+)
+from apps.medications.serializers import MedicationLogSerializer
+from apps.medications.partition_service import add_months
+from apps.users.models import User
+
+
+class ArchiveMonthTests(TestCase):
+    """재실행 시 새 버전 파일을 저장한 뒤에만 이전 파일 삭제"""
+    
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        
+        self.user = User.objects.create_user(username='senior', password='x')
+        medication = Medication.objects.create(user=self.user, name='암로디핀')
+        self.schedule = MedicationSchedule.objects.create(
+            medication=medication, time_of_day='morning', scheduled_time='08:00',
+        )
+        self.month = add_months(timezone.localdate().replace(day=1), -3)
+    
+    def _log(self, day):
+        start, _ = get_local_day_range(self.month.replace(day=day))
+        return MedicationLog.objects.create(
+            schedule=self.schedule, scheduled_datetime=start + timezone.timedelta(hours=8),
+        )
+    
+    def test_rerun_replaces_archive_after_saving_new_version(self):
+        first = self._log(1)
+        archive_month(self.month)
+        old_path = LogArchive.objects.get(user=self.user, month=self.month).log_path
+        
+        second = self._log(2)
+        result = archive_month(self.month)
+        
+        archive = LogArchive.objects.get(user=self.user, month=self.month)
+        self.assertNotEqual(archive.log_path, old_path)
+        self.assertFalse(default_storage.exists(old_path))
+        self.assertEqual(
+            [row['id'] for row in read_archive_rows(archive.log_path)], [first.id, second.id],
+        )
+        self.assertEqual(archive.log_count, 2)
+        self.assertEqual(result['manifest_totals']['medication_logs'], 2)
+        _, manifests = default_storage.listdir('archives/manifests')
+        self.assertEqual(len(manifests), 1)
+        self.assertFalse(MedicationLog.objects.filter(id__in=[first.id, second.id]).exists())
+
+
+@skipUnless(connection.vendor == 'postgresql', '파티션 테이블 UPDATE ... FROM ... RETURNING은 PostgreSQL 전용')
+class BatchTakeTests(TestCase):
+    """batch_take - 본인의 같은 그룹/시간대 pending 로그만 전이, 응답은 ORM 조회 결과와 동일"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='senior', password='x')
+        self.other = User.objects.create_user(username='other', password='x')
+        self.group = MedicationGroup.objects.create(user=self.user, name='고혈압')
+        self.today, _ = get_local_day_range(timezone.localdate())
+        
+        self.morning = [
+            self._log(self.user, name, 'morning', group=self.group)
+            for name in ('암로디핀', '로사르탄')
+        ]
+        self.taken = self._log(self.user, '아스피린', 'morning', group=self.group, status=MedicationLog.Status.TAKEN)
+        self.evening = self._log(self.user, '아토르바스타틴', 'evening', group=self.group)
+        self.yesterday = self._log(self.user, '히드로클로로티아지드', 'morning', group=self.group, days=-1)
+        self.ungrouped = self._log(self.user, '메트포르민', 'morning')
+        self.others = self._log(self.other, '암로디핀', 'morning')
+        
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+    
+    def _log(self, user, name, time_of_day, group=None, days=0, status=MedicationLog.Status.PENDING):
+        medication = Medication.objects.create(user=user, name=name, dosage='1정', group=group)
+        schedule = MedicationSchedule.objects.create(
+            medication=medication, time_of_day=time_of_day, scheduled_time='08:00',
+        )
+        return MedicationLog.objects.create(
+            schedule=schedule,
+            status=status,
+            scheduled_datetime=self.today + timezone.timedelta(days=days, hours=8),
+        )
+    
+    def _statuses(self):
+        return dict(MedicationLog.objects.values_list('id', 'status'))
+    
+    def _expected(self, logs):
+        queryset = MedicationLog.objects.filter(
+            id__in=[log.id for log in logs]
+        ).select_related('schedule__medication__group', 'schedule').order_by('scheduled_datetime', 'id')
+        return MedicationLogSerializer(queryset, many=True).data
+    
+    def test_group_slot_updates_only_callers_pending_logs(self):
+        before = self._statuses()
+        
+        response = self.client.post(
+            '/api/medications/logs/batch-take/',
+            {'group_id': self.group.id, 'time_of_day': 'morning'},
+            format='json',
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['taken_count'], 2)
+        after = self._statuses()
+        for log in self.morning:
+            self.assertEqual(after[log.id], MedicationLog.Status.TAKEN)
+        for log in (self.taken, self.evening, self.yesterday, self.ungrouped, self.others):
+            self.assertEqual(after[log.id], before[log.id])
+        self.assertEqual(
+            sorted(response.data['logs'], key=lambda log: log['id']),
+            sorted(self._expected(self.morning), key=lambda log: log['id']),
+        )
+    
+    def test_log_ids_ignore_other_users_logs(self):
+        response = self.client.post(
+            '/api/medications/logs/batch-take/',
+            {'log_ids': [self.ungrouped.id, self.others.id, self.taken.id]},
+            format='json',
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['taken_count'], 1)
+        self.assertEqual(response.data['logs'], self._expected([self.ungrouped]))
+        self.assertEqual(
+            MedicationLog.objects.get(id=self.others.id).status, MedicationLog.Status.PENDING,
+        )
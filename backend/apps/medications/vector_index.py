@@ -0,0 +1,232 @@
+"""
+Medications Vector Index - 프로세스 내 약품명 벡터 색인 (Pinecone 대체, RAG_SETTINGS VECTOR_BACKEND='local')
+약품 수만 개 규모는 로컬에서 충분히 검색 가능하므로 원격 왕복 없이 NumPy 내적으로 검색
+
+- 색인 파일: L2 정규화된 float32 임베딩 행렬(.npy, 앞쪽 VECTOR_INDEX_DIMENSIONS 차원) + 메타데이터(.json) + manifest.json
+- .npy는 mmap(읽기 전용)으로 열어 같은 서버의 gunicorn/Celery 프로세스가 페이지 캐시를 공유
+- 간단한 IVF: 생성 시 k-means로 벡터를 목록(list)별로 모아 저장하고,
+  검색 시 질의와 가까운 중심 nprobe개의 목록만 내적 (목록 수 1이면 전체 검색)
+- 새 색인은 버전별 파일로 쓴 뒤 manifest.json만 교체하여 반영 (실행 중 프로세스는 다음 확인 시 다시 로드)
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+_FILE_PREFIXES = ('vectors-', 'centroids-', 'offsets-', 'metadata-')
+
+_index = None
+_index_mtime = None
+_checked_at = 0.0
+_index_lock = threading.Lock()
+
+
+def _normalize_rows(matrix):
+    import numpy as np
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _kmeans(matrix, n_lists, iterations=10, seed=0):
+    """정규화 벡터의 구면 k-means (중심, 벡터별 목록 번호)"""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    centroids = matrix[rng.choice(len(matrix), n_lists, replace=False)]
+    for _ in range(iterations):
+        assignments = (matrix @ centroids.T).argmax(axis=1)
+        for list_id in range(n_lists):
+            members = matrix[assignments == list_id]
+            if len(members):
+                centroids[list_id] = members.sum(axis=0)
+        centroids = _normalize_rows(centroids)
+    return centroids, (matrix @ centroids.T).argmax(axis=1)
+
+
+class LocalVectorIndex:
+    """mmap으로 연 임베딩 행렬 + 메타데이터 (코사인 유사도 검색)"""
+    
+    def __init__(self, directory, manifest):
+        import numpy as np
+        directory = Path(directory)
+        self.manifest = manifest
+        self.model = manifest['model']
+        self.vectors = np.load(directory / manifest['vectors'], mmap_mode='r')
+        if manifest.get('centroids'):
+            self.centroids = np.load(directory / manifest['centroids'])
+            self.offsets = np.load(directory / manifest['offsets'])
+        else:
+            self.centroids = None
+            self.offsets = None
+        with open(directory / manifest['metadata'], 'r', encoding='utf-8') as f:
+            self.metadata = json.load(f)
+        if len(self.metadata) != self.vectors.shape[0]:
+            raise ValueError('벡터 수와 메타데이터 수가 다릅니다')
+    
+    def __len__(self):
+        return len(self.metadata)
+    
+    def _candidate_ranges(self, query, nprobe):
+        """질의와 가까운 중심 nprobe개 목록의 (시작, 끝) 행 범위"""
+        import numpy as np
+        if self.centroids is None or nprobe <= 0 or nprobe >= len(self.centroids):
+            return [(0, len(self))]
+        nearest = np.argpartition(self.centroids @ query, -nprobe)[-nprobe:]
+        return [(int(self.offsets[i]), int(self.offsets[i + 1])) for i in nearest]
+    
+    def search(self, queries, top_k=1, nprobe=None):
+        """
+        여러 질의 벡터 검색
+        
+        Args:
+            queries: 질의 임베딩 목록
+            top_k: 질의당 결과 수
+            nprobe: 검색할 목록 수 (None이면 RAG_SETTINGS VECTOR_INDEX_NPROBE, 0이면 전체 검색)
+        
+        Returns:
+            질의 순서대로 Pinecone query 응답과 같은 형식의 [{'score', 'metadata'}, ...] 목록
+        """
+        import numpy as np
+        if not len(self) or not len(queries):
+            return [[] for _ in queries]
+        if nprobe is None:
+            nprobe = settings.RAG_SETTINGS.get('VECTOR_INDEX_NPROBE', 8)
+        
+        # 색인을 앞쪽 차원만 잘라 만든 경우 질의도 같은 차원으로 잘라 다시 정규화
+        queries = _normalize_rows(np.asarray(queries, dtype=np.float32)[:, :self.vectors.shape[1]])
+        results = []
+        for query in queries:
+            ids = []
+            scores = []
+            for start, end in self._candidate_ranges(query, nprobe):
+                if end > start:
+                    ids.append(np.arange(start, end))
+                    scores.append(self.vectors[start:end] @ query)
+            if not scores:
+                results.append([])
+                continue
+            ids = np.concatenate(ids)
+            scores = np.concatenate(scores)
+            k = min(top_k, len(scores))
+            top = np.argpartition(scores, -k)[-k:]
+            top = top[np.argsort(scores[top])[::-1]]
+            results.append([
+                {'score': float(scores[i]), 'metadata': self.metadata[ids[i]]}
+                for i in top
+            ])
+        return results
+
+
+def build_vector_index(directory, entries, embeddings, model, dimensions=None, n_lists=None):
+    """
+    색인 파일 생성 후 manifest.json 교체 (이전 버전 파일 삭제)
+    
+    Args:
+        directory: 색인 디렉터리
+        entries: 메타데이터 목록 (embeddings와 같은 순서)
+        embeddings: 임베딩 목록
+        model: 임베딩 모델 이름 (검색 시 질의 모델과 비교)
+        dimensions: 앞쪽 몇 차원만 저장할지 (None이면 전체)
+            text-embedding-3 계열은 앞쪽 차원을 잘라 다시 정규화해도 유사도 순위가 대부분 유지되므로
+            행렬 크기와 검색 시간을 차원 수에 비례해 줄일 수 있음
+        n_lists: IVF 목록 수 (None이면 √N, 1 이하면 목록 없이 전체 검색)
+    
+    Returns:
+        manifest dict
+    """
+    import numpy as np
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    version = timezone.now().strftime('%Y%m%d%H%M%S')
+    
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    if dimensions and matrix.ndim == 2:
+        matrix = matrix[:, :dimensions]
+    matrix = _normalize_rows(matrix)
+    
+    if n_lists is None:
+        n_lists = int(math.sqrt(len(matrix)))
+    n_lists = min(n_lists, len(matrix))
+    manifest = {
+        'version': version,
+        'model': model,
+        'count': int(matrix.shape[0]),
+        'dimensions': int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+        'lists': max(n_lists, 1),
+        'vectors': f"vectors-{version}.npy",
+        'metadata': f"metadata-{version}.json",
+    }
+    if n_lists > 1:
+        # 같은 목록의 벡터가 연속 행이 되도록 정렬하여 목록별 행 범위(offsets)만 저장
+        centroids, assignments = _kmeans(matrix, n_lists)
+        order = np.argsort(assignments, kind='stable')
+        matrix = matrix[order]
+        entries = [entries[i] for i in order]
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=n_lists))])
+        manifest['centroids'] = f"centroids-{version}.npy"
+        manifest['offsets'] = f"offsets-{version}.npy"
+        np.save(directory / manifest['centroids'], centroids.astype(np.float32))
+        np.save(directory / manifest['offsets'], offsets.astype(np.int64))
+    
+    np.save(directory / manifest['vectors'], matrix)
+    with open(directory / manifest['metadata'], 'w', encoding='utf-8') as f:
+        json.dump(entries, f, ensure_ascii=False)
+    
+    tmp_path = directory / f"{MANIFEST_NAME}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, directory / MANIFEST_NAME)
+    
+    # 이전 버전 파일 삭제 (이미 mmap으로 연 프로세스는 삭제 후에도 기존 매핑을 계속 사용)
+    current = {manifest[key] for key in ('vectors', 'metadata', 'centroids', 'offsets') if key in manifest}
+    for path in directory.iterdir():
+        if path.name.startswith(_FILE_PREFIXES) and path.name not in current:
+            path.unlink(missing_ok=True)
+    
+    # 같은 프로세스에서는 다음 조회 시 바로 새 색인 로드
+    global _checked_at
+    _checked_at = 0.0
+    return manifest
+
+
+def get_vector_index():
+    """
+    프로세스 공용 로컬 벡터 색인 (manifest.json이 바뀌면 다시 로드, 색인이 없으면 None)
+    """
+    global _index, _index_mtime, _checked_at
+    config = settings.RAG_SETTINGS
+    now = time.monotonic()
+    if _checked_at and now - _checked_at < config.get('VECTOR_INDEX_RELOAD_SECONDS', 60):
+        return _index
+    
+    with _index_lock:
+        _checked_at = now
+        directory = Path(config.get('VECTOR_INDEX_DIR'))
+        manifest_path = directory / MANIFEST_NAME
+        try:
+            mtime = os.path.getmtime(manifest_path)
+        except OSError:
+            if _index is None:
+                logger.warning(f"[Vector Index] 색인이 없습니다: {manifest_path}")
+            return _index
+        
+        if _index is None or mtime != _index_mtime:
+            try:
+                with open(manifest_path, 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+                _index = LocalVectorIndex(directory, manifest)
+                _index_mtime = mtime
+                logger.info(f"[Vector Index] 약품 {len(_index)}개 색인 로드 (버전 {manifest['version']})")
+            except Exception as e:
+                logger.error(f"[Vector Index] 색인 로드 실패: {e}")
+    return _index
@@ -2,10 +2,12 @@
 Medications Views
 """
 
+from datetime import timedelta
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.db import transaction
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
 from .models import Medication, MedicationSchedule, MedicationLog, MedicationGroup
@@ -14,12 +16,46 @@ from .serializers import (
     MedicationScheduleSerializer,
     MedicationLogSerializer,
     MedicationGroupSerializer,
+    MedicationDeactivateSerializer,
+    MedicationRenewalSerializer,
     OCRScanSerializer,
 )
 from .services import OCRService
+from .log_service import (
+    build_virtual_logs,
+    get_local_day_range,
+    notify_logs_changed,
+    take_medication_logs,
+)
+from .calendar_service import get_month_calendar
+from .renewal_service import apply_prescription_renewal
+from .archive_service import read_archived_logs
+from .scan_job_service import create_scan_job, get_scan_job, public_scan_job
 from apps.users.models import User, GuardianRelation
 
 
+def parse_calendar_month(query_params):
+    """
+    캘린더 조회용 year/month 쿼리 파라미터 (기본: 이번 달)
+    
+    Returns:
+        (year, month, 오류 응답) - 형식이나 범위가 잘못되면 (None, None, 400 응답)
+    """
+    now = timezone.localdate()
+    try:
+        year = int(query_params.get('year', now.year))
+        month = int(query_params.get('month', now.month))
+    except (TypeError, ValueError):
+        year = month = None
+    
+    if year is None or not 1 <= year < 9999 or not 1 <= month <= 12:
+        return None, None, Response(
+            {'error': 'Invalid year/month. Use year=YYYY&month=1-12'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return year, month, None
+
+
 class MedicationGroupViewSet(viewsets.ModelViewSet):
     """약품 그룹 ViewSet"""
     
@@ -41,7 +77,10 @@ class MedicationViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['post'], url_path='scan')
     def scan_prescription(self, request):
-        """처방전 OCR 스캔으로 약품 자동 등록"""
+        """
+        처방전 OCR 스캔으로 약품 자동 등록 (동기 처리, 기존 앱 버전 호환용)
+        요청 스레드를 오래 점유하므로 신규 클라이언트는 scan-jobs API 사용
+        """
         serializer = OCRScanSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
@@ -61,53 +100,52 @@ class MedicationViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    @action(detail=False, methods=['post'], url_path='scan-jobs')
+    def submit_scan_job(self, request):
+        """
+        처방전 OCR 스캔 작업 등록
+        OCR은 전용 큐의 Celery 워커에서 처리하고 작업 ID를 즉시 반환 (202)
+        """
+        serializer = OCRScanSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        try:
+            job = create_scan_job(request.user.id, serializer.validated_data['image_base64'])
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(public_scan_job(job), status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=False, methods=['get'], url_path=r'scan-jobs/(?P<job_id>[0-9a-f]{32})')
+    def scan_job_status(self, request, job_id=None):
+        """
+        처방전 OCR 스캔 작업 상태 조회
+        대기 없이 현재 상태를 즉시 반환 (클라이언트는 완료될 때까지 간격을 늘려가며 재조회)
+        """
+        job = get_scan_job(job_id)
+        if job is None or job['user_id'] != request.user.id:
+            return Response(
+                {'error': '스캔 작업을 찾을 수 없습니다.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(public_scan_job(job))
+    
     @action(detail=False, methods=['post'], url_path='batch-deactivate')
     def batch_deactivate(self, request):
         """
         약 일괄 비활성화 (병원 재방문 시 빠진 약 처리)
         - is_active = False 설정
         - 미래 MedicationLog 삭제
-        - 예약된 Celery 태스크 취소
+        - 예약된 비상 알림 삭제
         """
-        medication_ids = request.data.get('medication_ids', [])
-        if not medication_ids:
-            return Response(
-                {'error': 'medication_ids가 필요합니다.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        serializer = MedicationDeactivateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
         
-        medications = Medication.objects.filter(
-            id__in=medication_ids,
-            user=request.user,
-            is_active=True
+        result = apply_prescription_renewal(
+            request.user,
+            deactivate_ids=serializer.validated_data['medication_ids'],
         )
-        
-        deactivated_count = 0
-        now = timezone.now()
-        
-        for med in medications:
-            med.is_active = False
-            med.save(update_fields=['is_active', 'updated_at'])
-            
-            # 미래 MedicationLog 삭제 및 Celery 태스크 취소
-            future_logs = MedicationLog.objects.filter(
-                schedule__medication=med,
-                scheduled_datetime__gte=now,
-                status=MedicationLog.Status.PENDING
-            )
-            for log in future_logs:
-                if log.celery_task_id:
-                    try:
-                        from apps.alerts.tasks import revoke_alert_task
-                        revoke_alert_task(log.celery_task_id)
-                    except Exception:
-                        pass
-            future_logs.delete()
-            
-            # 스케줄 비활성화
-            MedicationSchedule.objects.filter(medication=med).update(is_active=False)
-            
-            deactivated_count += 1
+        deactivated_count = result['deactivated']
         
         return Response({
             'success': True,
@@ -120,92 +158,23 @@ class MedicationViewSet(viewsets.ModelViewSet):
         """
         계속 복용하는 약 갱신 (병원 재방문 시)
         - start_date, days_supply 업데이트
-        - 새 기간에 대한 MedicationLog 재생성
+        - 새 기간과 달라진 미래 MedicationLog만 삭제/추가
+        - deactivate_ids를 함께 보내면 빠진 약 비활성화까지 하나의 트랜잭션에서 처리
         """
-        from datetime import datetime, timedelta
-        
-        medications_data = request.data.get('medications', [])
-        if not medications_data:
-            return Response(
-                {'error': 'medications 배열이 필요합니다.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        renewed_count = 0
-        now = timezone.now()
+        serializer = MedicationRenewalSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
         
-        for med_data in medications_data:
-            med_id = med_data.get('id')
-            new_days_supply = med_data.get('days_supply')
-            new_start_date = med_data.get('start_date')
-            
-            if not med_id:
-                continue
-            
-            try:
-                med = Medication.objects.get(id=med_id, user=request.user)
-            except Medication.DoesNotExist:
-                continue
-            
-            # start_date, days_supply 갱신
-            if new_start_date:
-                med.start_date = datetime.strptime(new_start_date, '%Y-%m-%d').date()
-            if new_days_supply:
-                med.days_supply = new_days_supply
-            med.save(update_fields=['start_date', 'days_supply', 'updated_at'])
-            
-            # 미래의 PENDING 로그 삭제 (새로 생성할 예정)
-            # 삭제 전에 연결된 Celery 태스크 취소
-            future_logs = MedicationLog.objects.filter(
-                schedule__medication=med,
-                scheduled_datetime__gte=now,
-                status=MedicationLog.Status.PENDING
-            )
-            for log in future_logs:
-                if log.celery_task_id:
-                    try:
-                        from apps.alerts.tasks import revoke_alert_task
-                        revoke_alert_task(log.celery_task_id)
-                    except Exception:
-                        pass
-            future_logs.delete()
-            
-            # 새 기간에 대한 MedicationLog 재생성
-            start_date = med.start_date or timezone.localdate()
-            days_supply = med.days_supply or 30
-            end_date = start_date + timedelta(days=days_supply)
-            today = timezone.localdate()
-            
-            for schedule in med.schedules.filter(is_active=True):
-                current_date = max(start_date, today)  # 오늘 이전은 생성 안 함
-                while current_date < end_date:
-                    scheduled_datetime = timezone.make_aware(
-                        datetime.combine(current_date, schedule.scheduled_time)
-                    )
-                    # 이미 존재하는 로그는 건너뜀
-                    if not MedicationLog.objects.filter(
-                        schedule=schedule,
-                        scheduled_datetime=scheduled_datetime
-                    ).exists():
-                        new_log = MedicationLog.objects.create(
-                            schedule=schedule,
-                            scheduled_datetime=scheduled_datetime,
-                            status=MedicationLog.Status.PENDING
-                        )
-                        # 오늘 날짜의 로그는 즉시 알림 예약 (00:05 스케줄러를 기다리지 않음)
-                        if current_date == today:
-                            try:
-                                from apps.alerts.tasks import schedule_medication_alert
-                                schedule_medication_alert.delay(new_log.id)
-                            except Exception:
-                                pass
-                    current_date += timedelta(days=1)
-            
-            renewed_count += 1
+        result = apply_prescription_renewal(
+            request.user,
+            deactivate_ids=serializer.validated_data['deactivate_ids'],
+            renewals=serializer.validated_data['medications'],
+        )
+        renewed_count = result['renewed']
         
         return Response({
             'success': True,
             'renewed_count': renewed_count,
+            'deactivated_count': result['deactivated'],
             'message': f'{renewed_count}개의 약이 갱신되었습니다.'
         })
     
@@ -254,10 +223,9 @@ class MedicationLogViewSet(viewsets.ModelViewSet):
         log.taken_datetime = timezone.now()
         log.save()
         
-        # Celery 태스크 취소 (Safety Line)
-        if log.celery_task_id:
-            from apps.alerts.tasks import revoke_alert_task
-            revoke_alert_task(log.celery_task_id)
+        # 예약된 비상 알림 취소 (Safety Line)
+        from apps.alerts.tasks import cancel_pending_alerts
+        cancel_pending_alerts([log.id])
         
         serializer = self.get_serializer(log)
         return Response(serializer.data)
@@ -274,42 +242,31 @@ class MedicationLogViewSet(viewsets.ModelViewSet):
         
         if log_ids:
             # log_ids로 직접 지정된 경우
-            logs = self.get_queryset().filter(
-                id__in=log_ids,
-                status=MedicationLog.Status.PENDING
-            )
+            filters = {'log_ids': log_ids}
         elif group_id and time_of_day:
-            # 그룹 + 시간대로 필터
-            today = timezone.now().date()
-            logs = self.get_queryset().filter(
-                schedule__medication__group_id=group_id,
-                schedule__time_of_day=time_of_day,
-                scheduled_datetime__date=today,
-                status=MedicationLog.Status.PENDING
-            )
+            # 그룹 + 시간대 + 오늘(현지 날짜)로 필터
+            filters = {
+                'group_id': group_id,
+                'time_of_day': time_of_day,
+                'local_date': timezone.localdate(),
+            }
         else:
             return Response(
                 {'error': 'log_ids 또는 group_id와 time_of_day가 필요합니다.'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        now = timezone.now()
-        taken_logs = []
+        # pending 로그를 UPDATE ... RETURNING 1회로 복용 완료 처리하고
+        # 예약된 비상 알림도 같은 트랜잭션에서 일괄 취소 (Safety Line)
+        from apps.alerts.tasks import cancel_pending_alerts
+        with transaction.atomic():
+            taken_logs = take_medication_logs(request.user.id, **filters)
+            cancel_pending_alerts([log.id for log in taken_logs])
         
-        for log in logs:
-            log.status = MedicationLog.Status.TAKEN
-            log.taken_datetime = now
-            log.save()
-            
-            # Celery 태스크 취소 (Safety Line)
-            if log.celery_task_id:
-                try:
-                    from apps.alerts.tasks import revoke_alert_task
-                    revoke_alert_task(log.celery_task_id)
-                except:
-                    pass
-            
-            taken_logs.append(log)
+        # UPDATE는 시그널이 발생하지 않으므로 일별 집계/캘린더 캐시 직접 갱신
+        notify_logs_changed(
+            (request.user.id, log.scheduled_datetime) for log in taken_logs
+        )
         
         serializer = self.get_serializer(taken_logs, many=True)
         return Response({
@@ -320,9 +277,10 @@ class MedicationLogViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def today(self, request):
         """오늘의 복약 기록 조회"""
-        today = timezone.localdate()
+        day_start, day_end = get_local_day_range(timezone.localdate())
         logs = self.get_queryset().filter(
-            scheduled_datetime__date=today
+            scheduled_datetime__gte=day_start,
+            scheduled_datetime__lt=day_end,
         ).order_by('schedule__scheduled_time')
         serializer = self.get_serializer(logs, many=True)
         return Response(serializer.data)
@@ -330,49 +288,11 @@ class MedicationLogViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def calendar(self, request):
         """월별 복약 현황 및 병원 방문일 조회"""
-        year = int(request.query_params.get('year', timezone.now().year))
-        month = int(request.query_params.get('month', timezone.now().month))
-        
-        logs = self.get_queryset().filter(
-            scheduled_datetime__year=year,
-            scheduled_datetime__month=month
-        )
-        
-        # 날짜별 집계
-        daily_summary = {}
-        for log in logs:
-            date_str = log.scheduled_datetime.date().isoformat()
-            if date_str not in daily_summary:
-                daily_summary[date_str] = {'total': 0, 'taken': 0, 'missed': 0}
-            daily_summary[date_str]['total'] += 1
-            if log.status == MedicationLog.Status.TAKEN:
-                daily_summary[date_str]['taken'] += 1
-            elif log.status == MedicationLog.Status.MISSED:
-                daily_summary[date_str]['missed'] += 1
-        
-        # 병원 방문일 (약 떨어지는 날) 계산
-        hospital_visits = []
-        medications = Medication.objects.filter(
-            user=request.user,
-            is_active=True,
-            days_supply__isnull=False,
-            start_date__isnull=False
-        )
-        
-        for med in medications:
-            end_date = med.end_date
-            if end_date and end_date.year == year and end_date.month == month:
-                hospital_visits.append({
-                    'date': end_date.isoformat(),
-                    'medication_id': med.id,
-                    'medication_name': med.name,
-                    'days_supply': med.days_supply,
-                })
+        year, month, error_response = parse_calendar_month(request.query_params)
+        if error_response:
+            return error_response
         
-        return Response({
-            'daily_summary': daily_summary,
-            'hospital_visits': hospital_visits,
-        })
+        return Response(get_month_calendar(request.user, year, month))
     
     @action(detail=False, methods=['get'], url_path='by-date')
     def by_date(self, request):
@@ -393,9 +313,26 @@ class MedicationLogViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        logs = self.get_queryset().filter(
-            scheduled_datetime__date=target_date
-        ).order_by('schedule__scheduled_time')
+        day_start, day_end = get_local_day_range(target_date)
+        logs = list(self.get_queryset().filter(
+            scheduled_datetime__gte=day_start,
+            scheduled_datetime__lt=day_end,
+        ))
+        
+        # 지난 달 이전: 아카이브 파일로 옮겨진 기록 병합 (아직 삭제되지 않은 행과 중복 제외)
+        if target_date < timezone.localdate().replace(day=1):
+            known_ids = {log.id for log in logs}
+            logs += [
+                log for log in read_archived_logs(request.user, target_date)
+                if log.id not in known_ids
+            ]
+        
+        # rolling 모드: 아직 생성되지 않은 미래 복용 예정 병합
+        logs += build_virtual_logs(request.user, target_date, target_date + timedelta(days=1))
+        
+        # DB/아카이브/가상 기록을 같은 기준으로 정렬 (예정 일시 → 스케줄 시각)
+        logs.sort(key=lambda log: (log.scheduled_datetime, log.schedule.scheduled_time))
+        
         serializer = self.get_serializer(logs, many=True)
         return Response(serializer.data)
 
@@ -442,9 +379,11 @@ class SeniorTodayView(SeniorMonitoringMixin, APIView):
             return error_response
         
         today = timezone.localdate()
+        day_start, day_end = get_local_day_range(today)
         logs = MedicationLog.objects.filter(
             schedule__medication__user=senior,
-            scheduled_datetime__date=today
+            scheduled_datetime__gte=day_start,
+            scheduled_datetime__lt=day_end,
         ).select_related('schedule__medication__group', 'schedule').order_by('schedule__scheduled_time')
         
         serializer = MedicationLogSerializer(logs, many=True)
@@ -499,52 +438,18 @@ class SeniorCalendarView(SeniorMonitoringMixin, APIView):
         if error_response:
             return error_response
         
-        year = int(request.query_params.get('year', timezone.now().year))
-        month = int(request.query_params.get('month', timezone.now().month))
-        
-        logs = MedicationLog.objects.filter(
-            schedule__medication__user=senior,
-            scheduled_datetime__year=year,
-            scheduled_datetime__month=month
-        )
-        
-        # 날짜별 집계
-        daily_summary = {}
-        for log in logs:
-            date_str = log.scheduled_datetime.date().isoformat()
-            if date_str not in daily_summary:
-                daily_summary[date_str] = {'total': 0, 'taken': 0, 'missed': 0}
-            daily_summary[date_str]['total'] += 1
-            if log.status == MedicationLog.Status.TAKEN:
-                daily_summary[date_str]['taken'] += 1
-            elif log.status == MedicationLog.Status.MISSED:
-                daily_summary[date_str]['missed'] += 1
-        
-        # 병원 방문일 (약 떨어지는 날) 계산
-        hospital_visits = []
-        medications = Medication.objects.filter(
-            user=senior,
-            is_active=True,
-            days_supply__isnull=False,
-            start_date__isnull=False
-        )
+        year, month, error_response = parse_calendar_month(request.query_params)
+        if error_response:
+            return error_response
         
-        for med in medications:
-            end_date = med.end_date
-            if end_date and end_date.year == year and end_date.month == month:
-                hospital_visits.append({
-                    'date': end_date.isoformat(),
-                    'medication_id': med.id,
-                    'medication_name': med.name,
-                    'days_supply': med.days_supply,
-                })
+        calendar = get_month_calendar(senior, year, month)
         
         return Response({
             'senior_id': senior.id,
             'senior_name': senior.first_name or senior.username,
             'year': year,
             'month': month,
-            'daily_summary': daily_summary,
-            'hospital_visits': hospital_visits,
+            'daily_summary': calendar['daily_summary'],
+            'hospital_visits': calendar['hospital_visits'],
         })
 
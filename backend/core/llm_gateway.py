@@ -0,0 +1,292 @@
+"""
+LLM Gateway - OpenAI 호출 공용 게이트웨이
+처방전 OCR(Vision), 약품명 RAG 임베딩, 건강 프로필 추론/키워드 생성, 라이프스타일 팁이 공유
+
+- 프로세스당 OpenAI 클라이언트 1개 (httpx 연결 풀 + keep-alive, fork 후 자식 프로세스에서 재생성)
+- 기능(feature)별 호출 타임아웃
+- 429/5xx/연결 오류 시 지수 백오프 + full jitter 재시도 (Retry-After 헤더 우선)
+- Redis 토큰 버킷으로 gunicorn/Celery 프로세스 전체의 모델별 분당 요청/토큰 한도 공유
+  (Redis 장애 시 제한 없이 호출)
+- 호출마다 기능/모델/토큰/지연 시간/재시도/결과 기록 (register_call_recorder로 등록한 기록 함수,
+  apps.medications가 AppConfig.ready()에서 llm_usage_service.record_llm_call 등록)
+"""
+
+import logging
+import math
+import os
+import random
+import threading
+import time
+import httpx
+import openai
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+_redis = None
+_redis_pid = None
+_redis_retry_at = 0.0
+_call_recorders = []
+
+
+class LLMGatewayError(Exception):
+    """게이트웨이에서 호출을 수행하지 못한 경우 (한도 대기 초과 등)"""
+
+
+def _config():
+    return settings.LLM_GATEWAY_SETTINGS
+
+
+def register_call_recorder(recorder):
+    """
+    호출 기록 함수 등록 (core가 앱에 의존하지 않도록 앱의 AppConfig.ready()에서 등록)
+    recorder(feature, model, latency_ms, outcome, prompt_tokens, completion_tokens, wait_ms, retries, error_type)
+    """
+    if recorder not in _call_recorders:
+        _call_recorders.append(recorder)
+
+
+def get_client():
+    """프로세스 공용 OpenAI 클라이언트 (재시도는 게이트웨이에서 처리하므로 SDK 재시도 비활성화)"""
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is not None and _client_pid == pid:
+        return _client
+    
+    with _client_lock:
+        if _client is None or _client_pid != pid:
+            config = _config()
+            http_client = httpx.Client(
+                # 기본은 인증서 검증, Windows 개발 환경에서만 OPENAI_VERIFY_SSL=False로 비활성화
+                verify=config.get('VERIFY_SSL', True),
+                limits=httpx.Limits(
+                    max_connections=config.get('MAX_CONNECTIONS', 20),
+                    max_keepalive_connections=config.get('MAX_KEEPALIVE_CONNECTIONS', 10),
+                    keepalive_expiry=config.get('KEEPALIVE_EXPIRY_SECONDS', 60),
+                ),
+                timeout=httpx.Timeout(config.get('DEFAULT_TIMEOUT_SECONDS', 30), connect=5.0),
+            )
+            _client = openai.OpenAI(
+                api_key=settings.OPENAI_API_KEY,
+                http_client=http_client,
+                max_retries=0,
+            )
+            _client_pid = pid
+    return _client
+
+
+# ==================== 토큰 버킷 (Redis) ====================
+
+# KEYS[1]: 버킷 키 / ARGV: 초당 충전량, 용량, 비용
+# 반환: 0이면 차감 완료, 그 외에는 비용만큼 충전될 때까지 기다려야 하는 시간(초)
+_TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local cost = math.min(tonumber(ARGV[3]), capacity)
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+return tostring(wait)
+"""
+
+
+def _get_redis():
+    global _redis, _redis_pid
+    pid = os.getpid()
+    if _redis is None or _redis_pid != pid:
+        import redis
+        _redis = redis.Redis.from_url(
+            _config().get('REDIS_URL') or settings.CELERY_BROKER_URL,
+            socket_timeout=1,
+            socket_connect_timeout=1,
+        )
+        _redis_pid = pid
+    return _redis
+
+
+def _take_tokens(bucket, per_minute, cost):
+    """버킷에서 cost 차감 시도, 부족하면 대기 시간(초) 반환 (Redis 장애 시 0)"""
+    global _redis_retry_at
+    # Redis 장애 중에는 호출마다 연결 타임아웃을 기다리지 않도록 잠시 버킷 사용 중단
+    if time.monotonic() < _redis_retry_at:
+        return 0.0
+    try:
+        script = _get_redis().register_script(_TOKEN_BUCKET_SCRIPT)
+        return float(script(keys=[f"llm_gateway:bucket:{bucket}"], args=[per_minute / 60.0, per_minute, cost]))
+    except Exception as e:
+        _redis_retry_at = time.monotonic() + 30
+        logger.warning(f"[LLM Gateway] 토큰 버킷 사용 불가, 30초간 제한 없이 호출: {e}")
+        return 0.0
+
+
+def acquire(model, estimated_tokens):
+    """
+    모델별 요청/토큰 한도 확보 (모든 프로세스 공유)
+    한도가 찰 때까지 대기하며, LIMITER_MAX_WAIT_SECONDS를 넘기면 LLMGatewayError
+    """
+    limits = _config().get('RATE_LIMITS', {}).get(model)
+    if not limits:
+        return
+    
+    deadline = time.monotonic() + _config().get('LIMITER_MAX_WAIT_SECONDS', 20)
+    for bucket, per_minute, cost in (
+        (f"{model}:rpm", limits.get('rpm'), 1),
+        (f"{model}:tpm", limits.get('tpm'), estimated_tokens),
+    ):
+        if not per_minute:
+            continue
+        while True:
+            wait = _take_tokens(bucket, per_minute, cost)
+            if wait <= 0:
+                break
+            if time.monotonic() + wait > deadline:
+                raise LLMGatewayError(f"{model} 호출 한도 대기 시간 초과 ({bucket})")
+            # 같은 시점에 깨어난 프로세스들이 동시에 재시도하지 않도록 지터 추가
+            time.sleep(wait + random.uniform(0, 0.1))
+
+
+# ==================== 재시도 ====================
+
+def _is_retryable(error):
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError, openai.RateLimitError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+def _retry_delay(error, attempt):
+    """Retry-After 헤더가 있으면 따르고, 없으면 지수 백오프 full jitter"""
+    response = getattr(error, 'response', None)
+    retry_after = response.headers.get('retry-after') if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), _config().get('BACKOFF_MAX_SECONDS', 20))
+        except ValueError:
+            pass
+    base = _config().get('BACKOFF_BASE_SECONDS', 0.5)
+    cap = _config().get('BACKOFF_MAX_SECONDS', 20)
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def _call(feature, model, estimated_tokens, request):
+    """한도 확보 후 호출, 재시도 가능한 오류는 MAX_RETRIES까지 재시도 (결과와 관계없이 호출 기록 1건 저장)"""
+    max_retries = _config().get('MAX_RETRIES', 3)
+    timeout = _config().get('TIMEOUTS', {}).get(feature, _config().get('DEFAULT_TIMEOUT_SECONDS', 30))
+    
+    started = time.perf_counter()
+    wait_seconds = 0.0
+    attempt = 0
+    response = None
+    outcome, error_type = 'success', ''
+    try:
+        while True:
+            wait_started = time.perf_counter()
+            acquire(model, estimated_tokens)
+            wait_seconds += time.perf_counter() - wait_started
+            try:
+                response = request(timeout)
+                return response
+            except Exception as error:
+                if not _is_retryable(error) or attempt >= max_retries:
+                    raise
+                delay = _retry_delay(error, attempt)
+                logger.warning(
+                    f"[LLM Gateway] {feature} 재시도 {attempt + 1}/{max_retries} "
+                    f"({type(error).__name__}, {delay:.2f}초 후)"
+                )
+                time.sleep(delay)
+                attempt += 1
+    except LLMGatewayError:
+        outcome, error_type = 'throttled', 'LLMGatewayError'
+        raise
+    except Exception as error:
+        outcome, error_type = 'error', type(error).__name__
+        raise
+    finally:
+        _record(feature, model, response, started, wait_seconds, attempt, outcome, error_type)
+
+
+def _record(feature, model, response, started, wait_seconds, retries, outcome, error_type):
+    """등록된 기록 함수로 호출 기록 전달, 기록 실패는 호출 결과에 영향 없음"""
+    if not _call_recorders:
+        return
+    usage = getattr(response, 'usage', None)
+    call = {
+        'feature': feature,
+        'model': model,
+        'latency_ms': (time.perf_counter() - started) * 1000,
+        'wait_ms': wait_seconds * 1000,
+        'retries': retries,
+        'outcome': outcome,
+        'error_type': error_type,
+        'prompt_tokens': getattr(usage, 'prompt_tokens', 0),
+        'completion_tokens': getattr(usage, 'completion_tokens', 0),
+    }
+    for recorder in _call_recorders:
+        try:
+            recorder(**call)
+        except Exception as e:
+            logger.error(f"[LLM Gateway] 호출 기록 실패: {e}")
+
+
+def _estimate_tokens(messages, max_tokens):
+    """요청 토큰 추정 (한국어 기준 약 2자당 1토큰, 이미지 1장은 고정 비용)"""
+    tokens = 0
+    for message in messages:
+        content = message.get('content')
+        parts = content if isinstance(content, list) else [{'type': 'text', 'text': content or ''}]
+        for part in parts:
+            if part.get('type') == 'image_url':
+                tokens += _config().get('IMAGE_TOKEN_ESTIMATE', 800)
+            else:
+                tokens += math.ceil(len(part.get('text', '')) / 2)
+    return tokens + (max_tokens or _config().get('DEFAULT_COMPLETION_TOKENS', 1000))
+
+
+def chat_completion(feature, model, messages, **kwargs):
+    """
+    Chat Completions 호출
+    
+    Args:
+        feature: 호출 기능 이름 (타임아웃/로그 구분, 예: 'ocr_vision', 'health_profile')
+        model: 모델 이름
+        messages: 메시지 목록
+        **kwargs: chat.completions.create 추가 인자
+    """
+    estimated = _estimate_tokens(messages, kwargs.get('max_tokens'))
+    return _call(
+        feature, model, estimated,
+        lambda timeout: get_client().chat.completions.create(
+            model=model, messages=messages, timeout=timeout, **kwargs
+        ),
+    )
+
+
+def create_embedding(feature, model, input):
+    """
+    Embeddings 호출
+    
+    Args:
+        feature: 호출 기능 이름 (예: 'rag_embedding')
+        model: 임베딩 모델 이름
+        input: 문자열 또는 문자열 목록
+    """
+    texts = input if isinstance(input, list) else [input]
+    estimated = sum(math.ceil(len(text) / 2) for text in texts)
+    return _call(
+        feature, model, estimated,
+        lambda timeout: get_client().embeddings.create(model=model, input=input, timeout=timeout),
+    )
@@ -186,6 +186,12 @@ CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'Asia/Seoul'
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
 
+# 처방전 OCR 스캔(수십 초 소요)은 전용 큐로 분리하여 알림 태스크 지연 방지
+# 워커: celery -A core worker -Q ocr --concurrency=2 --prefetch-multiplier=1
+CELERY_TASK_ROUTES = {
+    'apps.medications.tasks.process_scan_job': {'queue': 'ocr'},
+}
+
 # Celery Beat 스케줄 (매일 실행되는 태스크)
 from celery.schedules import crontab
 CELERY_BEAT_SCHEDULE = {
@@ -193,6 +199,38 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'apps.alerts.tasks.schedule_daily_reminders',
         'schedule': crontab(hour=0, minute=5),  # 매일 00:05 (Asia/Seoul)
     },
+    'dispatch-due-notifications': {
+        'task': 'apps.alerts.tasks.dispatch_due_notifications',
+        'schedule': crontab(),  # 매분 (리마인더/비상 알림 디스패처)
+    },
+    'check-expo-push-receipts': {
+        'task': 'apps.alerts.tasks.check_expo_push_receipts',
+        'schedule': crontab(minute='*/15'),  # 15분마다 (Expo 발송 영수증 확인)
+    },
+    'materialize-rolling-window': {
+        'task': 'apps.medications.tasks.materialize_rolling_window',
+        'schedule': crontab(hour=0, minute=1),  # 매일 00:01 (rolling 모드 복약 기록 생성)
+    },
+    'sweep-missed-doses': {
+        'task': 'apps.medications.tasks.sweep_missed_doses',
+        'schedule': crontab(minute='*/10'),  # 10분마다 (미복용 기록 정리)
+    },
+    'maintain-partitions': {
+        'task': 'apps.medications.tasks.maintain_partitions',
+        'schedule': crontab(hour=3, minute=30),  # 매일 03:30 (월별 파티션 생성/분리)
+    },
+    'archive-cold-logs': {
+        'task': 'apps.medications.tasks.archive_cold_logs',
+        'schedule': crontab(day_of_month=2, hour=4, minute=0),  # 매월 2일 04:00 (콜드 아카이브)
+    },
+    'purge-scan-result-cache': {
+        'task': 'apps.medications.tasks.purge_scan_result_cache',
+        'schedule': crontab(hour=4, minute=30),  # 매일 04:30 (만료된 스캔 결과 캐시 삭제)
+    },
+    'purge-llm-call-logs': {
+        'task': 'apps.medications.tasks.purge_llm_call_logs',
+        'schedule': crontab(hour=4, minute=40),  # 매일 04:40 (보관 기간이 지난 OpenAI 호출 기록 삭제)
+    },
     'refresh-youtube-cache': {
         'task': 'apps.health.tasks.refresh_youtube_cache',
         'schedule': crontab(hour=5, minute=0),  # 매일 05:00 (Asia/Seoul)
@@ -209,6 +247,37 @@ CELERY_TASK_ALWAYS_EAGER = DEBUG  # DEBUG=True일 때만 동기 실행
 
 
 
+# 로깅: apps.*, core.* 모듈 로거(태스크 실행 건수, 캐시/게이트웨이 경고 등)를 콘솔로 출력
+# gunicorn/Celery 워커 로그에서 확인 (APP_LOG_LEVEL로 레벨 변경)
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {
+            'format': '[{asctime}] {levelname} {name}: {message}',
+            'style': '{',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'simple',
+        },
+    },
+    'loggers': {
+        'apps': {
+            'handlers': ['console'],
+            'level': os.environ.get('APP_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+        'core': {
+            'handlers': ['console'],
+            'level': os.environ.get('APP_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 # OpenAI API Key (for OCR structuring, Health Profile)
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', '')
 
@@ -218,9 +287,144 @@ UPSTAGE_API_KEY = os.environ.get('UPSTAGE_API_KEY', '')
 # YouTube Data API v3
 YOUTUBE_API_KEY = os.environ.get('YOUTUBE_API_KEY', '')
 
+# 복약 기록(MedicationLog) 생성 방식
+# - full: 약 등록 시 처방 기간 전체 로그를 미리 생성
+# - rolling: 오늘부터 ROLLING_WINDOW_DAYS일 구간만 실제 로그로 생성 (매일 00:01 갱신)
+#            그 이후의 복용 예정은 스케줄로부터 가상 계산하여 조회 API에서 병합
+MEDICATION_LOG_SETTINGS = {
+    'MATERIALIZATION_MODE': os.environ.get('MEDICATION_LOG_MATERIALIZATION_MODE', 'full'),
+    'ROLLING_WINDOW_DAYS': 2,  # 오늘 + 내일
+    # 월별 파티션 (PostgreSQL, 복약 기록/비상 알림 공통)
+    'PARTITION_MONTHS_AHEAD': 3,  # 미리 생성할 미래 월 파티션 수
+    'PARTITION_RETENTION_MONTHS': int(os.environ.get('MEDICATION_LOG_RETENTION_MONTHS', 0)),  # 0이면 분리하지 않음
+    'PARTITION_DROP_DETACHED': False,  # 분리한 파티션 삭제 여부 (False면 테이블로 남김)
+    'PARTITION_COPY_BATCH_SIZE': 10000,  # 파티션 변환 마이그레이션 배치 복사 크기 (id 구간)
+    # 콜드 아카이브 (보관 기간이 지난 월을 압축 JSONL 파일로 이전, default_storage 사용)
+    # 파티션 분리(PARTITION_RETENTION_MONTHS)보다 짧게 설정해야 아카이브 전 분리되지 않음
+    'ARCHIVE_AFTER_MONTHS': int(os.environ.get('MEDICATION_LOG_ARCHIVE_AFTER_MONTHS', 0)),  # 0이면 비활성화
+    'ARCHIVE_PREFIX': 'archives',
+    'ARCHIVE_CHUNK_SIZE': 2000,  # keyset 페이지/iterator 청크 크기
+    'ARCHIVE_DELETE_BATCH_SIZE': 1000,  # 아카이브 후 배치 삭제 크기
+}
+
+# 처방전 이미지 전처리 (GPT-4o Vision 전송 전 축소/압축)
+OCR_IMAGE_SETTINGS = {
+    'MAX_SIDE': 2048,  # Vision high detail 입력 박스 (긴 변)
+    'SHORT_SIDE': 768,  # Vision high detail 짧은 변 (그 이상은 모델에서 축소됨)
+    'CROP_DOCUMENT': os.environ.get('OCR_CROP_DOCUMENT', 'False') == 'True',  # 테두리 배경 자르기
+    'GRAYSCALE': True,
+    'TARGET_BYTES': 300 * 1024,  # 적응형 JPEG 압축 목표 크기
+    'MAX_QUALITY': 85,
+    'MIN_QUALITY': 50,
+    'VISION_DETAIL': 'high',
+}
+
+# 처방전 스캔 결과 캐시 (정규화 이미지 내용 해시 정확 일치, Redis + DB)
+SCAN_RESULT_CACHE_SETTINGS = {
+    'ENABLED': True,
+    'VERSION': 1,  # 프롬프트/전처리 변경 시 올려서 이전 결과 무효화
+    'TTL_SECONDS': 7 * 24 * 3600,  # 결과 보관 기간
+    'LOCK_TIMEOUT_SECONDS': 120,  # 동시 스캔 계산 잠금 (OCR 태스크 시간 제한과 맞춤)
+    'WAIT_INTERVAL_SECONDS': 0.5,  # 진행 중 계산 결과 대기 간격
+}
+
+# 처방전 스캔 비동기 작업 (상태/결과는 캐시에 TTL로 저장)
+SCAN_JOB_SETTINGS = {
+    'RESULT_TTL_SECONDS': 3600,  # 작업 상태/결과 보관 시간
+    'IMAGE_TTL_SECONDS': 600,  # 업로드 이미지 보관 시간 (완료/실패 시 삭제, 재전달 시 재처리용)
+    'MAX_IMAGE_BYTES': 15 * 1024 * 1024,  # 업로드 이미지 최대 크기
+}
+
+# OpenAI 호출 게이트웨이 (core/llm_gateway.py)
+LLM_GATEWAY_SETTINGS = {
+    'VERIFY_SSL': os.environ.get('OPENAI_VERIFY_SSL', 'True') == 'True',  # Windows 개발 환경에서만 False
+    'MAX_CONNECTIONS': 20,  # 프로세스당 최대 연결 수
+    'MAX_KEEPALIVE_CONNECTIONS': 10,
+    'KEEPALIVE_EXPIRY_SECONDS': 60,
+    'DEFAULT_TIMEOUT_SECONDS': 30,
+    # 기능별 호출 타임아웃 (초)
+    'TIMEOUTS': {
+        'ocr_vision': 60,
+        'rag_embedding': 10,
+        'condition_inference': 30,
+        'search_queries': 30,
+        'lifestyle_tips': 30,
+    },
+    'MAX_RETRIES': 3,  # 429/5xx/연결 오류 재시도 횟수
+    'BACKOFF_BASE_SECONDS': 0.5,
+    'BACKOFF_MAX_SECONDS': 20,
+    # 모델별 분당 요청(rpm)/토큰(tpm) 한도 - 모든 gunicorn/Celery 프로세스가 Redis 버킷 공유
+    'RATE_LIMITS': {
+        'gpt-4o': {'rpm': 500, 'tpm': 30000},
+        'text-embedding-3-small': {'rpm': 3000, 'tpm': 1000000},
+    },
+    'LIMITER_MAX_WAIT_SECONDS': 20,  # 한도 대기 최대 시간 (초과 시 LLMGatewayError)
+    'IMAGE_TOKEN_ESTIMATE': 800,  # Vision 이미지 1장 토큰 추정치
+    'DEFAULT_COMPLETION_TOKENS': 1000,  # max_tokens 미지정 시 응답 토큰 추정치
+    'REDIS_URL': None,  # 미지정 시 CELERY_BROKER_URL 사용
+}
+
+# 약품명 RAG 보정 (Pinecone)
+RAG_SETTINGS = {
+    'QUERY_CONCURRENCY': 8,  # 처방전 1건의 Pinecone 동시 검색 수 (연결 풀 크기)
+    'QUERY_TIMEOUT_SECONDS': 10,
+    'VERIFY_SSL': os.environ.get('PINECONE_VERIFY_SSL', 'True') == 'True',  # Windows 개발 환경에서만 False
+    # 로컬 약품명 색인 (확실한 일치는 임베딩/Pinecone 없이 보정)
+    'NAME_INDEX_ENABLED': True,
+    'NAME_DATA_PATH': BASE_DIR / 'data' / 'medications.json',
+    'NAME_INDEX_PATH': BASE_DIR / 'data' / 'medication_name_index.pkl',  # build_medication_name_index로 생성
+    'NAME_FUZZY_THRESHOLD': 0.85,  # 자모 편집 거리 유사도 최소값
+    'NAME_FUZZY_MARGIN': 0.05,  # 1·2위 후보 유사도 최소 차이 (미만이면 벡터 검색)
+    'NAME_PREFIX_MIN_LENGTH': 3,  # 접두어 일치를 허용할 최소 기본명 길이
+    # 벡터 검색: 'pinecone' (원격) 또는 'local' (build_medication_vector_index로 만든 mmap 색인)
+    'VECTOR_BACKEND': os.environ.get('RAG_VECTOR_BACKEND', 'pinecone'),
+    'VECTOR_INDEX_DIR': BASE_DIR / 'data' / 'vector_index',
+    'VECTOR_INDEX_DIMENSIONS': None,  # 로컬 색인에 저장할 앞쪽 임베딩 차원 수 (None이면 전체 1536)
+    # 로컬 색인 유사도 임계값 (None이면 Pinecone과 같은 0.7, 1536차원 기준 값이므로 차원을 줄이면 다시 보정해서 설정)
+    'VECTOR_INDEX_THRESHOLD': None,
+    'VECTOR_INDEX_NPROBE': 8,  # 질의당 검색할 IVF 목록 수 (0이면 전체 검색)
+    'VECTOR_INDEX_RELOAD_SECONDS': 60,  # manifest.json 변경 확인 간격
+}
+
+# 약품명 임베딩 캐시 (프로세스 내 LRU → Redis)
+EMBEDDING_CACHE_SETTINGS = {
+    'ENABLED': True,
+    'LRU_SIZE': 2000,  # 프로세스당 보관 벡터 수 (1536차원 float32 약 6KB → 약 12MB)
+    'TTL_SECONDS': 30 * 24 * 3600,  # Redis 보관 기간
+    'STATS_TTL_SECONDS': 35 * 24 * 3600,  # 일자별 적중률 통계 보관 기간
+}
+
+# OpenAI 호출 기록 (LLMCallLog)
+LLM_USAGE_SETTINGS = {
+    'ENABLED': True,
+    'BUFFER_SIZE': 50,  # 버퍼가 이만큼 차면 일괄 저장
+    'FLUSH_INTERVAL_SECONDS': 10,  # 가장 오래된 기록이 이 시간을 넘으면 다음 호출/요청/태스크 종료 시 저장
+    'RETENTION_DAYS': 90,  # 호출 기록 보관 기간
+    # 리포트 예상 비용 계산용 단가 (USD / 100만 토큰)
+    'PRICING': {
+        'gpt-4o': {'input': 2.5, 'output': 10.0},
+        'text-embedding-3-small': {'input': 0.02, 'output': 0.0},
+    },
+}
+
+# 푸시 발송 (apps/alerts/fcm_service.py)
+PUSH_SETTINGS = {
+    # Expo Push API 인증서 검증 (Windows 개발 환경에서만 EXPO_VERIFY_SSL=False)
+    'EXPO_VERIFY_SSL': os.environ.get('EXPO_VERIFY_SSL', 'True') == 'True',
+}
+
 # Safety Line Settings (골든타임 세이프티 라인)
 SAFETY_LINE_SETTINGS = {
     'DEFAULT_THRESHOLD_MINUTES': 30,  # 미복약 임계 시간 (분)
     'REMINDER_BEFORE_THRESHOLD': 10,  # 임계 전 리마인더 (분)
     'MAX_RETRY_ALERTS': 3,  # 최대 알림 재시도 횟수
+    'DISPATCH_TICK_SECONDS': 60,  # 디스패처 틱 간격 (초)
+    'DISPATCH_BATCH_SIZE': 500,  # 디스패처 1회 선점/발송 배치 크기
+    'DISPATCH_CATCHUP_MINUTES': 60,  # 워커 중단 후 재발송을 허용하는 지연 한도 (분)
+    'DISPATCH_LEASE_MINUTES': 5,  # 선점 후 발송 결과가 없으면 다시 선점하기까지의 임대 시간 (분)
+    'DISPATCH_PUSH_CHUNK_SIZE': 100,  # 발송 결과를 DB에 반영하는 단위 (푸시 요청 1회 분량)
+    'PLANNER_SHARDS': 8,  # 일일 알림 계획 샤드 수 (user_id 모듈로)
+    'PLANNER_CHUNK_SIZE': 2000,  # 일일 알림 계획 keyset 청크 크기
+    'MISSED_GRACE_MINUTES': 120,  # 예정 시간 이후 미복용(missed) 처리까지 유예 시간 (분)
+    'MISSED_SWEEP_BATCH_SIZE': 1000,  # 미복용 정리 배치 크기
 }
@@ -538,7 +538,7 @@ export default function CalendarScreen() {
                     ) : (
                         <View style={styles.logsList}>
                             {selectedDateLogs.map((log) => (
-                                <View key={log.id} style={styles.logItem}>
+                                <View key={log.id ?? `${log.schedule}-${log.scheduled_datetime}`} style={styles.logItem}>
                                     <View style={[
                                         styles.logStatus,
                                         log.status === 'taken' ? styles.logStatusTaken :
@@ -565,7 +565,7 @@ export default function CalendarScreen() {
                                         log.status === 'taken' && styles.logStatusTextTaken,
                                         log.status === 'missed' && styles.logStatusTextMissed,
                                     ]}>
-                                        {log.status_display}
+                                        {log.is_virtual ? '복용 예정' : log.status_display}
                                     </Text>
                                 </View>
                             ))}
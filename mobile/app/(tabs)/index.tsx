@@ -62,7 +62,7 @@ export default function HomeScreen() {
     todayLogs.forEach((log: MedicationLog) => {
         const key = log.group_id
             ? `group_${log.group_id}_${log.time_of_day}`
-            : `single_${log.id}`;
+            : `single_${log.id ?? `${log.schedule}_${log.scheduled_datetime}`}`;
 
         if (!groupMap.has(key)) {
             groupMap.set(key, {
@@ -93,9 +93,12 @@ export default function HomeScreen() {
         if (group.allTaken) return;
         setTakingGroup(group.key);
         try {
+            // 가상 로그(아직 생성되지 않은 미래 복용 예정)는 ID가 없어 복용 처리 대상에서 제외
             const pendingLogIds = group.logs
                 .filter((log) => log.status !== 'taken')
-                .map((log) => log.id);
+                .map((log) => log.id)
+                .filter((id): id is number => id !== null);
+            if (pendingLogIds.length === 0) return;
             await batchTakeMedications(pendingLogIds);
         } catch (err) {
             console.error('Failed to take medications', err);
@@ -227,7 +230,7 @@ export default function HomeScreen() {
                             {/* 약 리스트 */}
                             <View style={{ marginBottom: spacing.lg }}>
                                 {group.logs.map((log) => (
-                                    <View key={log.id} style={styles.medItem}>
+                                    <View key={log.id ?? `${log.schedule}-${log.scheduled_datetime}`} style={styles.medItem}>
                                         <View style={[
                                             styles.checkbox,
                                             log.status === 'taken' && styles.checkboxChecked
@@ -5,7 +5,7 @@
 import axios, { AxiosInstance } from 'axios';
 import * as SecureStore from 'expo-secure-store';
 import { Platform } from 'react-native';
-import type { User, Medication, MedicationLog, Alert, ApiResponse, GuardianRelation, EmergencyContact, CalendarData, HealthProfile, CachedVideo, VideoBookmark, LifestyleTip } from './types';
+import type { User, Medication, MedicationLog, Alert, ApiResponse, GuardianRelation, EmergencyContact, CalendarData, HealthProfile, CachedVideo, VideoBookmark, LifestyleTip, ScanJob } from './types';
 
 // 환경변수에서 API URL 가져오기
 // 프로덕션 서버 URL (AWS Lightsail + SSL)
@@ -151,8 +151,28 @@ export const api = {
         update: (id: number, data: Partial<Medication>) =>
             apiClient.patch<Medication>(`/medications/${id}/`, data),
         delete: (id: number) => apiClient.delete(`/medications/${id}/`),
-        scanPrescriptionBase64: (base64Image: string) =>
-            apiClient.post('/medications/scan/', { image_base64: base64Image }, { timeout: 60000 }),
+        // 스캔 작업 등록 후 완료될 때까지 상태 조회 (OCR은 서버의 전용 워커에서 처리)
+        // 서버는 즉시 응답하므로 조회 간격을 1초부터 최대 5초까지 늘려가며 재조회
+        scanPrescriptionBase64: async (base64Image: string) => {
+            const submitted = await apiClient.post<ScanJob>(
+                '/medications/scan-jobs/', { image_base64: base64Image }, { timeout: 60000 }
+            );
+            let job = submitted.data;
+            const deadline = Date.now() + 120000;
+            let interval = 1000;
+            while (job.status !== 'completed' && job.status !== 'failed') {
+                if (Date.now() > deadline) {
+                    throw new Error('OCR 처리 시간이 초과되었습니다.');
+                }
+                await new Promise((resolve) => setTimeout(resolve, interval));
+                interval = Math.min(interval * 1.5, 5000);
+                const response = await apiClient.get<ScanJob>(`/medications/scan-jobs/${job.job_id}/`);
+                job = response.data;
+            }
+            return { ...submitted, data: job.result ?? { success: false, message: job.error ?? undefined } };
+        },
+        getScanJob: (jobId: string) =>
+            apiClient.get<ScanJob>(`/medications/scan-jobs/${jobId}/`),
         batchDeactivate: (medicationIds: number[]) =>
             apiClient.post('/medications/batch-deactivate/', { medication_ids: medicationIds }),
         batchRenew: (medications: { id: number; days_supply?: number | null; start_date?: string | null }[]) =>
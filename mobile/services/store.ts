@@ -236,7 +236,7 @@ export const useMedicationStore = create<AppState>((set, get) => ({
             await api.logs.batchTake(logIds);
 
             const logs = get().todayLogs.map((log) =>
-                logIds.includes(log.id)
+                log.id !== null && logIds.includes(log.id)
                     ? { ...log, status: 'taken' as const, taken_datetime: new Date().toISOString() }
                     : log
             );
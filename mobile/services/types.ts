@@ -83,7 +83,7 @@ export interface MedicationSchedule {
 
 // 복약 기록
 export interface MedicationLog {
-    id: number;
+    id: number | null;  // 가상 로그(is_virtual)는 null - 복용 처리 등 ID가 필요한 동작 불가
     schedule: number;
     medication_name: string;
     medication_dosage: string;
@@ -96,6 +96,7 @@ export interface MedicationLog {
     status: 'pending' | 'taken' | 'missed' | 'skipped';
     status_display: string;
     notes: string;
+    is_virtual?: boolean;  // 아직 생성되지 않은 미래 복용 예정 (id 없음)
     created_at: string;
     updated_at: string;
 }
@@ -209,3 +210,16 @@ export interface VideoBookmark {
     created_at: string;
 }
 
+
+// 처방전 스캔 작업 (비동기 OCR)
+export interface ScanJob {
+    job_id: string;
+    status: 'queued' | 'running' | 'completed' | 'failed';
+    stage: string;
+    progress: number;
+    version: number;
+    result: { success: boolean; symptom?: string; medications?: any[]; message?: string } | null;
+    error: string | null;
+    created_at: string;
+    updated_at: string;
+}